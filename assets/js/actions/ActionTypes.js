@@ -1,4 +1,7 @@
 export const GET_COMMITS_SUCCESS = 'GET_COMMITS_SUCCESS';
 export const CREATE_REPOSITORY_SUCCESS = 'CREATE_REPO_SUCCESS';
 export const CREATE_REPOSITORY_FAILURE = 'CREATE_REPO_FAILURE';
+export const IMPORT_REPOSITORY_PROGRESS = 'IMPORT_REPO_PROGRESS';
 export const GET_REPOSITORIES_SUCCESS = 'GET_REPO_SUCCESS';
+export const GET_FACETS_SUCCESS = 'GET_FACETS_SUCCESS';
+export const RECEIVE_COMMIT = 'RECEIVE_COMMIT';
@@ -10,6 +10,11 @@ export const createRepositoryFailure = (errorMsg, successMessage) => ({
   payload: { errorMsg, successMessage },
 });
 
+export const importRepositoryProgress = (pages, commits) => ({
+  type: types.IMPORT_REPOSITORY_PROGRESS,
+  payload: { pages, commits },
+});
+
 export const getCommitsSuccess = (commits, next, previous) => ({
   type: types.GET_COMMITS_SUCCESS,
   payload: { commits, next, previous },
@@ -19,3 +24,15 @@ export const getRepositoriesSuccess = (repositories) => ({
   type: types.GET_REPOSITORIES_SUCCESS,
   payload: { repositories },
 });
+
+export const getFacetsSuccess = (facet, values, next, append) => ({
+  type: types.GET_FACETS_SUCCESS,
+  payload: {
+    facet, values, next, append,
+  },
+});
+
+export const receiveCommit = (commit) => ({
+  type: types.RECEIVE_COMMIT,
+  payload: { commit },
+});
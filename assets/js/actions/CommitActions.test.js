@@ -37,3 +37,19 @@ test('getCommitsSuccess returns type and payload with commits', () => {
   expect(result.type).toBe(types.GET_COMMITS_SUCCESS);
   expect(result.payload).toStrictEqual({ commits, next, previous });
 });
+
+test('receiveCommit returns type and payload with commit', () => {
+  const commit = { sha: 'sha' };
+
+  const result = actions.receiveCommit(commit);
+
+  expect(result.type).toBe(types.RECEIVE_COMMIT);
+  expect(result.payload).toStrictEqual({ commit });
+});
+
+test('importRepositoryProgress returns type and payload with pages and commits', () => {
+  const result = actions.importRepositoryProgress(2, 200);
+
+  expect(result.type).toBe(types.IMPORT_REPOSITORY_PROGRESS);
+  expect(result.payload).toStrictEqual({ pages: 2, commits: 200 });
+});
@@ -4,10 +4,22 @@ import store from '../store';
 import {
   createRepositorySuccess,
   createRepositoryFailure,
+  importRepositoryProgress,
   getRepositoriesSuccess,
   getCommitsSuccess,
+  getFacetsSuccess,
+  receiveCommit,
 } from '../actions/CommitActions';
 
+const IMPORT_POLL_INTERVAL_MS = 1000;
+const IMPORT_DONE_STATUSES = ['SUCCESS', 'FAILURE'];
+
+let commitStream = null;
+
+const wait = (ms) => new Promise((resolve) => {
+  setTimeout(resolve, ms);
+});
+
 export const getRepositories = async (url = '/api/repositories/') => {
   const response = await axios.get(url);
   const repositories = response.data.result;
@@ -20,6 +32,34 @@ export const getCommits = async (url = '/api/commits/') => {
   store.dispatch(getCommitsSuccess(commits, next, previous));
 };
 
+export const getFacets = async (facet, url = `/api/commits/facets/?facet=${facet}`) => {
+  const response = await axios.get(url);
+  const { results: values, next, previous } = response.data;
+  // Following pages are appended to the values already listed
+  store.dispatch(getFacetsSuccess(facet, values, next, previous !== null));
+};
+
+export const closeCommitStream = () => {
+  if (commitStream) {
+    commitStream.close();
+    commitStream = null;
+  }
+};
+
+export const streamCommits = (query) => {
+  closeCommitStream();
+
+  let url = '/api/commits/stream/';
+  if (query && query.length > 0) {
+    url += `?${query}`;
+  }
+
+  commitStream = new EventSource(url);
+  commitStream.addEventListener('commit', (event) => {
+    store.dispatch(receiveCommit(JSON.parse(event.data)));
+  });
+};
+
 export const filterCommits = (query) => {
   let url = '/api/commits/';
   if (query && query.length > 0) {
@@ -27,13 +67,37 @@ export const filterCommits = (query) => {
   }
 
   getCommits(url);
+  // New commits are pushed with the same filters as the listed ones
+  streamCommits(query);
+};
+
+export const pollRepositoryImport = async (jobId) => {
+  const response = await axios.get(`/api/repositories/imports/${jobId}/`);
+  const {
+    status, pages, commits, message,
+  } = response.data;
+
+  if (!IMPORT_DONE_STATUSES.includes(status)) {
+    store.dispatch(importRepositoryProgress(pages, commits));
+    await wait(IMPORT_POLL_INTERVAL_MS);
+    await pollRepositoryImport(jobId);
+    return;
+  }
+
+  // Imports of repositories missing on Github succeed with a message
+  if (status === 'FAILURE' || message) {
+    store.dispatch(createRepositoryFailure([message || 'Generic error'], false));
+    return;
+  }
+  store.dispatch(createRepositorySuccess(response.data, true));
+  getFacets('repository');
 };
 
 export const createRepository = async (values, headers, formDispatch) => {
   try {
     const response = await axios.post('/api/repositories/', values, { headers });
-    store.dispatch(createRepositorySuccess(response.data, true));
     formDispatch(reset('repoCreate'));
+    await pollRepositoryImport(response.data.job_id);
   } catch (error) {
     const errorData = error.response.data;
     const errorMsg = [];
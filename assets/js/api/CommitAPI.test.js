@@ -1,11 +1,15 @@
 import axios from 'axios';
 import { reset } from 'redux-form';
 import store from '../store';
-import { getCommits, createRepository } from './CommitAPI';
+import {
+  getCommits, getFacets, createRepository, pollRepositoryImport,
+} from './CommitAPI';
 import {
   createRepositorySuccess,
   createRepositoryFailure,
+  importRepositoryProgress,
   getCommitsSuccess,
+  getFacetsSuccess,
 } from '../actions/CommitActions';
 
 jest.mock('axios');
@@ -29,20 +33,48 @@ describe('getCommits', () => {
   });
 });
 
+describe('getFacets', () => {
+  test('retrieve the first page of a facet and dispatch it', async () => {
+    const mockResponse = {
+      data: {
+        results: [{ value: 'author', commits: 2 }],
+        previous: null,
+        next: '/api/commits/facets/?facet=author&page=2',
+      },
+    };
+    axios.get.mockResolvedValue(mockResponse);
+    const dispatchSpy = jest.spyOn(store, 'dispatch');
+
+    await getFacets('author');
+
+    expect(axios.get).toHaveBeenCalledWith('/api/commits/facets/?facet=author');
+    expect(dispatchSpy).toHaveBeenCalledWith(
+      getFacetsSuccess('author', mockResponse.data.results, mockResponse.data.next, false),
+    );
+  });
+});
+
 describe('createRepository', () => {
   test('should create a repository', async () => {
     const mockValues = { name: 'test' };
     const mockHeaders = { Authorization: 'Bearer token' };
-    const mockResponse = { data: { id: 1, name: 'test' } };
+    const mockResponse = { data: { job_id: 'job' } };
+    const mockJob = {
+      data: {
+        job_id: 'job', status: 'SUCCESS', pages: 1, commits: 3,
+      },
+    };
 
     axios.post.mockResolvedValue(mockResponse);
+    axios.get.mockResolvedValueOnce(mockJob);
 
     const dispatchSpy = jest.spyOn(store, 'dispatch');
     const formDispatch = jest.fn();
 
     await createRepository(mockValues, mockHeaders, formDispatch);
 
-    expect(dispatchSpy).toHaveBeenCalledWith(createRepositorySuccess(mockResponse.data, true));
+    expect(axios.get).toHaveBeenCalledWith('/api/repositories/imports/job/');
+    expect(dispatchSpy).toHaveBeenCalledWith(createRepositorySuccess(mockJob.data, true));
     expect(formDispatch).toHaveBeenCalledWith(reset('repoCreate'));
   });
 
@@ -84,6 +116,30 @@ describe('createRepository', () => {
     expect(formDispatch).toHaveBeenCalledWith(reset('repoCreate'));
   });
 
+  test('should not create a repository missing on Github', async () => {
+    const mockValues = { name: 'inexistent' };
+    const mockHeaders = { Authorization: 'Bearer token' };
+    const mockJob = {
+      data: {
+        job_id: 'job',
+        status: 'SUCCESS',
+        pages: 0,
+        commits: 0,
+        message: 'The requested repository does not exist',
+      },
+    };
+    axios.post.mockResolvedValue({ data: { job_id: 'job' } });
+    axios.get.mockResolvedValueOnce(mockJob);
+    const dispatchSpy = jest.spyOn(store, 'dispatch');
+    const formDispatch = jest.fn();
+
+    await createRepository(mockValues, mockHeaders, formDispatch);
+
+    expect(dispatchSpy).toHaveBeenCalledWith(
+      createRepositoryFailure(['The requested repository does not exist'], false),
+    );
+  });
+
   test('should not create a repository on generic error', async () => {
     const mockValues = { name: 'generic' };
     const mockHeaders = { Authorization: 'Bearer token' };
@@ -103,3 +159,41 @@ describe('createRepository', () => {
     expect(formDispatch).toHaveBeenCalledWith(reset('repoCreate'));
   });
 });
+
+describe('pollRepositoryImport', () => {
+  test('report the progress until the import is done', async () => {
+    const setTimeoutSpy = jest.spyOn(global, 'setTimeout')
+      .mockImplementation((callback) => callback());
+    const mockProgress = {
+      data: {
+        job_id: 'job', status: 'PROGRESS', pages: 2, commits: 200,
+      },
+    };
+    const mockJob = {
+      data: {
+        job_id: 'job', status: 'SUCCESS', pages: 3, commits: 250,
+      },
+    };
+    axios.get.mockResolvedValueOnce(mockProgress).mockResolvedValueOnce(mockJob);
+    const dispatchSpy = jest.spyOn(store, 'dispatch');
+
+    await pollRepositoryImport('job');
+
+    expect(dispatchSpy).toHaveBeenCalledWith(importRepositoryProgress(2, 200));
+    expect(dispatchSpy).toHaveBeenCalledWith(createRepositorySuccess(mockJob.data, true));
+    setTimeoutSpy.mockRestore();
+  });
+
+  test('report the message of a failed import', async () => {
+    axios.get.mockResolvedValueOnce({
+      data: {
+        job_id: 'job', status: 'FAILURE', pages: 0, commits: 0, message: 'Boom',
+      },
+    });
+    const dispatchSpy = jest.spyOn(store, 'dispatch');
+
+    await pollRepositoryImport('job');
+
+    expect(dispatchSpy).toHaveBeenCalledWith(createRepositoryFailure(['Boom'], false));
+  });
+});
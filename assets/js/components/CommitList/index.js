@@ -42,7 +42,7 @@ const CommitList = (props) => {
                       {' '}
                       on
                       {' '}
-                      <FilterButton query={commit.repository} type="repository__name" />
+                      <FilterButton query={commit.repository} type="repository__full_name" />
                       {' '}
                       at
                       {' '}
@@ -32,13 +32,22 @@ renderField.propTypes = {
 
 const RepoCreateForm = (props) => {
   const {
-    successMessage, handleSubmit, pristine, submitting, errorMsg,
+    successMessage, handleSubmit, pristine, submitting, errorMsg, importProgress,
   } = props;
   return (
     <div id="create-form">
       {successMessage && (
         <Alert alertTypeClass="alert-success" message={['Repository added successfully']} />
       )}
+      {importProgress && (
+        <Alert
+          alertTypeClass="alert-info"
+          message={[
+            `Importing repository: ${importProgress.commits} commits `
+            + `from ${importProgress.pages} pages`,
+          ]}
+        />
+      )}
       {!!errorMsg && (
         <Alert alertTypeClass="alert-danger" message={errorMsg} />
       )}
@@ -47,7 +56,7 @@ const RepoCreateForm = (props) => {
           <div className="col-10">
             <Field
               name="name"
-              placeholder="Enter the repository name, must match {user}/{repo}"
+              placeholder="Enter the repository name, must match {owner}/{repo}"
               className="form-control"
               component={renderField}
               type="text"
@@ -70,13 +79,16 @@ RepoCreateForm.propTypes = {
   submitting: PropTypes.bool.isRequired,
   successMessage: PropTypes.bool.isRequired,
   errorMsg: PropTypes.array,
+  importProgress: PropTypes.shape({
+    pages: PropTypes.number,
+    commits: PropTypes.number,
+  }),
 };
 
 const validate = (values) => {
-  const { username } = document.getElementById('main').dataset;
   const errors = {};
-  if (!values.name || !values.name.startsWith(`${username}/`)) {
-    errors.name = `Repository must belong to you (eg: ${username}/repo-name)`;
+  if (!values.name || !/^[^/]+\/[^/]+$/.test(values.name)) {
+    errors.name = 'Repository must match {owner}/{repo} (eg: octocat/repo-name)';
   }
   return errors;
 };
@@ -31,7 +31,7 @@ describe('RepoCreateForm component', () => {
     );
 
     expect(queryByRole('alert')).toBeFalsy();
-    expect(getByPlaceholderText('Enter the repository name, must match {user}/{repo}')).toBeTruthy();
+    expect(getByPlaceholderText('Enter the repository name, must match {owner}/{repo}')).toBeTruthy();
     expect(container.getElementsByClassName('form-control').length).toBe(1);
     expect(container.getElementsByClassName('invalid-feedback').length).toBe(0);
   });
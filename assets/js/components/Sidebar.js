@@ -4,9 +4,32 @@ import { connect } from 'react-redux';
 import PropTypes from 'prop-types';
 import { Link } from 'react-router-dom';
 import FilterButton from './FilterButton';
+import { getFacets } from '../api/CommitAPI';
+
+const FacetList = ({ facet, type, values, next }) => (
+  <>
+    {values.map(({ value, commits }) => (
+      <li key={`${facet}-${value}`} className="sidebar-brand">
+        <FilterButton query={value} type={type} />
+        <span className="badge">{commits}</span>
+      </li>
+    ))}
+    {next && (
+      <li className="sidebar-brand">
+        <button
+          type="button"
+          className="btn btn-link button-link"
+          onClick={() => getFacets(facet, next)}
+        >
+          More
+        </button>
+      </li>
+    )}
+  </>
+);
 
 const Sidebar = (props) => {
-  const { repositories } = props;
+  const { facets } = props;
 
   return (
     <div id="sidebar-wrapper">
@@ -14,22 +37,30 @@ const Sidebar = (props) => {
         <li className="sidebar-brand">
           <Link to="/">Github Monitor</Link>
         </li>
-        {repositories && repositories.map((name) => (
-          <li key={name} className="sidebar-brand">
-            <FilterButton query={name} type="repository__name" />
-          </li>
-        ))}
+        <FacetList
+          facet="repository"
+          type="repository__full_name"
+          values={facets.repository.values}
+          next={facets.repository.next}
+        />
+        <li className="sidebar-brand">Authors</li>
+        <FacetList
+          facet="author"
+          type="author"
+          values={facets.author.values}
+          next={facets.author.next}
+        />
       </ul>
     </div>
   );
 };
 
 Sidebar.propTypes = {
-  repositories: PropTypes.array,
+  facets: PropTypes.object,
 };
 
 const mapStateToProps = (store) => ({
-  repositories: store.commitState.repositories,
+  facets: store.commitState.facets,
 });
 
 export default connect(mapStateToProps)(Sidebar);
@@ -7,7 +7,13 @@ import CommitList from '../components/CommitList';
 class CommitListContainer extends React.Component {
   componentDidMount() {
     commitAPI.getCommits();
-    commitAPI.getRepositories();
+    commitAPI.getFacets('repository');
+    commitAPI.getFacets('author');
+    commitAPI.streamCommits();
+  }
+
+  componentWillUnmount() {
+    commitAPI.closeCommitStream();
   }
 
   render() {
@@ -7,25 +7,32 @@ import Form from '../components/RepoCreateForm';
 class RepoCreateContainer extends React.Component {
   submit = (values, dispatch) => {
     const token = document.getElementById('main').dataset.csrftoken;
-    const name = values.name.split('/')[1];
-    const v = { ...values, name };
-    return commitAPI.createRepository(v, { 'X-CSRFToken': token }, dispatch);
+    return commitAPI.createRepository(values, { 'X-CSRFToken': token }, dispatch);
   };
 
   render() {
-    const { successMessage, errorMsg } = this.props;
-    return <Form onSubmit={this.submit} successMessage={successMessage} errorMsg={errorMsg} />;
+    const { successMessage, errorMsg, importProgress } = this.props;
+    return (
+      <Form
+        onSubmit={this.submit}
+        successMessage={successMessage}
+        errorMsg={errorMsg}
+        importProgress={importProgress}
+      />
+    );
   }
 }
 
 RepoCreateContainer.propTypes = {
   successMessage: PropTypes.bool.isRequired,
-  errorMsg: PropTypes.array
+  errorMsg: PropTypes.array,
+  importProgress: PropTypes.object,
 };
 
 const mapStateToProps = (store) => ({
   successMessage: store.commitState.successMessage,
   errorMsg: store.commitState.errorMsg,
+  importProgress: store.commitState.importProgress,
 });
 
 export default connect(mapStateToProps)(RepoCreateContainer);
@@ -4,10 +4,15 @@ const initialState = {
   commits: [],
   successMessage: false,
   errorMsg: [],
+  importProgress: null,
   page: 1,
   nextPage: null,
   previousPage: null,
   repositories: [],
+  facets: {
+    author: { values: [], next: null },
+    repository: { values: [], next: null },
+  },
 };
 
 const commitReducer = (state = initialState, action) => {
@@ -24,6 +29,7 @@ const commitReducer = (state = initialState, action) => {
         ...state,
         errorMsg: '',
         successMessage: action.payload.successMessage,
+        importProgress: null,
       };
     }
     case types.CREATE_REPOSITORY_FAILURE: {
@@ -31,6 +37,15 @@ const commitReducer = (state = initialState, action) => {
         ...state,
         successMessage: action.payload.successMessage,
         errorMsg: action.payload.errorMsg,
+        importProgress: null,
+      };
+    }
+    case types.IMPORT_REPOSITORY_PROGRESS: {
+      return {
+        ...state,
+        errorMsg: [],
+        successMessage: false,
+        importProgress: action.payload,
       };
     }
     case types.GET_REPOSITORIES_SUCCESS: {
@@ -39,6 +54,30 @@ const commitReducer = (state = initialState, action) => {
         repositories: action.payload.repositories,
       };
     }
+    case types.GET_FACETS_SUCCESS: {
+      const {
+        facet, values, next, append,
+      } = action.payload;
+      const previousValues = append ? state.facets[facet].values : [];
+      return {
+        ...state,
+        facets: {
+          ...state.facets,
+          [facet]: { values: [...previousValues, ...values], next },
+        },
+      };
+    }
+    case types.RECEIVE_COMMIT: {
+      const { commit } = action.payload;
+      // Only the first page shows the newest commits
+      if (state.previousPage !== null || state.commits.some(({ sha }) => sha === commit.sha)) {
+        return state;
+      }
+      return {
+        ...state,
+        commits: [commit, ...state.commits],
+      };
+    }
     default:
       return state;
   }
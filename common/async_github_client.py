@@ -0,0 +1,192 @@
+import asyncio
+from http import HTTPStatus
+from logging import getLogger
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+from django.conf import settings
+
+from common.github_client import (DEFAULT_PER_PAGE, RATE_LIMITED_ATTEMPTS,
+                                  RETRY_STATUS_CODES, PaginationError,
+                                  prepare_request)
+from common.rate_limit import RateLimiter, RateLimitExceeded, get_rate_limiter
+from common.response_cache import (add_validators, get_response_cache,
+                                   make_cache_entry, make_cache_key)
+
+logger = getLogger('__name__')
+
+
+class AsyncGithubClient:
+    """
+    Asyncio service class for creating requests to Github API
+
+    It follows the same contract as GithubClient, while at most
+    GITHUB_API_MAX_CONCURRENCY requests are in flight at once
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        cache=None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        self.client = client or httpx.AsyncClient(
+            timeout=settings.GITHUB_API_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=settings.GITHUB_API_POOL_MAXSIZE),
+            transport=httpx.AsyncHTTPTransport(retries=settings.GITHUB_API_MAX_RETRIES),
+        )
+        self.cache = cache or get_response_cache()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.semaphore = asyncio.Semaphore(
+            max_concurrency or settings.GITHUB_API_MAX_CONCURRENCY
+        )
+
+    async def __aenter__(self) -> 'AsyncGithubClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _get(self, url: str, headers: dict, params: Optional[dict]) -> httpx.Response:
+        """
+        Send a GET, retrying 5xx responses with backoff
+        like the session of the sync client does
+        """
+
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                response = await self.client.get(url, headers=headers, params=params)
+
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt >= settings.GITHUB_API_MAX_RETRIES
+            ):
+                return response
+
+            logger.info("Retrying %s after a %s response", url, response.status_code)
+            await asyncio.sleep(settings.GITHUB_API_RETRY_BACKOFF * 2 ** attempt)
+            attempt += 1
+
+    async def _send(
+        self,
+        url: str,
+        headers: dict,
+        access_token: Optional[str],
+        params: Optional[dict],
+    ) -> httpx.Response:
+        for _ in range(RATE_LIMITED_ATTEMPTS):
+            wait = self.rate_limiter.reserve(access_token)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            response = await self._get(url, headers, params)
+
+            if not self.rate_limiter.update(access_token, response):
+                return response
+
+        raise RateLimitExceeded(self.rate_limiter.budget(access_token)['wait_seconds'])
+
+    async def _request(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        params: Optional[dict] = None,
+        use_cache: bool = True,
+    ) -> httpx.Response:
+        url, headers = prepare_request(path, access_token)
+        if not use_cache:
+            return await self._send(url, headers, access_token, params)
+
+        cache_key = make_cache_key(url, params, access_token)
+        cached = self.cache.get(cache_key)
+        add_validators(headers, cached)
+
+        response = await self._send(url, headers, access_token, params)
+
+        if response.status_code == HTTPStatus.NOT_MODIFIED and cached is not None:
+            logger.info("Not modified, using cached response for %s", response.url)
+            response_headers = dict(response.headers)
+            if cached.get('link'):
+                response_headers.setdefault('link', cached['link'])
+            return httpx.Response(
+                HTTPStatus.OK,
+                headers=response_headers,
+                content=cached['content'],
+                request=response.request,
+            )
+
+        entry = make_cache_entry(response)
+        if entry is not None:
+            self.cache.set(cache_key, entry)
+
+        return response
+
+    async def _send_request(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        params: Optional[dict] = None,
+        use_cache: bool = True,
+    ) -> Tuple[bool, Optional[httpx.Response]]:
+        try:
+            response = await self._request(path, access_token, params, use_cache)
+
+            logger.info("Requesting with %s", response.url)
+
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.info("Request failed. Error message: %s", e)
+            return False, None
+        return True, response
+
+    async def get(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        params: Optional[dict] = None,
+    ) -> Tuple[bool, dict]:
+        success, response = await self._send_request(path, access_token, params)
+        if not success:
+            return False, {}
+        return True, response.json()
+
+    async def get_pages(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        params: Optional[dict] = None,
+        *,
+        raise_on_error: bool = False,
+        use_cache: bool = True,
+    ) -> AsyncIterator[list]:
+        """
+        Yield the data of each page of a listing endpoint
+
+        Pages are requested lazily, following the `Link: rel="next"`
+        header until there are no more pages or a request fails.
+        With `raise_on_error` a failed request raises PaginationError,
+        and `use_cache=False` skips the response cache
+        """
+
+        params = {'per_page': DEFAULT_PER_PAGE, **(params or {})}
+        next_path = path
+
+        while next_path:
+            success, response = await self._send_request(
+                next_path, access_token, params, use_cache
+            )
+            if not success:
+                if raise_on_error:
+                    raise PaginationError(next_path)
+                return
+
+            yield response.json()
+
+            # The next link already carries the query string
+            next_path = response.links.get('next', {}).get('url')
+            params = None
@@ -1,14 +1,110 @@
+from http import HTTPStatus
 from logging import getLogger
-from typing import Optional, Tuple
+from typing import Callable, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
 from django.conf import settings
-from requests.exceptions import HTTPError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
+
+from common.rate_limit import (CORE_RESOURCE, GRAPHQL_RESOURCE, RateLimiter,
+                               RateLimitExceeded, get_rate_limiter)
+from common.response_cache import (add_validators, get_response_cache,
+                                   make_cache_entry, make_cache_key)
 
 logger = getLogger('__name__')
 
-DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_PER_PAGE = 100
+GRAPHQL_PATH = 'graphql'
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+RATE_LIMITED_ATTEMPTS = 2
+
+_session = None
+
+
+class PaginationError(Exception):
+    """
+    Raised when a page of a listing could not be fetched
+    """
+
+
+def build_session() -> requests.Session:
+    """
+    Build a keep-alive session with pooled connections
+
+    Requests are retried with backoff on connection
+    errors and on 5xx responses from the API
+    """
+
+    retry = Retry(
+        total=settings.GITHUB_API_MAX_RETRIES,
+        backoff_factor=settings.GITHUB_API_RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=('GET',),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.GITHUB_API_POOL_CONNECTIONS,
+        pool_maxsize=settings.GITHUB_API_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the session shared by every client of this process
+    """
+
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        _session = build_session()
+    return _session
+
+
+def prepare_request(path: str, access_token: Optional[str] = '') -> Tuple[str, dict]:
+    """
+    Build the url and headers of a request to Github API
+    """
+
+    headers = {'Accept': 'application/vnd.github+json'}
+    if access_token:
+        headers.update({'Authorization': f'Bearer {access_token}'})
+
+    url = urljoin(settings.GITHUB_API_URL, path)
+    return url, headers
+
+
+def send_request(func, *args, **kwargs) -> Tuple[bool, Optional[requests.Response]]:
+    """
+    Perform and log a request
+
+    It will return a boolean indicating
+    whether the request was successful
+    or not and return the response itself
+    """
+
+    try:
+        response = func(*args, **kwargs)
+
+        logger.info("Requesting with %s", response.url)
+
+        if not response.ok:
+            response.raise_for_status()
+    except RequestException as e:
+        logger.info("Request failed. Error message: %s", e)
+        return False, None
+    return True, response
 
 
 def log_request(func) -> Tuple[bool, dict]:
@@ -21,15 +117,8 @@ def log_request(func) -> Tuple[bool, dict]:
     """
 
     def wrap(*args, **kwargs):
-        try:
-            response = func(*args, **kwargs)
-
-            logger.info("Requesting with %s", response.url)
-
-            if not response.ok:
-                response.raise_for_status()
-        except HTTPError as e:
-            logger.info("Request failed. Error message: %s", e)
+        success, response = send_request(func, *args, **kwargs)
+        if not success:
             return False, {}
         return True, response.json()
     return wrap
@@ -40,17 +129,110 @@ class GithubClient:
     Service class for creating requests to Github API
     """
 
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        cache=None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self._session = session
+        self._cache = cache
+        self._rate_limiter = rate_limiter
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = get_session()
+        return self._session
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = get_response_cache()
+        return self._cache
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        if self._rate_limiter is None:
+            self._rate_limiter = get_rate_limiter()
+        return self._rate_limiter
+
+    def rate_limit_budget(
+        self,
+        access_token: Optional[str] = '',
+        resource: str = CORE_RESOURCE,
+    ) -> dict:
+        return self.rate_limiter.budget(access_token, resource)
+
     def _prepare_request(
         self,
         path: str,
         access_token: Optional[str] = ''
     ) -> Tuple[str, dict]:
-        headers = {'Accept': 'application/vnd.github+json'}
-        if access_token:
-            headers.update({'Authorization': f'Bearer {access_token}'})
+        return prepare_request(path, access_token)
+
+    def _request(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        params: Optional[dict] = None,
+        use_cache: bool = True,
+    ) -> requests.Response:
+        url, headers = self._prepare_request(path, access_token)
+        if not use_cache:
+            return self._send(self.session.get, url, headers, access_token, params=params)
 
-        url = urljoin(settings.GITHUB_API_URL, path)
-        return url, headers
+        cache_key = make_cache_key(url, params, access_token)
+        cached = self.cache.get(cache_key)
+        add_validators(headers, cached)
+
+        response = self._send(self.session.get, url, headers, access_token, params=params)
+
+        if response.status_code == HTTPStatus.NOT_MODIFIED and cached is not None:
+            logger.info("Not modified, using cached response for %s", response.url)
+            return self._restore_cached_response(response, cached)
+
+        entry = make_cache_entry(response)
+        if entry is not None:
+            self.cache.set(cache_key, entry)
+
+        return response
+
+    def _send(
+        self,
+        send: Callable[..., requests.Response],
+        url: str,
+        headers: dict,
+        access_token: Optional[str],
+        *,
+        resource: str = CORE_RESOURCE,
+        **kwargs,
+    ) -> requests.Response:
+        for _ in range(RATE_LIMITED_ATTEMPTS):
+            self.rate_limiter.acquire(access_token, resource)
+            response = send(
+                url,
+                headers=headers,
+                timeout=settings.GITHUB_API_TIMEOUT_SECONDS,
+                **kwargs
+            )
+            if not self.rate_limiter.update(access_token, response, resource):
+                return response
+
+        # Still limited after backing off, let the caller requeue the work
+        raise RateLimitExceeded(self.rate_limit_budget(access_token, resource)['wait_seconds'])
+
+    @staticmethod
+    def _restore_cached_response(
+        response: requests.Response,
+        cached: dict
+    ) -> requests.Response:
+        # A 304 has no body, serve the cached one as if it was a fresh 200
+        response.status_code = HTTPStatus.OK
+        response._content = cached['content']  # pylint: disable=protected-access
+        if cached.get('link') and 'Link' not in response.headers:
+            response.headers['Link'] = cached['link']
+        return response
 
     @log_request
     def get(
@@ -58,11 +240,83 @@ class GithubClient:
         path: str,
         access_token: Optional[str] = '',
         params: Optional[dict] = None,
+    ) -> bool:
+        return self._request(path, access_token, params)
+
+    @log_request
+    def post(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        data: Optional[dict] = None,
+        *,
+        resource: str = CORE_RESOURCE,
     ) -> bool:
         url, headers = self._prepare_request(path, access_token)
-        return requests.get(
-            url,
-            headers=headers,
-            timeout=DEFAULT_TIMEOUT_SECONDS,
-            params=params
+        return self._send(
+            self.session.post, url, headers, access_token, resource=resource, json=data
+        )
+
+    def graphql(
+        self,
+        query: str,
+        access_token: Optional[str] = '',
+        variables: Optional[dict] = None,
+    ) -> Tuple[bool, dict]:
+        """
+        Run a query on Github GraphQL API
+
+        Errors of single fields are left in the data for the caller,
+        only answers without any data are unsuccessful. Queries
+        spend the GraphQL rate limit, apart from the REST one
+        """
+
+        success, data = self.post(
+            GRAPHQL_PATH,
+            access_token,
+            data={'query': query, 'variables': variables or {}},
+            resource=GRAPHQL_RESOURCE,
         )
+        if data.get('errors'):
+            logger.info("GraphQL query errors: %s", data['errors'])
+        if not success or data.get('data') is None:
+            return False, data
+        return True, data['data']
+
+    def get_pages(
+        self,
+        path: str,
+        access_token: Optional[str] = '',
+        params: Optional[dict] = None,
+        *,
+        raise_on_error: bool = False,
+        use_cache: bool = True,
+    ) -> Iterator[list]:
+        """
+        Yield the data of each page of a listing endpoint
+
+        Pages are requested lazily, following the `Link: rel="next"`
+        header until there are no more pages or a request fails.
+        With `raise_on_error` a failed request raises PaginationError,
+        so callers can tell a partial listing from a complete one.
+        Listings whose pages are not worth keeping, like the ones
+        requested only once, pass `use_cache=False`
+        """
+
+        params = {'per_page': DEFAULT_PER_PAGE, **(params or {})}
+        next_path = path
+
+        while next_path:
+            success, response = send_request(
+                self._request, next_path, access_token, params, use_cache
+            )
+            if not success:
+                if raise_on_error:
+                    raise PaginationError(next_path)
+                return
+
+            yield response.json()
+
+            # The next link already carries the query string
+            next_path = response.links.get('next', {}).get('url')
+            params = None
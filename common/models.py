@@ -1,13 +1,34 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+ACCESS_TOKEN_CACHE_KEY = 'common:access-token:{}'
 
 
 class UserProfile(AbstractUser):
     def __str__(self):
         return self.username
 
-    @property
+    @cached_property
     def access_token(self) -> str:
-        social_auth_profile = self.social_auth.first()  # pylint: disable=no-member
-        if social_auth_profile is not None:
-            return social_auth_profile.access_token
-        return ''
+        """
+        Github access token of the user
+
+        Memoized on the instance and shared across workers through the
+        cache for a short time, so reading it does not query social auth
+        """
+
+        key = ACCESS_TOKEN_CACHE_KEY.format(self.pk)
+        access_token = cache.get(key)
+        if access_token is None:
+            access_token = ''
+            social_auth_profile = self.social_auth.first()  # pylint: disable=no-member
+            if social_auth_profile is not None:
+                access_token = social_auth_profile.access_token
+            cache.set(key, access_token, settings.ACCESS_TOKEN_CACHE_TIMEOUT_SECONDS)
+        return access_token
+
+    def invalidate_access_token(self) -> None:
+        self.__dict__.pop('access_token', None)
+        cache.delete(ACCESS_TOKEN_CACHE_KEY.format(self.pk))
@@ -0,0 +1,178 @@
+import hashlib
+import time
+from http import HTTPStatus
+from logging import getLogger
+from threading import Lock
+from typing import Optional
+
+from django.conf import settings
+
+logger = getLogger('__name__')
+
+CORE_RESOURCE = 'core'
+GRAPHQL_RESOURCE = 'graphql'
+RATE_LIMITED_STATUS_CODES = (HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS)
+SECONDARY_RATE_LIMIT_MESSAGE = 'secondary rate limit'
+# Github asks to wait at least a minute when a secondary limit carries no headers
+SECONDARY_RATE_LIMIT_WAIT_SECONDS = 60
+
+_rate_limiter = None
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when the budget of a token is exhausted for longer
+    than we are willing to wait, so the work can be requeued
+    """
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f'Github rate limit exceeded, retry after {retry_after:.0f}s')
+        self.retry_after = retry_after
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_secondary_rate_limit(response) -> bool:
+    return SECONDARY_RATE_LIMIT_MESSAGE in response.text.lower()
+
+
+class RateLimiter:
+    """
+    Per token request budget driven by the X-RateLimit headers
+
+    Each token has a bucket per API resource, as told by the
+    X-RateLimit-Resource header, holding the remaining requests
+    refilled by Github at the reset time. Requests wait for the
+    refill when the bucket is (almost) empty or when a secondary
+    rate limit asked us to back off
+    """
+
+    def __init__(
+        self,
+        reserve: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None,
+    ) -> None:
+        self.reserved_requests = (
+            settings.GITHUB_API_RATE_LIMIT_RESERVE if reserve is None else reserve
+        )
+        self.max_wait_seconds = (
+            settings.GITHUB_API_RATE_LIMIT_MAX_WAIT_SECONDS
+            if max_wait_seconds is None else max_wait_seconds
+        )
+        self._budgets = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(access_token: Optional[str], resource: str) -> str:
+        token_hash = hashlib.sha256((access_token or '').encode('utf-8')).hexdigest()
+        return f'{token_hash}:{resource}'
+
+    def _wait_time(self, budget: dict, current_time: float) -> float:
+        wait = max(budget.get('blocked_until', 0) - current_time, 0)
+
+        remaining = budget.get('remaining')
+        reset = budget.get('reset') or 0
+        if remaining is not None and remaining <= self.reserved_requests and reset > current_time:
+            wait = max(wait, reset - current_time)
+
+        return wait
+
+    def reserve(self, access_token: Optional[str], resource: str = CORE_RESOURCE) -> float:
+        """
+        Take one request from the budget of the token for the resource
+
+        Returns how long to wait before sending it, or raises
+        RateLimitExceeded if that would take too long
+        """
+
+        with self._lock:
+            budget = self._budgets.setdefault(self._key(access_token, resource), {})
+            wait = self._wait_time(budget, time.time())
+
+            if wait > self.max_wait_seconds:
+                raise RateLimitExceeded(wait)
+
+            if budget.get('remaining') is not None:
+                budget['remaining'] -= 1
+
+        if wait > 0:
+            logger.info("Rate limit almost exhausted, waiting %.0f seconds", wait)
+        return wait
+
+    def acquire(self, access_token: Optional[str], resource: str = CORE_RESOURCE) -> None:
+        """
+        Take one request from the budget of the token for the resource,
+        sleeping until it is available
+        """
+
+        wait = self.reserve(access_token, resource)
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(
+        self,
+        access_token: Optional[str],
+        response,
+        resource: str = CORE_RESOURCE,
+    ) -> bool:
+        """
+        Record the budget reported by a response in the bucket of the
+        resource it names, or of the requested one when it names none
+
+        Returns whether the response was rate limited
+        """
+
+        headers = response.headers
+        resource = headers.get('X-RateLimit-Resource') or resource
+        limit = _to_int(headers.get('X-RateLimit-Limit'))
+        remaining = _to_int(headers.get('X-RateLimit-Remaining'))
+        reset = _to_int(headers.get('X-RateLimit-Reset'))
+        retry_after = _to_int(headers.get('Retry-After'))
+
+        rate_limited = response.status_code in RATE_LIMITED_STATUS_CODES and (
+            retry_after is not None or remaining == 0 or _is_secondary_rate_limit(response)
+        )
+        if rate_limited and retry_after is None and remaining != 0:
+            retry_after = SECONDARY_RATE_LIMIT_WAIT_SECONDS
+
+        with self._lock:
+            budget = self._budgets.setdefault(self._key(access_token, resource), {})
+            if remaining is not None:
+                budget.update({'limit': limit, 'remaining': remaining, 'reset': reset})
+            if retry_after is not None:
+                budget['blocked_until'] = time.time() + retry_after
+
+        if rate_limited:
+            logger.info("Request rate limited by Github")
+
+        return rate_limited
+
+    def budget(self, access_token: Optional[str], resource: str = CORE_RESOURCE) -> dict:
+        """
+        Return the known budget of the token for the resource
+        """
+
+        with self._lock:
+            budget = self._budgets.get(self._key(access_token, resource), {})
+            return {
+                'limit': budget.get('limit'),
+                'remaining': budget.get('remaining'),
+                'reset': budget.get('reset'),
+                'wait_seconds': self._wait_time(budget, time.time()),
+            }
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the rate limiter shared by every client of this process
+    """
+
+    global _rate_limiter  # pylint: disable=global-statement
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,24 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson
+
+    Types orjson does not know about fall back
+    to the encoder of the default JSONRenderer
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def __init__(self) -> None:
+        self.fallback_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=self.fallback_encoder.default)
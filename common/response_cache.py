@@ -0,0 +1,138 @@
+import hashlib
+import json
+from collections import OrderedDict
+from http import HTTPStatus
+from logging import getLogger
+from threading import Lock
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+logger = getLogger('__name__')
+
+_response_cache = None
+
+
+def make_cache_key(url: str, params: Optional[dict], access_token: Optional[str]) -> str:
+    """
+    Build a cache key for a request
+
+    The token is part of the key since responses may differ
+    between users, but it is hashed so it is never stored
+    """
+
+    raw_key = json.dumps([url, sorted((params or {}).items()), access_token or ''], default=str)
+    return 'github:' + hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+
+def add_validators(headers: dict, cached: Optional[dict]) -> None:
+    """
+    Make a request conditional on the validators of its cached response
+    """
+
+    if cached is None:
+        return
+    if cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+
+
+def make_cache_entry(response) -> Optional[dict]:
+    """
+    Build the cache entry of a response from either HTTP client,
+    or None when the response can not be revalidated later
+    """
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if response.status_code != HTTPStatus.OK or not (etag or last_modified):
+        return None
+
+    return {
+        'etag': etag,
+        'last_modified': last_modified,
+        'link': response.headers.get('Link'),
+        'content': response.content,
+    }
+
+
+def _entry_size(entry: dict) -> int:
+    return len(entry.get('content') or b'')
+
+
+class LRUResponseCache:
+    """
+    In-process response cache evicting the least recently used entries
+
+    It is bounded both by its number of entries and by the bytes of
+    the cached bodies, bodies larger than the whole budget are not kept
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.maxsize = maxsize or settings.GITHUB_API_CACHE_MAXSIZE
+        self.max_bytes = max_bytes or settings.GITHUB_API_CACHE_MAX_BYTES
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: dict) -> None:
+        entry_size = _entry_size(entry)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= _entry_size(previous)
+            if entry_size > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            self.size += entry_size
+            while len(self._entries) > self.maxsize or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= _entry_size(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DjangoResponseCache:
+    """
+    Response cache stored in one of the Django cache backends
+
+    Useful for sharing cached responses between workers
+    """
+
+    def __init__(self, alias: Optional[str] = None, timeout: Optional[int] = None) -> None:
+        self.cache = caches[alias or settings.GITHUB_API_CACHE_ALIAS]
+        self.timeout = timeout or settings.GITHUB_API_CACHE_TIMEOUT_SECONDS
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(key)
+
+    def set(self, key: str, entry: dict) -> None:
+        self.cache.set(key, entry, self.timeout)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+def get_response_cache():
+    """
+    Return the response cache configured in the settings
+    """
+
+    global _response_cache  # pylint: disable=global-statement
+    if _response_cache is None:
+        _response_cache = import_string(settings.GITHUB_API_CACHE_BACKEND)()
+    return _response_cache
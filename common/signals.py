@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from social_django.models import UserSocialAuth
+
+
+@receiver(post_save, sender=UserSocialAuth)
+@receiver(post_delete, sender=UserSocialAuth)
+def invalidate_access_token(instance: UserSocialAuth, **kwargs) -> None:
+    # Social auth saves the association whenever the token is refreshed
+    instance.user.invalidate_access_token()
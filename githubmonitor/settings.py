@@ -93,6 +93,20 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+API_CACHE_ALIAS = config('API_CACHE_ALIAS', default='default')
+API_CACHE_TIMEOUT_SECONDS = config('API_CACHE_TIMEOUT_SECONDS', cast=int, default=300)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -159,6 +173,36 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_BROKER_URL = config('BROKER_URL')
 CELERY_RESULT_BACKEND = config('RESULT_URL')
+# How long the requester of an import job is remembered, as long as Celery keeps its result
+IMPORT_JOB_TIMEOUT_SECONDS = config('IMPORT_JOB_TIMEOUT_SECONDS', cast=int, default=86400)
+
+# Redis pub/sub pushing new commits to the streams, which are disabled when empty
+COMMIT_STREAM_URL = config('COMMIT_STREAM_URL', default='')
+COMMIT_STREAM_HEARTBEAT_SECONDS = config('COMMIT_STREAM_HEARTBEAT_SECONDS', cast=int, default=15)
+COMMIT_STREAM_MAX_SECONDS = config('COMMIT_STREAM_MAX_SECONDS', cast=int, default=300)
+
+CELERY_BEAT_SCHEDULE = {
+    'sync-repositories': {
+        'task': 'repositories.tasks.sync_repositories',
+        'schedule': config('REPOSITORIES_SYNC_INTERVAL_SECONDS', cast=int, default=60 * 60),
+    },
+}
+
+REPOSITORIES_SYNC_CHUNK_SIZE = config('REPOSITORIES_SYNC_CHUNK_SIZE', cast=int, default=50)
+REPOSITORIES_SYNC_CHUNK_INTERVAL_SECONDS = config(
+    'REPOSITORIES_SYNC_CHUNK_INTERVAL_SECONDS',
+    cast=int,
+    default=60,
+)
+REPOSITORIES_SYNC_JITTER_SECONDS = config('REPOSITORIES_SYNC_JITTER_SECONDS', cast=int, default=30)
+REPOSITORIES_SYNC_LOCK_SECONDS = config('REPOSITORIES_SYNC_LOCK_SECONDS', cast=int, default=30 * 60)
+# Syncs fetch again the commits dated this long before the cursor, since commits
+# made before a sync may be pushed after it
+REPOSITORIES_SYNC_OVERLAP_SECONDS = config(
+    'REPOSITORIES_SYNC_OVERLAP_SECONDS',
+    cast=int,
+    default=3 * 24 * 60 * 60,
+)
 
 SOCIAL_AUTH_GITHUB_KEY = config('SOCIAL_AUTH_GITHUB_KEY')
 SOCIAL_AUTH_GITHUB_SECRET = config('SOCIAL_AUTH_GITHUB_SECRET')
@@ -174,12 +218,61 @@ AUTHENTICATION_BACKENDS = (
 
 AUTH_USER_MODEL = 'common.UserProfile'
 
+# How long resolved access tokens are shared across workers
+ACCESS_TOKEN_CACHE_TIMEOUT_SECONDS = config(
+    'ACCESS_TOKEN_CACHE_TIMEOUT_SECONDS',
+    cast=int,
+    default=60,
+)
+
 LOGIN_URL = 'common:login'
 LOGOUT_URL = 'logout'
 LOGIN_REDIRECT_URL = 'common:home'
 LOGOUT_REDIRECT_URL = 'common:login'
 
+COMMITS_BATCH_SIZE = config('COMMITS_BATCH_SIZE', cast=int, default=100)
+
+GITHUB_WEBHOOK_URL = config('GITHUB_WEBHOOK_URL', default='')
+GITHUB_WEBHOOK_SECRET = config('GITHUB_WEBHOOK_SECRET', default='')
+
 GITHUB_API_URL = 'https://api.github.com/'
+GITHUB_API_TIMEOUT_SECONDS = config('GITHUB_API_TIMEOUT_SECONDS', cast=int, default=30)
+GITHUB_API_POOL_CONNECTIONS = config('GITHUB_API_POOL_CONNECTIONS', cast=int, default=10)
+GITHUB_API_POOL_MAXSIZE = config('GITHUB_API_POOL_MAXSIZE', cast=int, default=10)
+GITHUB_API_MAX_CONCURRENCY = config('GITHUB_API_MAX_CONCURRENCY', cast=int, default=10)
+GITHUB_API_MAX_RETRIES = config('GITHUB_API_MAX_RETRIES', cast=int, default=3)
+GITHUB_API_RETRY_BACKOFF = config('GITHUB_API_RETRY_BACKOFF', cast=float, default=0.5)
+GITHUB_API_RATE_LIMIT_RESERVE = config('GITHUB_API_RATE_LIMIT_RESERVE', cast=int, default=10)
+GITHUB_API_RATE_LIMIT_MAX_WAIT_SECONDS = config(
+    'GITHUB_API_RATE_LIMIT_MAX_WAIT_SECONDS',
+    cast=int,
+    default=60,
+)
+GITHUB_API_CACHE_BACKEND = config(
+    'GITHUB_API_CACHE_BACKEND',
+    default='common.response_cache.LRUResponseCache',
+)
+GITHUB_API_CACHE_MAXSIZE = config('GITHUB_API_CACHE_MAXSIZE', cast=int, default=1024)
+GITHUB_API_CACHE_MAX_BYTES = config(
+    'GITHUB_API_CACHE_MAX_BYTES',
+    cast=int,
+    default=16 * 1024 * 1024,
+)
+GITHUB_API_CACHE_ALIAS = config('GITHUB_API_CACHE_ALIAS', default='default')
+GITHUB_API_CACHE_TIMEOUT_SECONDS = config(
+    'GITHUB_API_CACHE_TIMEOUT_SECONDS',
+    cast=int,
+    default=60 * 60 * 24,
+)
+# Commits are fetched from the REST listing by default, concurrently for the
+# repositories of the same user with repositories.repository_search.AsyncFetchRepositoryCommits,
+# or from the GraphQL history with repositories.graphql_history.GraphQLFetchRepositoryCommits
+GITHUB_COMMITS_FETCH_CLASS = config(
+    'GITHUB_COMMITS_FETCH_CLASS',
+    default='repositories.repository_search.FetchRepositoryCommits',
+)
+# Repositories of the same user fetched in a single GraphQL query
+GITHUB_GRAPHQL_BATCH_SIZE = config('GITHUB_GRAPHQL_BATCH_SIZE', cast=int, default=10)
 
 
 WEBPACK_LOADER = {
@@ -0,0 +1,57 @@
+from datetime import datetime, time, timedelta
+from typing import Sequence
+
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localtime, make_aware
+
+from repositories.models import Commit, CommitActivity, Repository
+
+ACTIVITY_UNIQUE_FIELDS = ('repository', 'author', 'day')
+
+
+def update_commit_activity(repository: Repository, commits: Sequence[Commit]) -> None:
+    """
+    Recount the daily activity touched by the given saved commits
+
+    Only the days and authors of the commits are counted again,
+    so saving the same commits twice never counts them twice
+    """
+
+    bounds = Commit.objects.filter(
+        repository=repository,
+        sha__in=[commit.sha for commit in commits],
+    ).aggregate(first=Min('date'), last=Max('date'))
+    if bounds['first'] is None:
+        return
+
+    # Days follow the project time zone, as the ones shown to users
+    start = make_aware(datetime.combine(localtime(bounds['first']).date(), time.min))
+    end = make_aware(
+        datetime.combine(localtime(bounds['last']).date() + timedelta(days=1), time.min)
+    )
+    authors = {commit.author for commit in commits}
+
+    counts = Commit.objects.filter(
+        repository=repository,
+        author__in=authors,
+        date__gte=start,
+        date__lt=end,
+    ).annotate(day=TruncDate('date')).order_by().values('author', 'day').annotate(
+        commits=Count('id')
+    )
+
+    CommitActivity.objects.bulk_create(
+        [
+            CommitActivity(
+                repository=repository,
+                author=row['author'],
+                day=row['day'],
+                commits=row['commits'],
+            )
+            for row in counts
+        ],
+        update_conflicts=True,
+        unique_fields=ACTIVITY_UNIQUE_FIELDS,
+        update_fields=('commits',),
+    )
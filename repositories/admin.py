@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Commit, Repository
+from .models import Commit, CommitActivity, Repository
 
 
 class CommitAdmin(admin.ModelAdmin):
@@ -8,5 +8,11 @@ class CommitAdmin(admin.ModelAdmin):
     list_display = ('message', 'date')
 
 
+class CommitActivityAdmin(admin.ModelAdmin):
+    list_filter = ('repository',)
+    list_display = ('repository', 'author', 'day', 'commits')
+
+
 admin.site.register(Commit, CommitAdmin)
+admin.site.register(CommitActivity, CommitActivityAdmin)
 admin.site.register(Repository)
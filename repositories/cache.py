@@ -0,0 +1,101 @@
+import hashlib
+from typing import Callable, Iterable, Optional
+from uuid import uuid4
+
+import orjson
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from repositories.models import Repository
+
+COMMITS_NAMESPACE = 'commits'
+REPOSITORIES_NAMESPACE = 'repositories'
+USER_SCOPE = 'user:{}'
+
+
+def get_api_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _version_key(namespace: str, scope: str) -> str:
+    return f'api:version:{namespace}:{scope}'
+
+
+def get_versions(namespace: str, scopes: Iterable[str]) -> list:
+    """
+    Return the current version token of each scope
+
+    Tokens are random, so a version evicted from the cache
+    never matches responses cached before the eviction
+    """
+
+    api_cache = get_api_cache()
+    keys = [_version_key(namespace, scope) for scope in scopes]
+    versions = api_cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            api_cache.add(key, uuid4().hex, None)
+            versions[key] = api_cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(namespace: str, scopes: Iterable[str]) -> None:
+    get_api_cache().set_many(
+        {_version_key(namespace, scope): uuid4().hex for scope in scopes},
+        None,
+    )
+
+
+def invalidate_repository_commits(full_name: str) -> None:
+    """
+    Drop the cached commits of a repository and the cached commit
+    listings not scoped to a repository of each of its subscribers
+    """
+
+    subscriber_ids = Repository.objects.filter(
+        full_name=full_name, subscribers__isnull=False
+    ).values_list('subscribers', flat=True)
+    invalidate(
+        COMMITS_NAMESPACE,
+        (full_name, *(USER_SCOPE.format(user_id) for user_id in subscriber_ids)),
+    )
+
+
+def invalidate_repositories(user_ids: Iterable[int]) -> None:
+    invalidate(REPOSITORIES_NAMESPACE, (USER_SCOPE.format(user_id) for user_id in user_ids))
+
+
+def cached_response(
+    request,
+    namespace: str,
+    build_data: Callable[[], object],
+    scope: Optional[str] = None,
+) -> Response:
+    """
+    Serve the data of an endpoint from the cache, building it on a miss
+
+    The key covers the requester and the full url, so users, filters
+    and pages are cached apart. Responses carry an ETag and a
+    matching If-None-Match gets a 304 without a body
+    """
+
+    # Listings not scoped to a repository only change with the requester's repositories
+    version, = get_versions(namespace, (scope or USER_SCOPE.format(request.user.pk),))
+    raw_key = f'{request.user.pk}:{request.build_absolute_uri()}:{version}'
+    key = f'api:{namespace}:' + hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+    api_cache = get_api_cache()
+    cached = api_cache.get(key)
+    if cached is None:
+        data = build_data()
+        etag = '"' + hashlib.md5(orjson.dumps(data)).hexdigest() + '"'
+        cached = {'data': data, 'etag': etag}
+        api_cache.set(key, cached, settings.API_CACHE_TIMEOUT_SECONDS)
+
+    headers = {'ETag': cached['etag']}
+    if request.META.get('HTTP_IF_NONE_MATCH') == cached['etag']:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data=cached['data'], status=status.HTTP_200_OK, headers=headers)
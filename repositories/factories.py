@@ -10,7 +10,14 @@ class RepositoryFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Repository
 
+    owner = factory.LazyAttribute(lambda obj: fake.user_name())
     name = factory.LazyAttribute(lambda obj: fake.pystr(max_chars=99))
+    full_name = factory.LazyAttribute(lambda obj: f'{obj.owner}/{obj.name}')
+
+    @factory.post_generation
+    def subscribers(self, create, extracted, **kwargs):
+        if create and extracted:
+            self.subscribers.add(*extracted)  # pylint: disable=no-member
 
 
 class CommitFactory(factory.django.DjangoModelFactory):
@@ -18,7 +25,7 @@ class CommitFactory(factory.django.DjangoModelFactory):
         model = Commit
 
     message = fake.sentence(nb_words=6)
-    sha = fake.pystr(max_chars=99)
+    sha = factory.LazyAttribute(lambda obj: fake.pystr(max_chars=99))
     author = fake.name()
     url = fake.url()
     date = fake.date_time_this_month()
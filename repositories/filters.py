@@ -0,0 +1,72 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.utils.timezone import localtime
+from django_filters import rest_framework as filters
+from django_filters.fields import DateRangeField, IsoDateTimeField
+
+from .models import Commit, CommitActivity
+
+
+class IsoDateField(forms.DateField):
+    """
+    Date also given as an ISO 8601 datetime, truncated to its
+    day in the current time zone like the activity days
+    """
+
+    def to_python(self, value):
+        try:
+            return super().to_python(value)
+        except ValidationError:
+            return localtime(IsoDateTimeField().to_python(value)).date()
+
+
+class IsoDateRangeField(DateRangeField):
+    def __init__(self, *args, **kwargs):
+        # Skip the plain date fields built by DateRangeField
+        super(DateRangeField, self).__init__((IsoDateField(), IsoDateField()), *args, **kwargs)
+
+
+class IsoDateFromToRangeFilter(filters.DateFromToRangeFilter):
+    field_class = IsoDateRangeField
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """
+    Comma separated values matched with an IN lookup
+    """
+
+
+class CommitFilter(filters.FilterSet):
+    """
+    Filters of the commits list
+
+    Every filter is an equality, IN or range condition over the
+    (author, date) and (repository, date) indexes
+    """
+
+    # Exposed as `date_after` and `date_before`, both inclusive
+    date = filters.IsoDateTimeFromToRangeFilter()
+    author__in = CharInFilter(field_name='author', lookup_expr='in')
+    repository__full_name__in = CharInFilter(field_name='repository__full_name', lookup_expr='in')
+
+    class Meta:
+        model = Commit
+        fields = ('author', 'repository__full_name')
+
+
+class CommitActivityFilter(filters.FilterSet):
+    """
+    Filters of the commit stats, the same ones of the commits list
+
+    Activity is counted per day, so the dates of the range
+    are whole days even when given as datetimes
+    """
+
+    # Exposed as `date_after` and `date_before`, both inclusive
+    date = IsoDateFromToRangeFilter(field_name='day')
+    author__in = CharInFilter(field_name='author', lookup_expr='in')
+    repository__full_name__in = CharInFilter(field_name='repository__full_name', lookup_expr='in')
+
+    class Meta:
+        model = CommitActivity
+        fields = ('author', 'repository__full_name')
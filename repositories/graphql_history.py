@@ -0,0 +1,160 @@
+from datetime import datetime
+from logging import getLogger
+from typing import List, Sequence, Tuple
+
+from django.conf import settings
+from django.utils.timezone import now
+
+from repositories.repository_search import FetchRepositoryCommits
+
+HISTORY_PAGE_SIZE = 100
+# Only the fields needed to save a commit, see FetchRepositoryCommits._sanitize_commit_data
+REPOSITORY_HISTORY_FIELD = '''
+  {alias}: repository(owner: ${alias}_owner, name: ${alias}_name) {{
+    defaultBranchRef {{
+      target {{
+        ... on Commit {{
+          history(first: {page_size}, since: ${alias}_since, after: ${alias}_after) {{
+            pageInfo {{ hasNextPage endCursor }}
+            nodes {{ oid message url author {{ name date user {{ avatarUrl }} }} }}
+          }}
+        }}
+      }}
+    }}
+  }}'''
+REPOSITORY_HISTORY_VARIABLES = (
+    '${alias}_owner: String!, ${alias}_name: String!, '
+    '${alias}_since: GitTimestamp, ${alias}_after: String'
+)
+
+logger = getLogger('__name__')
+
+
+def _to_api_commit(node: dict) -> dict:
+    """
+    Reshape a history commit like the ones from the commits API
+    """
+
+    author = node.get('author') or {}
+    user = author.get('user') or {}
+    return FetchRepositoryCommits.to_api_commit(
+        sha=node.get('oid'),
+        url=node.get('url'),
+        message=node.get('message'),
+        author=author.get('name'),
+        date=author.get('date'),
+        avatar=user.get('avatarUrl', ''),
+    )
+
+
+def build_history_query(
+    fetch_services: Sequence['GraphQLFetchRepositoryCommits'],
+) -> Tuple[str, dict]:
+    """
+    Build a single query for the next history page of many repositories,
+    each one requested under its own alias
+    """
+
+    fields, declarations, variables = [], [], {}
+    for index, fetch_service in enumerate(fetch_services):
+        alias = f'r{index}'
+        fields.append(REPOSITORY_HISTORY_FIELD.format(alias=alias, page_size=HISTORY_PAGE_SIZE))
+        declarations.append(REPOSITORY_HISTORY_VARIABLES.format(alias=alias))
+        variables.update({
+            f'{alias}_owner': fetch_service.repository.owner,
+            f'{alias}_name': fetch_service.repository.name,
+            f'{alias}_since': fetch_service.since,
+            f'{alias}_after': fetch_service.after,
+        })
+
+    declaration, selection = ', '.join(declarations), ''.join(fields)
+    query = f'query({declaration}) {{{selection}\n}}'
+    return query, variables
+
+
+class GraphQLFetchRepositoryCommits(FetchRepositoryCommits):
+    """
+    Service class for fetching commits from a repository on Github
+    through the GraphQL history of its default branch
+
+    Only the saved fields are requested, and the history of many
+    repositories is fetched in the same query
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.since = None
+        self.after = None
+
+    @staticmethod
+    def get_batch_size() -> int:
+        return settings.GITHUB_GRAPHQL_BATCH_SIZE
+
+    @classmethod
+    def fetch_many(cls, fetch_services: Sequence['GraphQLFetchRepositoryCommits']) -> None:
+        """
+        Fetch the commits of many repositories of the same user, one
+        query returning the next page of every repository at a time
+
+        Repositories without more pages drop out of the following
+        queries, each one has its cursor recorded once complete
+        """
+
+        if not fetch_services:
+            return
+
+        client = fetch_services[0].client
+        access_token = fetch_services[0].access_token
+        started_at = now()
+
+        pending: List[GraphQLFetchRepositoryCommits] = list(fetch_services)
+        for fetch_service in pending:
+            fetch_service.since = fetch_service.get_since().isoformat()
+            fetch_service.after = None
+
+        while pending:
+            query, variables = build_history_query(pending)
+            success, data = client.graphql(query, access_token, variables)
+            if not success:
+                logger.info("Could not fetch the history of %s repositories", len(pending))
+                return
+
+            pending = [
+                fetch_service
+                for index, fetch_service in enumerate(pending)
+                if fetch_service.save_history(data, f'r{index}', started_at)
+            ]
+
+    def save_history(self, data: dict, alias: str, started_at: datetime) -> bool:
+        """
+        Save a history page of the repository, returning
+        whether there are more pages to fetch
+        """
+
+        repository_data = data.get(alias)
+        if repository_data is None:
+            logger.info("Could not fetch every commit of %s", self.repository.full_name)
+            return False
+
+        # Empty repositories have no default branch and so no commits
+        branch = repository_data.get('defaultBranchRef') or {}
+        history = (branch.get('target') or {}).get('history')
+        if history is None:
+            self._record_cursor(started_at)
+            return False
+
+        commits = (_to_api_commit(node) for node in history.get('nodes', []))
+        self.run.track_page(self.save_commits(commits))
+
+        page_info = history.get('pageInfo', {})
+        if not page_info.get('hasNextPage'):
+            self._record_cursor(started_at)
+            return False
+
+        self.after = page_info.get('endCursor')
+        return True
+
+    def get_commits(self) -> None:
+        logger.info("Fetching commits for repository %s", self.repository.full_name)
+
+        self.fetch_many([self])
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0002_alter_repository_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='commits_cursor',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
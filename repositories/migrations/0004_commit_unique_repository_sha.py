@@ -0,0 +1,35 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:07
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicated_commits(apps, schema_editor):
+    Commit = apps.get_model('repositories', 'Commit')
+
+    duplicated = Commit.objects.order_by().values(
+        'repository_id', 'sha'
+    ).annotate(
+        first_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+
+    for row in duplicated.iterator():
+        Commit.objects.filter(
+            repository_id=row['repository_id'],
+            sha=row['sha'],
+        ).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0003_repository_commits_cursor'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicated_commits, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='commit',
+            constraint=models.UniqueConstraint(fields=('repository', 'sha'), name='unique_repository_commit_sha'),
+        ),
+    ]
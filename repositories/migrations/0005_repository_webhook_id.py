@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0004_commit_unique_repository_sha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='webhook_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
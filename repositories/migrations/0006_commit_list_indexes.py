@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0005_repository_webhook_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['repository', '-date', '-id'], name='commit_repository_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['author', '-date', '-id'], name='commit_author_date_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('repositories', '0006_commit_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_repositories', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='last_sync_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
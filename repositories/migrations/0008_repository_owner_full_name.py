@@ -0,0 +1,52 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+def fill_owner_and_full_name(apps, schema_editor):
+    Repository = apps.get_model('repositories', 'Repository')
+
+    # Repositories were always searched under the username of who imported them
+    for repository in Repository.objects.select_related('created_by').iterator():
+        if repository.created_by is not None:
+            repository.owner = repository.created_by.username
+            repository.full_name = f'{repository.owner}/{repository.name}'
+        else:
+            repository.full_name = repository.name
+        repository.save(update_fields=('owner', 'full_name'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0007_repository_sync_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='owner',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='full_name',
+            field=models.CharField(max_length=201, null=True),
+        ),
+        migrations.RunPython(fill_owner_and_full_name, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='repository',
+            name='full_name',
+            field=models.CharField(max_length=201, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='repository',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='repository',
+            constraint=models.UniqueConstraint(fields=('owner', 'name'), name='unique_repository_owner_name'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def subscribe_creators(apps, schema_editor):
+    Repository = apps.get_model('repositories', 'Repository')
+    Subscription = Repository.subscribers.through
+
+    Subscription.objects.bulk_create([
+        Subscription(repository_id=repository_id, userprofile_id=user_id)
+        for repository_id, user_id in Repository.objects.filter(
+            created_by__isnull=False
+        ).values_list('pk', 'created_by_id').iterator()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('repositories', '0008_repository_owner_full_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='subscribers',
+            field=models.ManyToManyField(blank=True, related_name='subscribed_repositories', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(subscribe_creators, migrations.RunPython.noop),
+    ]
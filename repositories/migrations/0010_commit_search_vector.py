@@ -0,0 +1,51 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'],
+    name='commit_search_vector_idx',
+)
+
+
+def add_search_index(apps, schema_editor):
+    # Full text search and GIN indexes only exist on Postgres
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Commit = apps.get_model('repositories', 'Commit')
+    Commit.objects.update(search_vector=SearchVector('message', config='english'))
+    schema_editor.add_index(Commit, SEARCH_INDEX)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.remove_index(apps.get_model('repositories', 'Commit'), SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0009_repository_subscribers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commit',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='commit', index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_search_index, remove_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def count_commit_activity(apps, schema_editor):
+    Commit = apps.get_model('repositories', 'Commit')
+    CommitActivity = apps.get_model('repositories', 'CommitActivity')
+
+    counts = Commit.objects.annotate(day=TruncDate('date')).order_by().values(
+        'repository_id', 'author', 'day'
+    ).annotate(commits=Count('id'))
+
+    CommitActivity.objects.bulk_create(
+        (CommitActivity(**row) for row in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0010_commit_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommitActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('commits', models.PositiveIntegerField(default=0)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='repositories.repository')),
+            ],
+            options={
+                'verbose_name_plural': 'Commit activities',
+                'indexes': [models.Index(fields=['repository', 'day'], name='activity_repository_day_idx'), models.Index(fields=['author', 'day'], name='activity_author_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='commitactivity',
+            constraint=models.UniqueConstraint(fields=('repository', 'author', 'day'), name='unique_commit_activity'),
+        ),
+        migrations.RunPython(count_commit_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0011_commit_activity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['-date', '-id'], name='commit_date_idx'),
+        ),
+    ]
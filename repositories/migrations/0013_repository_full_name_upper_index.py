@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:02
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0012_commit_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='repository',
+            index=models.Index(django.db.models.functions.text.Upper('full_name'), name='repository_full_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations
+
+
+def adopt_legacy_repositories(apps, schema_editor):
+    Repository = apps.get_model('repositories', 'Repository')
+    UserProfile = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Subscription = Repository.subscribers.through
+
+    legacy_repositories = list(Repository.objects.filter(created_by__isnull=True))
+    users = list(UserProfile.objects.order_by('pk'))
+    if not legacy_repositories or not users:
+        return
+
+    # Repositories imported before ownership was tracked were listed to every user,
+    # so every user keeps them. Who imported them is unknown, the first user with a
+    # Github login is assumed and keeps them in sync
+    creator = UserProfile.objects.filter(
+        social_auth__isnull=False
+    ).order_by('pk').first() or users[0]
+
+    for repository in legacy_repositories:
+        repository.created_by = creator
+        if not repository.owner:
+            full_name = f'{creator.username}/{repository.name}'
+            if not Repository.objects.filter(full_name__iexact=full_name).exists():
+                repository.owner = creator.username
+                repository.full_name = full_name
+        repository.save(update_fields=('created_by', 'owner', 'full_name'))
+
+    Subscription.objects.bulk_create(
+        [
+            Subscription(repository_id=repository.pk, userprofile_id=user.pk)
+            for repository in legacy_repositories
+            for user in users
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('social_django', '0011_alter_id_fields'),
+        ('repositories', '0013_repository_full_name_upper_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(adopt_legacy_repositories, migrations.RunPython.noop),
+    ]
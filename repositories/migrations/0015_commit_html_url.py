@@ -0,0 +1,31 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:20
+
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Replace
+
+API_COMMIT_URL_PREFIX = 'https://api.github.com/repos/'
+
+
+def use_html_urls(apps, schema_editor):
+    Commit = apps.get_model('repositories', 'Commit')
+
+    # Commits fetched through the REST API stored the url of their git object
+    Commit.objects.filter(url__startswith=API_COMMIT_URL_PREFIX).update(
+        url=Replace(
+            Replace('url', Value(API_COMMIT_URL_PREFIX), Value('https://github.com/')),
+            Value('/git/commits/'),
+            Value('/commit/'),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositories', '0014_adopt_legacy_repositories'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_html_urls, migrations.RunPython.noop),
+    ]
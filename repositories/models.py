@@ -1,14 +1,50 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 
 
 class Repository(models.Model):
-    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=100)
+    name = models.CharField(max_length=100)
+    # `owner/name`, stored so lookups and filters hit a single indexed column
+    full_name = models.CharField(max_length=201, unique=True)
+    # Start time of the last complete commits sync, used as `since` by incremental syncs
+    commits_cursor = models.DateTimeField(null=True, blank=True)
+    webhook_id = models.BigIntegerField(null=True, blank=True)
+    # User whose token is used to keep the repository in sync
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='created_repositories',
+    )
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_sync_duration = models.DurationField(null=True, blank=True)
+    # Users tracking the repository, all of them share its commits and sync
+    subscribers = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name='subscribed_repositories',
+    )
 
     def __str__(self):
-        return self.name
+        return self.full_name
 
     class Meta:
         verbose_name_plural = 'Repositories'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('owner', 'name'),
+                name='unique_repository_owner_name',
+            ),
+        ]
+        # Serve the case insensitive lookups of names typed by users or sent by webhooks
+        indexes = [
+            models.Index(Upper('full_name'), name='repository_full_name_upper_idx'),
+        ]
 
 
 class Commit(models.Model):
@@ -20,9 +56,52 @@ class Commit(models.Model):
     avatar = models.URLField(max_length=200, blank=True)
 
     repository = models.ForeignKey(Repository, on_delete=models.CASCADE)
+    # Message search vector, only computed on Postgres
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.message
 
     class Meta:
         ordering = ('-date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('repository', 'sha'),
+                name='unique_repository_commit_sha',
+            ),
+        ]
+        # Serve the commits list, unfiltered or filtered, with its (date, id) keyset ordering
+        indexes = [
+            models.Index(fields=('-date', '-id'), name='commit_date_idx'),
+            models.Index(fields=('repository', '-date', '-id'), name='commit_repository_date_idx'),
+            models.Index(fields=('author', '-date', '-id'), name='commit_author_date_idx'),
+            GinIndex(fields=('search_vector',), name='commit_search_vector_idx'),
+        ]
+
+
+class CommitActivity(models.Model):
+    """
+    Commits of an author on a repository in a day,
+    kept in sync with the commits as they are saved
+    """
+
+    repository = models.ForeignKey(Repository, on_delete=models.CASCADE)
+    author = models.CharField(max_length=50)
+    day = models.DateField()
+    commits = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.repository} {self.author} {self.day}: {self.commits}'
+
+    class Meta:
+        verbose_name_plural = 'Commit activities'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('repository', 'author', 'day'),
+                name='unique_commit_activity',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=('repository', 'day'), name='activity_repository_day_idx'),
+            models.Index(fields=('author', 'day'), name='activity_author_day_idx'),
+        ]
@@ -0,0 +1,236 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from typing import Optional
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.template import loader
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Estimate how many rows a queryset returns without counting them
+
+    Uses the planner estimate on Postgres and
+    falls back to an exact count elsewhere
+    """
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a (date, id) keyset
+
+    Every page is fetched with an indexed range condition instead of
+    an OFFSET, so deep pages cost the same as the first one. No total
+    count is computed unless `count=estimate` is requested
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    date_field = 'date'
+    invalid_cursor_message = 'Invalid cursor'
+    template = 'rest_framework/pagination/previous_and_next.html'
+
+    def __init__(self) -> None:
+        self.base_url = None
+        self.page = []
+        self.has_next = False
+        self.has_previous = False
+        self.count = None
+
+    @staticmethod
+    def encode_cursor(date: str, pk: int, reverse: bool) -> str:
+        raw_cursor = json.dumps({'d': date, 'i': pk, 'r': reverse})
+        return urlsafe_b64encode(raw_cursor.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request) -> Optional[dict]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            date = parse_datetime(cursor['d'])
+            cursor = {'date': date, 'id': int(cursor['i']), 'reverse': bool(cursor['r'])}
+        except (BinasciiError, KeyError, TypeError, ValueError, UnicodeError) as e:
+            raise NotFound(self.invalid_cursor_message) from e
+
+        if cursor['date'] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['reverse']
+
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.count = estimate_count(queryset)
+
+        date_field = self.date_field
+        if cursor is not None:
+            # The plain date bound gives the planner an index range to scan,
+            # the OR alone is not always recognized as one
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f'{date_field}__gte': cursor['date']}),
+                    Q(**{f'{date_field}__gt': cursor['date']})
+                    | Q(**{date_field: cursor['date'], 'id__gt': cursor['id']}),
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{date_field}__lte': cursor['date']}),
+                    Q(**{f'{date_field}__lt': cursor['date']})
+                    | Q(**{date_field: cursor['date'], 'id__lt': cursor['id']}),
+                )
+
+        if reverse:
+            queryset = queryset.order_by(date_field, 'id')
+        else:
+            queryset = queryset.order_by(f'-{date_field}', '-id')
+
+        # Fetch one extra row to know whether there is a following page
+        page = list(queryset[:self.page_size + 1])
+        has_following = len(page) > self.page_size
+        page = page[:self.page_size]
+
+        if reverse:
+            page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = cursor is not None
+
+        self.page = page
+        return page
+
+    def _build_link(self, item, reverse: bool) -> str:
+        # Pages hold model instances or rows fetched with `.values()`
+        if isinstance(item, dict):
+            date, pk = item[self.date_field], item['id']
+        else:
+            date, pk = getattr(item, self.date_field), item.pk
+
+        cursor = self.encode_cursor(date.isoformat(), pk, reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._build_link(self.page[0], reverse=True)
+
+    def get_html_context(self) -> dict:
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+        }
+
+    def to_html(self) -> str:
+        return loader.get_template(self.template).render(self.get_html_context())
+
+    def get_paginated_response(self, data):
+        response_data = OrderedDict()
+        if self.count is not None:
+            response_data['count'] = self.count
+        response_data['next'] = self.get_next_link()
+        response_data['previous'] = self.get_previous_link()
+        response_data['results'] = data
+        return Response(response_data)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class RankedPagination(KeysetPagination):
+    """
+    Pagination for results ordered by relevance or counts instead of date
+
+    Neither is a stable keyset, so pages are fetched with an
+    OFFSET. No total count is computed unless `count=estimate` is
+    requested
+    """
+
+    page_query_param = 'page'
+    invalid_page_message = 'Invalid page'
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.page_number = 1
+
+    def get_page_number(self, request) -> int:
+        try:
+            page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError) as e:
+            raise NotFound(self.invalid_page_message) from e
+
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message)
+        return page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_number = self.get_page_number(request)
+
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.count = estimate_count(queryset)
+
+        offset = (self.page_number - 1) * self.page_size
+        # Fetch one extra row to know whether there is a following page
+        page = list(queryset[offset:offset + self.page_size + 1])
+
+        self.has_next = len(page) > self.page_size
+        self.has_previous = self.page_number > 1
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if self.page_number == 2:
+            return remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(self.base_url, self.page_query_param, self.page_number - 1)
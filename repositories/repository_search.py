@@ -1,22 +1,63 @@
-from datetime import timedelta
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import islice
 from logging import getLogger
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Type
 
-from django.db import transaction
-from django.utils.timezone import now
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils.module_loading import import_string
+from django.utils.timezone import localtime, now
 
-from common.github_client import GithubClient
+from common.async_github_client import AsyncGithubClient
+from common.github_client import GithubClient, PaginationError
 from common.models import UserProfile
+from repositories.activity import update_commit_activity
+from repositories.cache import (invalidate_repositories,
+                                invalidate_repository_commits)
 from repositories.models import Commit, Repository
-from repositories.serializers import RepositorySerializer
+from repositories.search import update_search_vectors
+from repositories.serializers import RepositorySerializer, split_full_name
+from repositories.streams import publish_commits
 
 REPO_PATH = 'repos/'
 COMMITS_PATH = 'commits'
-BATCH_SIZE = 100
+HOOKS_PATH = 'hooks'
+WEBHOOK_EVENTS = ('push',)
 SINCE_DAYS = 30
 
 logger = getLogger('__name__')
 
 
+class FetchRun:
+    """
+    Options and progress of a commits fetch
+
+    Incremental fetches start from the sync cursor, and `on_page`
+    is called with the pages and commits stored after every page
+    """
+
+    def __init__(
+        self,
+        incremental: bool = False,
+        on_page: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        self.incremental = incremental
+        self.on_page = on_page
+        self.pages_fetched = 0
+        self.commits_stored = 0
+        self.completed = False
+
+    def track_page(self, commits_saved: int) -> None:
+        self.pages_fetched += 1
+        self.commits_stored += commits_saved
+        if self.on_page is not None:
+            self.on_page(self.pages_fetched, self.commits_stored)
+
+
 class FetchRepositoryCommits:
     """
     Service class for fetching commits from a repository on Github
@@ -24,58 +65,272 @@ class FetchRepositoryCommits:
 
     def __init__(
         self,
-        repo_path: str,
-        access_token: str,
         repository: Repository,
-        client: GithubClient = GithubClient()
+        access_token: str,
+        client: GithubClient = GithubClient(),
+        run: Optional[FetchRun] = None,
     ):
-        self.repo_path = repo_path
-        self.path = ('/'.join((repo_path, COMMITS_PATH)))
+        self.path = ('/'.join((REPO_PATH, repository.full_name, COMMITS_PATH)))
         self.access_token = access_token
         self.repository = repository
         self.client = client
+        self.run = run or FetchRun()
+
+    @staticmethod
+    def get_batch_size() -> int:
+        """
+        How many repositories of the same user are worth fetching together
+        """
+
+        return 1
+
+    @classmethod
+    def fetch_many(cls, fetch_services: Sequence['FetchRepositoryCommits']) -> None:
+        for fetch_service in fetch_services:
+            fetch_service.get_commits()
+
+    @staticmethod
+    def to_api_commit(
+        *,
+        sha: str,
+        url: str,
+        message: str,
+        author: str,
+        date: str,
+        avatar: str,
+    ) -> dict:
+        """
+        Shape a commit from another Github source like the ones from
+        the commits API, so it goes through the same sanitize and save path
+        """
 
-    def _sanitize_commit_data(self, commits: list) -> dict:
-        sanitized = []
+        return {
+            'sha': sha,
+            'html_url': url,
+            'commit': {
+                'message': message,
+                'author': {'name': author, 'date': date},
+            },
+            'author': {'avatar_url': avatar},
+        }
+
+    def _sanitize_commit_data(self, commits: Iterable[dict]) -> Iterator[dict]:
         for commit in commits:
             commit_info = commit.get('commit', {})
             commit_author_info = commit_info.get('author', {})
-            sanitized.append({
+            yield {
                 'message': commit_info.get('message'),
                 'sha': commit.get('sha'),
                 'author': commit_author_info.get('name'),
-                'url': commit_info.get('url'),
+                'url': commit.get('html_url'),
                 'date': commit_author_info.get('date'),
                 'avatar': commit.get('author', {}).get('avatar_url'),
                 'repository_id': self.repository.id,
-            })
-        return sanitized
+            }
 
     @transaction.atomic
-    def save_commits(self, commits_data: list) -> None:
+    def save_commits(self, commits_data: Iterable[dict]) -> int:
+        """
+        Save the new commits in batches, returning how many were saved
+
+        Commits are sanitized and built lazily, so only
+        one batch of model instances is held in memory.
+        Commits already stored are left untouched
+        """
+
+        batch_size = settings.COMMITS_BATCH_SIZE
         commits_data = self._sanitize_commit_data(commits_data)
+        saved = 0
+
+        while True:
+            batch = [
+                Commit(**commit_data) for commit_data in islice(commits_data, batch_size)
+            ]
+            if not batch:
+                if saved:
+                    repository_name = self.repository.full_name
+                    transaction.on_commit(
+                        lambda: invalidate_repository_commits(repository_name)
+                    )
+                return saved
+
+            new_commits = self._insert_commits(self._get_new_commits(batch))
+            if not new_commits:
+                continue
 
-        commits = [Commit(**commit_data) for commit_data in commits_data]
+            shas = [commit.sha for commit in new_commits]
+            update_search_vectors(Commit.objects.filter(repository=self.repository, sha__in=shas))
+            update_commit_activity(self.repository, new_commits)
+            transaction.on_commit(partial(publish_commits, self.repository.full_name, shas))
+            saved += len(new_commits)
 
-        while commits:
-            chunk, commits = commits[:BATCH_SIZE], commits[BATCH_SIZE:]
-            Commit.objects.bulk_create(chunk, BATCH_SIZE)
+    def _insert_commits(self, commits: List[Commit]) -> List[Commit]:
+        """
+        Insert the commits, returning the ones actually inserted
+
+        Webhooks, imports and syncs may save the same commits at once,
+        the ones inserted by another writer since they were looked up are
+        left out. Conflicts are caught in a savepoint rather than ignored,
+        SQLite would also ignore the rows missing required fields
+        """
+
+        if not commits:
+            return commits
+
+        try:
+            with transaction.atomic():
+                Commit.objects.bulk_create(commits)
+        except IntegrityError:
+            new_commits = self._get_new_commits(commits)
+            if len(new_commits) == len(commits):
+                raise
+            return self._insert_commits(new_commits)
+        return commits
+
+    def _get_new_commits(self, batch: Sequence[Commit]) -> List[Commit]:
+        seen = set(Commit.objects.filter(
+            repository=self.repository,
+            sha__in=[commit.sha for commit in batch],
+        ).values_list('sha', flat=True))
+
+        new_commits = []
+        for commit in batch:
+            if commit.sha not in seen:
+                seen.add(commit.sha)
+                new_commits.append(commit)
+        return new_commits
+
+    def get_since(self) -> datetime:
+        """
+        Date the commits are fetched from
+
+        It only moves once a day or when a sync stores new commits, so
+        syncs of unchanged repositories are answered from the cache
+        with a 304 that does not count against the rate limit
+        """
+
+        today = localtime(now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        since = today - timedelta(days=SINCE_DAYS)
+        if not self.run.incremental:
+            return since
+
+        cursor = self.repository.commits_cursor
+        if cursor is None:
+            cursor = Commit.objects.filter(
+                repository=self.repository
+            ).aggregate(latest=Max('date'))['latest']
+
+        if cursor is None:
+            return since
+        # Github filters by commit date, commits pushed late are still dated before the cursor
+        overlap = timedelta(seconds=settings.REPOSITORIES_SYNC_OVERLAP_SECONDS)
+        return max(cursor - overlap, since)
+
+    def _get_params(self) -> dict:
+        return {'since': self.get_since().isoformat()}
+
+    def _record_cursor(self, cursor: datetime) -> None:
+        self.run.completed = True
+        # Keep the same `since` for the next sync while nothing new shows up
+        if self.repository.commits_cursor is not None and not self.run.commits_stored:
+            return
+
+        self.repository.commits_cursor = cursor
+        Repository.objects.filter(pk=self.repository.pk).update(commits_cursor=cursor)
 
     def get_commits(self) -> None:
-        logger.info("Fetching commits for repository %s", self.repository.name)
+        logger.info("Fetching commits for repository %s", self.repository.full_name)
+
+        started_at = now()
+        pages = self.client.get_pages(
+            self.path,
+            self.access_token,
+            params=self._get_params(),
+            raise_on_error=True,
+            # Only syncs request the same `since` again, first fetches are not worth caching
+            use_cache=self.run.incremental,
+        )
+
+        try:
+            for commits_data in pages:
+                self.run.track_page(self.save_commits(commits_data))
+        except PaginationError:
+            logger.info("Could not fetch every commit of %s", self.repository.full_name)
+            return
+
+        self._record_cursor(started_at)
 
-        params = {'since': (now() - timedelta(days=30)).isoformat()}
 
-        success, commits_data = self.client.get(
+class AsyncFetchRepositoryCommits(FetchRepositoryCommits):
+    """
+    Service class for fetching commits from a repository on Github
+    without blocking, so many repositories can be fetched at once
+
+    Selected through GITHUB_COMMITS_FETCH_CLASS, syncs then fetch the
+    repositories of the same user concurrently with the asyncio client
+    """
+
+    @staticmethod
+    def get_batch_size() -> int:
+        return settings.GITHUB_API_MAX_CONCURRENCY
+
+    @classmethod
+    def fetch_many(cls, fetch_services: Sequence['AsyncFetchRepositoryCommits']) -> None:
+        async_to_sync(fetch_commits_concurrently)(fetch_services)
+
+    def get_commits(self) -> None:
+        self.fetch_many([self])
+
+    async def aget_commits(self, client: AsyncGithubClient) -> None:
+        logger.info("Fetching commits for repository %s", self.repository.full_name)
+
+        started_at = now()
+        params = await sync_to_async(self._get_params)()
+        pages = client.get_pages(
             self.path,
             self.access_token,
-            params=params
+            params=params,
+            raise_on_error=True,
+            use_cache=self.run.incremental,
         )
 
-        if not success:
+        try:
+            async for commits_data in pages:
+                self.run.track_page(await sync_to_async(self.save_commits)(commits_data))
+        except PaginationError:
+            logger.info("Could not fetch every commit of %s", self.repository.full_name)
             return
 
-        self.save_commits(commits_data)
+        await sync_to_async(self._record_cursor)(started_at)
+
+
+async def fetch_commits_concurrently(
+    fetch_services: Iterable[AsyncFetchRepositoryCommits],
+    client: Optional[AsyncGithubClient] = None,
+) -> None:
+    """
+    Fetch the commits of many repositories concurrently
+
+    The concurrency is bounded by the client shared by the services,
+    one is opened for the fetch when none is given
+    """
+
+    if client is None:
+        async with AsyncGithubClient() as new_client:
+            await fetch_commits_concurrently(fetch_services, new_client)
+        return
+
+    await asyncio.gather(
+        *(fetch_service.aget_commits(client) for fetch_service in fetch_services)
+    )
+
+
+def get_fetch_commits_class() -> Type[FetchRepositoryCommits]:
+    """
+    Return the strategy used to fetch commits from Github
+    """
+
+    return import_string(settings.GITHUB_COMMITS_FETCH_CLASS)
 
 
 class RepositorySearch:
@@ -89,29 +344,107 @@ class RepositorySearch:
         user: UserProfile,
         client: GithubClient = GithubClient(),
     ) -> None:
-        self.name = name
-        self.full_repo_name = ('/'.join((user.username, self.name)))
+        self.owner, self.name = split_full_name(name, user.username)
+        self.user = user
+        self.full_repo_name = ('/'.join((self.owner, self.name)))
         self.path = ('/'.join((REPO_PATH, self.full_repo_name)))
         self.access_token = user.access_token
         self.client = client
 
-    def fetch_commits(self, repository: Repository) -> None:
-        fetch_service = FetchRepositoryCommits(
-            repo_path=self.path,
+    def fetch_commits(
+        self,
+        repository: Repository,
+        on_page: Optional[Callable[[int, int], None]] = None,
+        incremental: bool = False,
+    ) -> FetchRepositoryCommits:
+        fetch_service = self.get_fetch_service(repository, FetchRun(incremental, on_page))
+        fetch_service.get_commits()
+        return fetch_service
+
+    def get_fetch_service(
+        self,
+        repository: Repository,
+        run: Optional[FetchRun] = None,
+    ) -> FetchRepositoryCommits:
+        return get_fetch_commits_class()(
             repository=repository,
             access_token=self.access_token,
             client=self.client,
+            run=run,
         )
-        fetch_service.get_commits()
+
+    def register_webhook(self, repository: Repository) -> bool:
+        """
+        Register a push webhook for the repository on Github
+
+        Skipped when the public webhook url or its secret is not configured,
+        deliveries could not be verified without the secret
+        """
+
+        if not settings.GITHUB_WEBHOOK_URL or not settings.GITHUB_WEBHOOK_SECRET:
+            logger.info(
+                "Webhook url or secret not configured, not registering webhook for %s",
+                self.full_repo_name,
+            )
+            return False
+
+        logger.info("Registering webhook for repository %s", self.full_repo_name)
+
+        registered, hook_data = self.client.post(
+            '/'.join((self.path, HOOKS_PATH)),
+            self.access_token,
+            data={
+                'name': 'web',
+                'active': True,
+                'events': WEBHOOK_EVENTS,
+                'config': {
+                    'url': settings.GITHUB_WEBHOOK_URL,
+                    'content_type': 'json',
+                    'secret': settings.GITHUB_WEBHOOK_SECRET,
+                },
+            },
+        )
+
+        if registered:
+            repository.webhook_id = hook_data.get('id')
+            Repository.objects.filter(pk=repository.pk).update(webhook_id=repository.webhook_id)
+        return registered
 
     def create_repository(self) -> Repository:
-        serializer = RepositorySerializer(data={'name': self.name})
+        serializer = RepositorySerializer.for_repository(self.owner, self.name)
         serializer.is_valid(raise_exception=True)
-        return serializer.save()
+        repository = serializer.save(created_by=self.user)
+        self.subscribe(repository)
+        return repository
+
+    def subscribe(self, repository: Repository) -> None:
+        """
+        Track an existing repository for the user, sharing its
+        commits and sync with every other subscriber
+        """
+
+        repository.subscribers.add(self.user)
+
+        full_name, user_id = repository.full_name, self.user.pk
+        transaction.on_commit(lambda: invalidate_repositories((user_id,)))
+        transaction.on_commit(lambda: invalidate_repository_commits(full_name))
 
     def search(self) -> bool:
-        logger.info("Searching for repository %s", self.name)
+        """
+        Search the repository on Github, keeping the owner and name
+        as Github spells them when it is found
+
+        Github matches names case insensitively, so the typed name
+        may differ from the one stored and looked up afterwards
+        """
+
+        logger.info("Searching for repository %s", self.full_repo_name)
 
-        found, _ = self.client.get(self.path, self.access_token)
+        found, repository_data = self.client.get(self.path, self.access_token)
 
+        if found:
+            self.owner = repository_data.get('owner', {}).get('login', self.owner)
+            self.name = repository_data.get('name', self.name)
+            self.full_repo_name = repository_data.get('full_name', self.full_repo_name)
+            self.path = ('/'.join((REPO_PATH, self.full_repo_name)))
         return found
@@ -0,0 +1,49 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections
+from django.db.models import F, QuerySet
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_CONFIG = 'english'
+
+
+def full_text_search_supported(queryset: QuerySet) -> bool:
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def update_search_vectors(queryset: QuerySet) -> None:
+    """
+    Compute the search vector of the messages of the given commits
+
+    Only Postgres has full text search, elsewhere vectors stay empty
+    """
+
+    if full_text_search_supported(queryset):
+        queryset.update(search_vector=SearchVector('message', config=SEARCH_CONFIG))
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Search commit messages, most relevant commits first
+
+    Matches go through the GIN index of the search vectors on Postgres,
+    other databases fall back to a case insensitive containment
+    """
+
+    search_param = 'search'
+
+    def get_search_terms(self, request) -> str:
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        if not full_text_search_supported(queryset):
+            return queryset.filter(message__icontains=terms).order_by('-date', '-id')
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-date', '-id')
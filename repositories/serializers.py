@@ -1,12 +1,28 @@
+from typing import Tuple
+
 from rest_framework import serializers
 
 from .models import Commit, Repository
 
 
+def split_full_name(full_name: str, default_owner: str) -> Tuple[str, str]:
+    """
+    Split an `owner/name` repository name, names without
+    an owner belong to `default_owner`
+    """
+
+    owner, _, name = full_name.rpartition('/')
+    return owner or default_owner, name
+
+
 class RepositorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Repository
-        fields = ('name',)
+        fields = ('owner', 'name', 'full_name')
+
+    @classmethod
+    def for_repository(cls, owner: str, name: str) -> 'RepositorySerializer':
+        return cls(data={'owner': owner, 'name': name, 'full_name': f'{owner}/{name}'})
 
 
 class CommitSerializer(serializers.ModelSerializer):
@@ -23,3 +39,57 @@ class CommitSerializer(serializers.ModelSerializer):
             'date',
             'repository',
         )
+
+
+class CommitStatsQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """
+    Query parameters of the commit stats
+
+    Counts are summed per `bucket` and, optionally,
+    per repository and/or author with `group_by`
+    """
+
+    bucket = serializers.ChoiceField(choices=('day', 'week', 'month'), default='day')
+    group_by = serializers.MultipleChoiceField(choices=('repository', 'author'), required=False)
+
+
+class CommitFacetQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """
+    Query parameters of the commit facets, `facet`
+    selects whether authors or repositories are listed
+    """
+
+    facet = serializers.ChoiceField(choices=('repository', 'author'))
+
+
+class CommitRowSerializer:
+    """
+    Read-only serializer for commit rows fetched with `.values()`
+
+    Renders the same representation as CommitSerializer
+    without building model instances or fields per row
+    """
+
+    values_fields = (
+        'message', 'sha', 'author', 'url', 'avatar', 'date', 'repository__full_name',
+    )
+    date_field = serializers.DateTimeField()
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    @property
+    def data(self) -> list:
+        to_date_representation = self.date_field.to_representation
+        return [
+            {
+                'message': row['message'],
+                'sha': row['sha'],
+                'author': row['author'],
+                'url': row['url'],
+                'avatar': row['avatar'],
+                'date': to_date_representation(row['date']),
+                'repository': row['repository__full_name'],
+            }
+            for row in self.rows
+        ]
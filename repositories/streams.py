@@ -0,0 +1,99 @@
+import time
+from functools import lru_cache
+from logging import getLogger
+from typing import AsyncIterator, Optional, Sequence
+
+import orjson
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from repositories.models import Commit
+from repositories.serializers import CommitRowSerializer
+
+CHANNEL_PREFIX = 'commits:'
+# How long browsers wait before reopening an ended stream
+RECONNECT_MILLISECONDS = 1000
+
+logger = getLogger('__name__')
+
+
+def get_channel(full_name: str) -> str:
+    return f'{CHANNEL_PREFIX}{full_name}'
+
+
+@lru_cache(maxsize=None)
+def get_stream_client() -> redis.Redis:
+    # Shared by every publish of the process, connections come from its pool
+    return redis.Redis.from_url(settings.COMMIT_STREAM_URL)
+
+
+def publish_commits(full_name: str, shas: Sequence[str]) -> None:
+    """
+    Publish the given commits of a repository to its channel
+
+    Commits are read only when some stream listens to the repository,
+    and a failure to publish never fails the ingestion
+    """
+
+    if not settings.COMMIT_STREAM_URL:
+        return
+
+    channel = get_channel(full_name)
+    client = get_stream_client()
+    try:
+        [(_, listeners)] = client.pubsub_numsub(channel)
+        if not listeners:
+            return
+
+        rows = Commit.objects.filter(
+            repository__full_name=full_name,
+            sha__in=shas,
+        ).order_by('date', 'id').values(*CommitRowSerializer.values_fields)
+        client.publish(channel, orjson.dumps(CommitRowSerializer(rows).data))
+    except redis.RedisError:
+        logger.exception("Could not publish the new commits of %s", full_name)
+
+
+def format_event(event: str, data: object) -> str:
+    return f'event: {event}\ndata: {orjson.dumps(data).decode("utf-8")}\n\n'
+
+
+async def stream_commits(
+    full_names: Sequence[str],
+    author: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events with the commits published to the given repositories
+
+    Every stream holds a single subscription to the channels of its
+    repositories, so Redis does the fan out to the listening clients.
+    A comment is sent whenever nothing was published for a while,
+    keeping proxies from closing the connection.
+
+    Client disconnects are not noticed while waiting for commits, so
+    every stream ends after a while and the browser reconnects
+    """
+
+    client = redis.asyncio.Redis.from_url(settings.COMMIT_STREAM_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(*(get_channel(full_name) for full_name in full_names))
+        yield f'retry: {RECONNECT_MILLISECONDS}\n: connected\n\n'
+
+        deadline = time.monotonic() + settings.COMMIT_STREAM_MAX_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=min(settings.COMMIT_STREAM_HEARTBEAT_SECONDS, remaining),
+            )
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+
+            for commit in orjson.loads(message['data']):
+                if author is None or commit['author'] == author:
+                    yield format_event('commit', commit)
+    finally:
+        await pubsub.close()
+        await client.close()
@@ -1,2 +1,252 @@
-# from githubmonitor.celery import app
-# Uncomment and create your tasks here.
+import random
+import time
+from datetime import timedelta
+from itertools import chain, groupby, islice
+from logging import getLogger
+from operator import itemgetter
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from common.models import UserProfile
+from common.rate_limit import RateLimitExceeded
+from githubmonitor.celery import app
+from repositories.models import Repository
+from repositories.repository_search import (FetchRun, RepositorySearch,
+                                            get_fetch_commits_class)
+
+PROGRESS = 'PROGRESS'
+NOT_FOUND_MESSAGE = 'The requested repository does not exist'
+SYNC_LOCK_KEY = 'repositories:sync-lock:{}'
+
+logger = getLogger('__name__')
+
+
+@app.task(bind=True, max_retries=5)
+def import_repository(self, name: str, user_id: int) -> dict:
+    """
+    Search a repository on Github, create it and fetch its commits
+
+    Repositories already tracked by other users are only subscribed
+    to, so every subscriber shares the same commits and sync.
+
+    Progress is reported through the task state so it can be
+    polled while the commits are being fetched. When the rate
+    limit is exhausted the import is requeued for after the reset
+    """
+
+    user = UserProfile.objects.get(pk=user_id)
+    search_service = RepositorySearch(name=name, user=user)
+
+    def report_progress(pages: int, commits: int) -> None:
+        self.update_state(state=PROGRESS, meta={'pages': pages, 'commits': commits})
+
+    try:
+        if not search_service.search():
+            logger.info("Repository %s not found, skipping import", name)
+            return {'found': False, 'pages': 0, 'commits': 0, 'message': NOT_FOUND_MESSAGE}
+
+        # The repository already exists when retrying an interrupted import
+        # or when another user tracks it
+        repository = Repository.objects.filter(
+            full_name__iexact=search_service.full_repo_name
+        ).first()
+        if repository is None:
+            repository = search_service.create_repository()
+            search_service.register_webhook(repository)
+        else:
+            search_service.subscribe(repository)
+
+        # Commits fully fetched for another subscriber are kept up to date by its sync
+        if repository.commits_cursor is not None:
+            return {'found': True, 'pages': 0, 'commits': 0}
+
+        fetch_service = search_service.fetch_commits(repository, on_page=report_progress)
+    except RateLimitExceeded as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+
+    return {
+        'found': True,
+        'pages': fetch_service.run.pages_fetched,
+        'commits': fetch_service.run.commits_stored,
+    }
+
+
+def _get_sync_user(repository: Repository) -> Optional[UserProfile]:
+    """
+    User whose token keeps the repository in sync
+
+    The creator is preferred, other subscribers stand in
+    when it is gone or has no Github token anymore
+    """
+
+    creators = [repository.created_by] if repository.created_by is not None else []
+    subscribers = repository.subscribers.exclude(
+        pk=repository.created_by_id
+    ).order_by('pk').iterator()
+
+    return next((user for user in chain(creators, subscribers) if user.access_token), None)
+
+
+@app.task(bind=True, max_retries=5)
+def sync_repository(self, repository_id: int) -> dict:
+    """
+    Fetch the commits pushed since the last sync of a repository
+
+    A per repository lock makes overlapping syncs of the same
+    repository skip instead of fetching the same commits twice
+    """
+
+    repository = Repository.objects.select_related('created_by').filter(
+        pk=repository_id
+    ).first()
+    user = _get_sync_user(repository) if repository is not None else None
+    if user is None:
+        logger.info("Repository %s can not be synced", repository_id)
+        return {'synced': False}
+
+    lock_key = SYNC_LOCK_KEY.format(repository_id)
+    if not cache.add(lock_key, True, settings.REPOSITORIES_SYNC_LOCK_SECONDS):
+        logger.info("Repository %s is already being synced", repository.full_name)
+        return {'synced': False}
+
+    try:
+        started_at = now()
+        start = time.monotonic()
+
+        search_service = RepositorySearch(name=repository.full_name, user=user)
+        fetch_service = search_service.fetch_commits(repository, incremental=True)
+
+        if not fetch_service.run.completed:
+            return {'synced': False, 'commits': fetch_service.run.commits_stored}
+
+        duration = timedelta(seconds=time.monotonic() - start)
+        Repository.objects.filter(pk=repository_id).update(
+            last_synced_at=started_at,
+            last_sync_duration=duration,
+        )
+    except RateLimitExceeded as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    finally:
+        cache.delete(lock_key)
+
+    return {'synced': True, 'commits': fetch_service.run.commits_stored}
+
+
+@app.task(bind=True, max_retries=5)
+def sync_repository_batch(self, repository_ids: List[int]) -> dict:
+    """
+    Fetch the commits pushed since the last sync of many
+    repositories of the same user with a single strategy call
+
+    Repositories already being synced are left out of the batch
+    """
+
+    repositories = Repository.objects.select_related('created_by').filter(
+        pk__in=repository_ids,
+    ).order_by('pk')
+    users = {repository.pk: _get_sync_user(repository) for repository in repositories}
+    locked = [
+        repository for repository in repositories
+        if users[repository.pk] is not None and cache.add(
+            SYNC_LOCK_KEY.format(repository.pk), True, settings.REPOSITORIES_SYNC_LOCK_SECONDS
+        )
+    ]
+    if not locked:
+        return {'synced': [], 'commits': 0}
+
+    try:
+        started_at = now()
+        start = time.monotonic()
+
+        # Repositories whose creator lost its token may be synced by another
+        # subscriber, each strategy call fetches the ones of a single user
+        locked.sort(key=lambda repository: users[repository.pk].pk)
+        fetch_services = [
+            RepositorySearch(
+                name=repository.full_name,
+                user=users[repository.pk],
+            ).get_fetch_service(repository, FetchRun(incremental=True))
+            for repository in locked
+        ]
+        fetch_commits_class = get_fetch_commits_class()
+        for _, user_fetch_services in groupby(
+            fetch_services, key=lambda service: users[service.repository.pk].pk
+        ):
+            fetch_commits_class.fetch_many(list(user_fetch_services))
+
+        synced = [
+            fetch_service.repository.pk
+            for fetch_service in fetch_services
+            if fetch_service.run.completed
+        ]
+        Repository.objects.filter(pk__in=synced).update(
+            last_synced_at=started_at,
+            last_sync_duration=timedelta(seconds=time.monotonic() - start),
+        )
+    except RateLimitExceeded as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    finally:
+        cache.delete_many([SYNC_LOCK_KEY.format(repository.pk) for repository in locked])
+
+    return {
+        'synced': synced,
+        'commits': sum(fetch_service.run.commits_stored for fetch_service in fetch_services),
+    }
+
+
+def _get_sync_batches(batch_size: int) -> Iterator[List[int]]:
+    """
+    Yield the ids of the tracked repositories in
+    batches of repositories synced by the same user
+
+    Repositories without a creator are synced by their first subscriber
+    """
+
+    rows = Repository.objects.annotate(
+        sync_user=Coalesce('created_by', Min('subscribers'))
+    ).filter(
+        sync_user__isnull=False
+    ).order_by('sync_user', 'pk').values_list('pk', 'sync_user').iterator()
+
+    for _, user_rows in groupby(rows, key=itemgetter(1)):
+        repository_ids = (repository_id for repository_id, _ in user_rows)
+        while batch := list(islice(repository_ids, batch_size)):
+            yield batch
+
+
+@app.task
+def sync_repositories() -> int:
+    """
+    Fan out the sync tasks of every tracked repository
+
+    Repositories are scheduled in chunks spread over time, each task
+    with a random jitter, so Github is never hit by all of them at once.
+    Strategies able to fetch many repositories together get one task
+    per batch of repositories of the same user
+    """
+
+    batch_size = get_fetch_commits_class().get_batch_size()
+    batches = _get_sync_batches(batch_size)
+
+    scheduled = 0
+    chunk_index = 0
+    while True:
+        chunk = list(islice(batches, settings.REPOSITORIES_SYNC_CHUNK_SIZE))
+        if not chunk:
+            return scheduled
+
+        chunk_start = chunk_index * settings.REPOSITORIES_SYNC_CHUNK_INTERVAL_SECONDS
+        for batch in chunk:
+            countdown = chunk_start + random.uniform(0, settings.REPOSITORIES_SYNC_JITTER_SECONDS)
+            if batch_size == 1:
+                sync_repository.apply_async(args=(batch[0],), countdown=countdown)
+            else:
+                sync_repository_batch.apply_async(args=(batch,), countdown=countdown)
+            scheduled += len(batch)
+
+        chunk_index += 1
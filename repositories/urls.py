@@ -1,10 +1,21 @@
 from django.urls import path
 
-from .views import CommitView, RepositoryView
+from .views import (CommitFacetView, CommitStatsView, CommitStreamView,
+                    CommitView, GithubWebhookView, RepositoryImportView,
+                    RepositoryView)
 
 app_name = 'repositories'
 
 urlpatterns = [
     path('api/commits/', CommitView.as_view(), name='commits-list'),
+    path('api/commits/stats/', CommitStatsView.as_view(), name='commits-stats'),
+    path('api/commits/facets/', CommitFacetView.as_view(), name='commits-facets'),
+    path('api/commits/stream/', CommitStreamView.as_view(), name='commits-stream'),
     path('api/repositories/', RepositoryView.as_view(), name='repositories-list-create'),
+    path(
+        'api/repositories/imports/<str:job_id>/',
+        RepositoryImportView.as_view(),
+        name='repositories-import-detail',
+    ),
+    path('api/webhooks/github/', GithubWebhookView.as_view(), name='webhooks-github'),
 ]
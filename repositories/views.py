@@ -1,42 +1,290 @@
+from logging import getLogger
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DateField, F, Sum
+from django.db.models.functions import Trunc
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
-from rest_framework.generics import ListAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotAuthenticated, NotFound
+from rest_framework.generics import GenericAPIView, ListAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Commit, Repository
-from .repository_search import RepositorySearch
-from .serializers import CommitSerializer
+from common.renderers import ORJSONRenderer
+
+from .cache import COMMITS_NAMESPACE, REPOSITORIES_NAMESPACE, cached_response
+from .filters import CommitActivityFilter, CommitFilter
+from .models import Commit, CommitActivity, Repository
+from .pagination import KeysetPagination, RankedPagination
+from .search import FullTextSearchFilter
+from .serializers import (CommitFacetQuerySerializer, CommitRowSerializer,
+                          CommitSerializer, CommitStatsQuerySerializer,
+                          RepositorySerializer, split_full_name)
+from .streams import stream_commits
+from .tasks import import_repository
+from .webhooks import handle_push, verify_signature
+
+ALREADY_TRACKED_MESSAGE = 'You already track this repository'
+IMPORT_FAILED_MESSAGE = 'The repository could not be imported'
+IMPORT_JOB_OWNER_KEY = 'repositories:import-job:{}'
+ACTIVITY_FIELDS = {'repository': 'repository__full_name', 'author': 'author'}
+
+logger = getLogger('__name__')
 
 
 class CommitView(ListAPIView):
     serializer_class = CommitSerializer
     permission_classes = [IsAuthenticated]
-    filterset_fields = ('author', 'repository__name')
-    queryset = Commit.objects.all()
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_class = CommitFilter
+    renderer_classes = [ORJSONRenderer]
+    queryset = Commit.objects.select_related('repository')
+
+    def get_queryset(self):
+        # Only commits of the repositories the requester subscribes to
+        return super().get_queryset().filter(repository__subscribers=self.request.user)
+
+    @property
+    def pagination_class(self):
+        # Searches are ordered by relevance, which keyset pagination can not follow
+        if FullTextSearchFilter().get_search_terms(self.request):
+            return RankedPagination
+        return KeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            COMMITS_NAMESPACE,
+            self.get_page_data,
+            scope=request.query_params.get('repository__full_name'),
+        )
+
+    def get_page_data(self) -> dict:
+        # Read only the serialized columns instead of building model instances
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            'id', *CommitRowSerializer.values_fields
+        )
+
+        page = self.paginate_queryset(queryset)
+        serializer = CommitRowSerializer(page)
+        return self.get_paginated_response(serializer.data).data
+
+
+class CommitStatsView(GenericAPIView):
+    """
+    Commit counts per period, read from the precomputed daily activity
+    """
+
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CommitActivityFilter
+    renderer_classes = [ORJSONRenderer]
+    queryset = CommitActivity.objects.all()
+
+    def get_queryset(self):
+        return super().get_queryset().filter(repository__subscribers=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        # Activity changes along with the commits, so it shares their cache versions
+        return cached_response(
+            request,
+            COMMITS_NAMESPACE,
+            self.get_stats_data,
+            scope=request.query_params.get('repository__full_name'),
+        )
+
+    def get_stats_data(self) -> dict:
+        query = CommitStatsQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        bucket = query.validated_data['bucket']
+        group_by = [
+            group for group in ACTIVITY_FIELDS
+            if group in query.validated_data.get('group_by', ())
+        ]
+        group_fields = [ACTIVITY_FIELDS[group] for group in group_by]
+
+        rows = self.filter_queryset(self.get_queryset()).annotate(
+            period=Trunc('day', bucket, output_field=DateField())
+        ).values('period', *group_fields).annotate(
+            commits=Sum('commits')
+        ).order_by('period', *group_fields)
+
+        results = []
+        for row in rows:
+            result = {'period': row['period'].isoformat()}
+            for group, field in zip(group_by, group_fields):
+                result[group] = row[field]
+            result['commits'] = row['commits']
+            results.append(result)
+
+        return {'bucket': bucket, 'results': results}
+
+
+class CommitFacetView(GenericAPIView):
+    """
+    Distinct authors or repositories with their commit counts,
+    read from the precomputed daily activity
+    """
+
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CommitActivityFilter
+    # Values are ordered by their counts, which keyset pagination can not follow
+    pagination_class = RankedPagination
+    renderer_classes = [ORJSONRenderer]
+    queryset = CommitActivity.objects.all()
+
+    def get_queryset(self):
+        return super().get_queryset().filter(repository__subscribers=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            COMMITS_NAMESPACE,
+            self.get_facet_data,
+            scope=request.query_params.get('repository__full_name'),
+        )
+
+    def get_facet_data(self) -> dict:
+        query = CommitFacetQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        field = ACTIVITY_FIELDS[query.validated_data['facet']]
+
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            value=F(field)
+        ).annotate(
+            commits=Sum('commits')
+        ).order_by('-commits', 'value')
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(page).data
+
+
+class CommitStreamView(View):
+    """
+    Server-Sent Events stream of the commits saved to the subscribed
+    repositories, filtered like the commits list by repository and author
+
+    Streams are held open, so they must be served through ASGI
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await sync_to_async(
+            lambda: request.user if request.user.is_authenticated else None
+        )()
+        if user is None:
+            return JsonResponse(
+                data={'detail': NotAuthenticated.default_detail},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        repositories = Repository.objects.filter(subscribers=user)
+        if 'repository__full_name' in request.GET:
+            repositories = repositories.filter(full_name=request.GET['repository__full_name'])
+        full_names = [
+            full_name async for full_name in repositories.values_list('full_name', flat=True)
+        ]
+
+        if not settings.COMMIT_STREAM_URL or not full_names:
+            # No content tells EventSource clients to stop reconnecting
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+        response = StreamingHttpResponse(
+            stream_commits(full_names, author=request.GET.get('author')),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies from buffering the events
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
 class RepositoryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        repositories_names = Repository.objects.only(
-            'name'
-        ).all().values_list('name', flat=True)
+        def get_repositories_names() -> dict:
+            repositories_names = Repository.objects.filter(
+                subscribers=request.user
+            ).values_list('full_name', flat=True)
+            return {'result': list(repositories_names)}
 
-        return Response(data={'result': repositories_names}, status=status.HTTP_200_OK)
+        return cached_response(request, REPOSITORIES_NAMESPACE, get_repositories_names)
 
     def post(self, request, *args, **kwargs):
-        repository_name = request.data.get('name')
-        search_service = RepositorySearch(name=repository_name, user=request.user)
-        found = search_service.search()
-        if found:
-            repository = search_service.create_repository()
-            search_service.fetch_commits(repository)
-            return Response(status=status.HTTP_201_CREATED)
-        return Response(
-            data={
-                'message': 'The requested repository does not exist',
-            },
-            status=status.HTTP_404_NOT_FOUND,
+        repository_name = request.data.get('name') or ''
+
+        owner, name = split_full_name(repository_name, request.user.username)
+        repository = Repository.objects.filter(full_name__iexact=f'{owner}/{name}').first()
+
+        if repository is None:
+            # Validate upfront so invalid names are rejected without reaching Github
+            serializer = RepositorySerializer.for_repository(owner, name)
+            serializer.is_valid(raise_exception=True)
+        elif repository.subscribers.filter(pk=request.user.pk).exists():
+            return Response(
+                data={'name': [ALREADY_TRACKED_MESSAGE]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = import_repository.delay(repository_name, request.user.pk)
+        # Task meta is empty while pending and replaced by the error on failure,
+        # so the owner of the job is kept aside
+        cache.set(
+            IMPORT_JOB_OWNER_KEY.format(job.id),
+            request.user.pk,
+            settings.IMPORT_JOB_TIMEOUT_SECONDS,
         )
+
+        return Response(data={'job_id': job.id}, status=status.HTTP_202_ACCEPTED)
+
+
+class RepositoryImportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        if cache.get(IMPORT_JOB_OWNER_KEY.format(job_id)) != request.user.pk:
+            raise NotFound()
+
+        job = import_repository.AsyncResult(job_id)
+        info = job.info if isinstance(job.info, dict) else {}
+
+        data = {
+            'job_id': job_id,
+            'status': job.state,
+            'pages': info.get('pages', 0),
+            'commits': info.get('commits', 0),
+        }
+        if job.failed():
+            logger.error("Import job %s failed: %r", job_id, job.info)
+            data['message'] = IMPORT_FAILED_MESSAGE
+        elif 'message' in info:
+            data['message'] = info['message']
+
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class GithubWebhookView(APIView):
+    # Deliveries are authenticated by their HMAC signature instead
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        # The signature is computed over the raw body, read it before parsing
+        signature = request.META.get('HTTP_X_HUB_SIGNATURE_256', '')
+        if not verify_signature(request.body, signature):
+            return Response(
+                data={'message': 'Invalid signature'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        saved = 0
+        if request.META.get('HTTP_X_GITHUB_EVENT') == 'push':
+            saved = handle_push(request.data)
+
+        return Response(data={'saved': saved}, status=status.HTTP_200_OK)
@@ -0,0 +1,71 @@
+import hashlib
+import hmac
+from logging import getLogger
+
+from django.conf import settings
+
+from repositories.models import Repository
+from repositories.repository_search import FetchRepositoryCommits
+
+BRANCH_REF_PREFIX = 'refs/heads/'
+SIGNATURE_PREFIX = 'sha256='
+
+logger = getLogger('__name__')
+
+
+def verify_signature(body: bytes, signature: str) -> bool:
+    """
+    Check the X-Hub-Signature-256 of a webhook delivery
+    """
+
+    secret = settings.GITHUB_WEBHOOK_SECRET
+    if not secret or not signature or not signature.startswith(SIGNATURE_PREFIX):
+        return False
+
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature[len(SIGNATURE_PREFIX):], expected)
+
+
+def _to_api_commit(commit: dict, sender: dict) -> dict:
+    """
+    Reshape a push payload commit like the ones from the commits API
+    """
+
+    author = commit.get('author', {})
+    avatar = ''
+    if author.get('username') and author.get('username') == sender.get('login'):
+        avatar = sender.get('avatar_url', '')
+
+    return FetchRepositoryCommits.to_api_commit(
+        sha=commit.get('id'),
+        url=commit.get('url'),
+        message=commit.get('message'),
+        author=author.get('name'),
+        date=commit.get('timestamp'),
+        avatar=avatar,
+    )
+
+
+def handle_push(payload: dict) -> int:
+    """
+    Save the commits of a push to the default branch of a
+    tracked repository, returning how many were saved
+    """
+
+    repository_data = payload.get('repository', {})
+    repository = Repository.objects.filter(
+        full_name__iexact=repository_data.get('full_name')
+    ).first()
+    if repository is None:
+        logger.info("Push for untracked repository %s", repository_data.get('full_name'))
+        return 0
+
+    default_branch = BRANCH_REF_PREFIX + repository_data.get('default_branch', '')
+    if payload.get('ref') != default_branch:
+        return 0
+
+    sender = payload.get('sender', {})
+    commits = (_to_api_commit(commit, sender) for commit in payload.get('commits', []))
+
+    save_service = FetchRepositoryCommits(repository=repository, access_token='')
+    return save_service.save_commits(commits)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from faker import Faker
 
@@ -9,6 +10,7 @@ fake = Faker()
 
 class UserProfileTestCase(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = UserProfile.objects.create(
             username=fake.user_name(),
             first_name=fake.first_name(),
@@ -37,3 +39,44 @@ class UserProfileTestCase(TestCase):
 
         self.assertEqual(self.user.social_auth.count(), 1)
         self.assertEqual(self.user.access_token, extra_data.get('access_token'))
+
+    def test_access_token_memoized(self):
+        """
+        GIVEN: a user profile with social auth instance
+        THEN: resolve the access_token once per instance
+        AND: share it with other instances of the same user
+        """
+        UserSocialAuthFactory(user=self.user, extra_data={'access_token': 'token'})
+        user = UserProfile.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.access_token, 'token')
+            self.assertEqual(user.access_token, 'token')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(UserProfile(pk=self.user.pk).access_token, 'token')
+
+    def test_access_token_invalidated_on_refresh(self):
+        """
+        GIVEN: a resolved access_token
+        THEN: resolve it again once social auth refreshes the token
+        """
+        social_auth = UserSocialAuthFactory(user=self.user, extra_data={'access_token': 'token'})
+        self.assertEqual(UserProfile.objects.get(pk=self.user.pk).access_token, 'token')
+
+        social_auth.set_extra_data({'access_token': 'refreshed'})
+
+        self.assertEqual(social_auth.user.access_token, 'refreshed')
+        self.assertEqual(UserProfile.objects.get(pk=self.user.pk).access_token, 'refreshed')
+
+    def test_access_token_invalidated_on_disconnect(self):
+        """
+        GIVEN: a resolved access_token
+        THEN: return an empty access_token once social auth is removed
+        """
+        social_auth = UserSocialAuthFactory(user=self.user, extra_data={'access_token': 'token'})
+        self.assertEqual(UserProfile.objects.get(pk=self.user.pk).access_token, 'token')
+
+        social_auth.delete()
+
+        self.assertEqual(UserProfile.objects.get(pk=self.user.pk).access_token, '')
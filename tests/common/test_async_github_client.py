@@ -0,0 +1,150 @@
+import asyncio
+
+import httpx
+from django.test import TestCase, override_settings
+
+from common.async_github_client import AsyncGithubClient
+from common.rate_limit import RateLimiter
+from common.response_cache import LRUResponseCache
+
+
+class TestAsyncGithubClient(TestCase):
+    def setUp(self):
+        self.token = 'token'
+        self.path = 'path/'
+        self.requests = []
+
+    def build_client(self, handler, max_concurrency=None):
+        def transport_handler(request):
+            self.requests.append(request)
+            return handler(request)
+
+        return AsyncGithubClient(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(transport_handler)),
+            cache=LRUResponseCache(),
+            rate_limiter=RateLimiter(),
+            max_concurrency=max_concurrency,
+        )
+
+    async def test_get_failure(self):
+        """
+        GIVEN: an invalid request
+        THEN: return a bool indicating failure
+        AND: return an empty response data
+        """
+
+        async with self.build_client(lambda request: httpx.Response(404)) as client:
+            is_successful, data = await client.get(self.path, self.token)
+
+        self.assertFalse(is_successful)
+        self.assertEqual(data, {})
+
+    async def test_get_success(self):
+        """
+        GIVEN: an valid request
+        THEN: return a bool indicating success
+        AND: return the requested data
+        """
+        fake_data = {'data': 'fake'}
+
+        async with self.build_client(lambda request: httpx.Response(200, json=fake_data)) as client:
+            is_successful, data = await client.get(self.path, self.token)
+
+        self.assertTrue(is_successful)
+        self.assertEqual(data, fake_data)
+        self.assertEqual(self.requests[0].headers['Authorization'], f'Bearer {self.token}')
+
+    @override_settings(GITHUB_API_MAX_RETRIES=2, GITHUB_API_RETRY_BACKOFF=0)
+    async def test_get_server_error_retried(self):
+        """
+        GIVEN: a request answered with server errors
+        THEN: retry it
+        AND: give up after the configured retries
+        """
+        responses = [httpx.Response(502), httpx.Response(200, json={'data': 'fake'})]
+
+        async with self.build_client(lambda request: responses.pop(0)) as client:
+            is_successful, data = await client.get(self.path, self.token)
+
+        self.assertTrue(is_successful)
+        self.assertEqual(data, {'data': 'fake'})
+
+        self.requests.clear()
+        async with self.build_client(lambda request: httpx.Response(503)) as client:
+            is_successful, _ = await client.get(self.path, self.token)
+
+        self.assertFalse(is_successful)
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_get_pages(self):
+        """
+        GIVEN: a paginated listing
+        THEN: yield the data of every page
+        AND: follow the next link until the last page
+        """
+        next_url = 'https://api.github.com/path/?per_page=100&page=2'
+
+        def handler(request):
+            if request.url.params.get('page') == '2':
+                return httpx.Response(200, json=[{'page': 2}])
+            return httpx.Response(
+                200,
+                json=[{'page': 1}],
+                headers={'Link': f'<{next_url}>; rel="next"'},
+            )
+
+        async with self.build_client(handler) as client:
+            pages = [page async for page in client.get_pages(self.path, self.token)]
+
+        self.assertEqual(pages, [[{'page': 1}], [{'page': 2}]])
+        self.assertEqual(self.requests[0].url.params.get('per_page'), '100')
+        self.assertEqual(str(self.requests[1].url), next_url)
+
+    async def test_get_not_modified(self):
+        """
+        GIVEN: a request already answered with an ETag
+        THEN: return the cached data when not modified
+        """
+
+        def handler(request):
+            if request.headers.get('If-None-Match') == '"etag"':
+                return httpx.Response(304)
+            return httpx.Response(200, json={'data': 'fake'}, headers={'ETag': '"etag"'})
+
+        async with self.build_client(handler) as client:
+            first_response = await client.get(self.path, self.token)
+            second_response = await client.get(self.path, self.token)
+
+        self.assertEqual(first_response, (True, {'data': 'fake'}))
+        self.assertEqual(second_response, (True, {'data': 'fake'}))
+
+    async def test_bounded_concurrency(self):
+        """
+        GIVEN: many concurrent requests
+        THEN: never have more requests in flight than allowed
+        """
+        in_flight = 0
+        max_in_flight = 0
+
+        class SlowTransport(httpx.AsyncBaseTransport):
+            async def handle_async_request(self, request):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return httpx.Response(200, json={})
+
+        client = AsyncGithubClient(
+            client=httpx.AsyncClient(transport=SlowTransport()),
+            cache=LRUResponseCache(),
+            rate_limiter=RateLimiter(),
+            max_concurrency=2,
+        )
+        async with client:
+            results = await asyncio.gather(
+                *(client.get(f'path/{index}/', self.token) for index in range(6))
+            )
+
+        self.assertEqual(results, [(True, {})] * 6)
+        self.assertEqual(max_in_flight, 2)
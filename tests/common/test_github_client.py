@@ -1,9 +1,24 @@
+import time
 from unittest.mock import Mock, patch
 
+from django.conf import settings
 from django.test import TestCase
+from requests import Response
+from requests.exceptions import ConnectionError as RequestsConnectionError
 from requests.exceptions import HTTPError
 
-from common.github_client import GithubClient
+from common.github_client import GithubClient, PaginationError
+from common.rate_limit import RateLimiter, RateLimitExceeded
+from common.response_cache import LRUResponseCache
+
+
+def build_response(status_code, content=b'', headers=None):
+    response = Response()
+    response.status_code = status_code
+    response.url = 'http://test.com'
+    response._content = content  # pylint: disable=protected-access
+    response.headers.update(headers or {})
+    return response
 
 
 class TestGithubClient(TestCase):
@@ -12,7 +27,7 @@ class TestGithubClient(TestCase):
         self.path = 'path/'
         self.client = GithubClient()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_failure(self, mock_get):
         """
         GIVEN: an invalid request
@@ -32,7 +47,7 @@ class TestGithubClient(TestCase):
 
         mock_get.assert_called_once()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_success(self, mock_get):
         """
         GIVEN: an valid request
@@ -53,3 +68,343 @@ class TestGithubClient(TestCase):
         self.assertEqual(data, fake_data)
 
         mock_get.assert_called_once()
+
+    @patch('requests.Session.post')
+    def test_post_success(self, mock_post):
+        """
+        GIVEN: an valid request with a body
+        THEN: send the body as JSON
+        AND: return the created data
+        """
+        fake_data = {'id': 1}
+
+        mock_post.return_value = Mock(
+            ok=True,
+            url='http://test.com',
+            json=Mock(return_value=fake_data),
+        )
+
+        is_successful, data = self.client.post(self.path, self.token, data={'name': 'web'})
+
+        self.assertTrue(is_successful)
+        self.assertEqual(data, fake_data)
+        self.assertEqual(mock_post.call_args.kwargs['json'], {'name': 'web'})
+
+    @patch('requests.Session.post')
+    def test_graphql(self, mock_post):
+        """
+        GIVEN: a GraphQL query
+        THEN: send the query and its variables
+        AND: return the query data
+        """
+        mock_post.return_value = Mock(
+            ok=True,
+            url='https://api.github.com/graphql',
+            json=Mock(return_value={'data': {'r0': {'name': 'repo'}}}),
+        )
+
+        is_successful, data = self.client.graphql('query { r0: viewer }', self.token, {'a': 1})
+
+        self.assertTrue(is_successful)
+        self.assertEqual(data, {'r0': {'name': 'repo'}})
+        self.assertEqual(mock_post.call_args.args[0], 'https://api.github.com/graphql')
+        self.assertEqual(
+            mock_post.call_args.kwargs['json'],
+            {'query': 'query { r0: viewer }', 'variables': {'a': 1}},
+        )
+
+    @patch('requests.Session.post')
+    def test_graphql_errors(self, mock_post):
+        """
+        GIVEN: a GraphQL query answered only with errors
+        THEN: return a bool indicating failure
+        """
+        mock_post.return_value = Mock(
+            ok=True,
+            url='https://api.github.com/graphql',
+            json=Mock(return_value={'errors': [{'message': 'Bad credentials'}]}),
+        )
+
+        is_successful, _ = self.client.graphql('query { viewer }', self.token)
+
+        self.assertFalse(is_successful)
+
+    @patch('requests.Session.get')
+    def test_get_pages(self, mock_get):
+        """
+        GIVEN: a paginated listing
+        THEN: yield the data of every page
+        AND: follow the next link until the last page
+        """
+        next_url = 'https://api.github.com/path/?per_page=100&page=2'
+
+        mock_get.side_effect = [
+            Mock(
+                ok=True,
+                url='http://test.com',
+                json=Mock(return_value=[{'page': 1}]),
+                links={'next': {'url': next_url}},
+            ),
+            Mock(
+                ok=True,
+                url=next_url,
+                json=Mock(return_value=[{'page': 2}]),
+                links={},
+            ),
+        ]
+
+        pages = list(self.client.get_pages(self.path, self.token))
+
+        self.assertEqual(pages, [[{'page': 1}], [{'page': 2}]])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params'], {'per_page': 100})
+        self.assertEqual(mock_get.call_args_list[1].args[0], next_url)
+        self.assertIsNone(mock_get.call_args_list[1].kwargs['params'])
+
+    @patch('requests.Session.get')
+    def test_get_pages_failure(self, mock_get):
+        """
+        GIVEN: a paginated listing with a failing page
+        THEN: stop yielding pages
+        """
+
+        mock_get.side_effect = [
+            Mock(
+                ok=True,
+                url='http://test.com',
+                json=Mock(return_value=[{'page': 1}]),
+                links={'next': {'url': 'http://test.com/?page=2'}},
+            ),
+            Mock(
+                ok=False,
+                raise_for_status=Mock(side_effect=HTTPError),
+            ),
+        ]
+
+        pages = list(self.client.get_pages(self.path, self.token))
+
+        self.assertEqual(pages, [[{'page': 1}]])
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_get_pages_raise_on_error(self, mock_get):
+        """
+        GIVEN: a paginated listing with a failing page
+        THEN: raise when asked to tell partial listings apart
+        """
+
+        mock_get.return_value = Mock(
+            ok=False,
+            raise_for_status=Mock(side_effect=HTTPError),
+        )
+
+        with self.assertRaises(PaginationError):
+            list(self.client.get_pages(self.path, self.token, raise_on_error=True))
+
+    @patch('requests.Session.get')
+    def test_get_connection_error(self, mock_get):
+        """
+        GIVEN: a request that can not reach the API
+        THEN: return a bool indicating failure
+        AND: return an empty response data
+        """
+
+        mock_get.side_effect = RequestsConnectionError
+
+        is_successful, data = self.client.get(self.path, self.token)
+
+        self.assertFalse(is_successful)
+        self.assertEqual(data, {})
+
+    def test_shared_session(self):
+        """
+        GIVEN: many clients
+        THEN: share the same pooled session
+        AND: retry on server errors
+        """
+
+        session = GithubClient().session
+        adapter = session.get_adapter(settings.GITHUB_API_URL)
+
+        self.assertIs(session, self.client.session)
+        self.assertEqual(adapter.max_retries.total, settings.GITHUB_API_MAX_RETRIES)
+        self.assertIn(502, adapter.max_retries.status_forcelist)
+
+    @patch('requests.Session.get')
+    def test_get_not_modified(self, mock_get):
+        """
+        GIVEN: a request already answered with an ETag
+        THEN: send the ETag on the next request
+        AND: return the cached data when not modified
+        """
+        client = GithubClient(cache=LRUResponseCache())
+        fake_data = {'data': 'fake'}
+
+        mock_get.side_effect = [
+            build_response(200, b'{"data": "fake"}', {'ETag': '"etag"'}),
+            build_response(304),
+        ]
+
+        first_response = client.get(self.path, self.token)
+        second_response = client.get(self.path, self.token)
+
+        self.assertEqual(first_response, (True, fake_data))
+        self.assertEqual(second_response, (True, fake_data))
+        self.assertNotIn('If-None-Match', mock_get.call_args_list[0].kwargs['headers'])
+        self.assertEqual(
+            mock_get.call_args_list[1].kwargs['headers']['If-None-Match'],
+            '"etag"',
+        )
+
+    @patch('requests.Session.get')
+    def test_get_not_cached_per_token(self, mock_get):
+        """
+        GIVEN: a request already answered with an ETag
+        THEN: do not reuse it for another token
+        """
+        client = GithubClient(cache=LRUResponseCache())
+
+        mock_get.side_effect = [
+            build_response(200, b'{}', {'ETag': '"etag"'}),
+            build_response(200, b'{}'),
+        ]
+
+        client.get(self.path, self.token)
+        client.get(self.path, 'another-token')
+
+        self.assertNotIn('If-None-Match', mock_get.call_args_list[1].kwargs['headers'])
+
+    @patch('requests.Session.get')
+    def test_get_pages_without_cache(self, mock_get):
+        """
+        GIVEN: a listing requested without the cache
+        THEN: neither send nor store validators of its pages
+        """
+        cache = LRUResponseCache()
+        client = GithubClient(cache=cache)
+
+        mock_get.return_value = build_response(200, b'[]', {'ETag': '"etag"'})
+
+        list(client.get_pages(self.path, self.token, use_cache=False))
+        list(client.get_pages(self.path, self.token, use_cache=False))
+
+        self.assertNotIn('If-None-Match', mock_get.call_args.kwargs['headers'])
+        self.assertEqual(cache.size, 0)
+
+    @patch('time.sleep')
+    @patch('requests.Session.get')
+    def test_get_secondary_rate_limit(self, mock_get, mock_sleep):
+        """
+        GIVEN: a request hitting a secondary rate limit
+        THEN: wait for the requested time
+        AND: try the request again
+        """
+        client = GithubClient(cache=LRUResponseCache(), rate_limiter=RateLimiter())
+
+        mock_get.side_effect = [
+            build_response(429, headers={'Retry-After': '5'}),
+            build_response(200, b'{"data": "fake"}'),
+        ]
+
+        response = client.get(self.path, self.token)
+
+        self.assertEqual(response, (True, {'data': 'fake'}))
+        self.assertEqual(mock_get.call_count, 2)
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 5, delta=1)
+
+    @patch('time.sleep')
+    @patch('requests.Session.get')
+    def test_get_secondary_rate_limit_without_headers(self, mock_get, mock_sleep):
+        """
+        GIVEN: a request hitting a secondary rate limit without rate limit headers
+        THEN: wait a minute before trying the request again
+        """
+        client = GithubClient(cache=LRUResponseCache(), rate_limiter=RateLimiter())
+
+        mock_get.side_effect = [
+            build_response(
+                403,
+                b'{"message": "You have exceeded a secondary rate limit."}',
+            ),
+            build_response(200, b'{"data": "fake"}'),
+        ]
+
+        response = client.get(self.path, self.token)
+
+        self.assertEqual(response, (True, {'data': 'fake'}))
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 60, delta=1)
+
+    @patch('requests.Session.get')
+    def test_get_forbidden_not_rate_limited(self, mock_get):
+        """
+        GIVEN: a forbidden request not related to rate limits
+        THEN: fail without waiting
+        """
+        client = GithubClient(cache=LRUResponseCache(), rate_limiter=RateLimiter())
+
+        mock_get.return_value = build_response(403, b'{"message": "Resource not accessible"}')
+
+        response = client.get(self.path, self.token)
+
+        self.assertEqual(response, (False, {}))
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_get_rate_limit_exhausted(self, mock_get):
+        """
+        GIVEN: a token without remaining budget
+        THEN: expose the current budget
+        AND: refuse to send requests until the reset
+        """
+        client = GithubClient(cache=LRUResponseCache(), rate_limiter=RateLimiter())
+        reset = int(time.time()) + 3600
+
+        mock_get.return_value = build_response(200, b'{}', {
+            'X-RateLimit-Limit': '5000',
+            'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset': str(reset),
+        })
+
+        client.get(self.path, self.token)
+        budget = client.rate_limit_budget(self.token)
+
+        self.assertEqual(budget['limit'], 5000)
+        self.assertEqual(budget['remaining'], 0)
+        self.assertEqual(budget['reset'], reset)
+
+        with self.assertRaises(RateLimitExceeded):
+            client.get(self.path, self.token)
+
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_graphql_rate_limit_exhausted(self, mock_post, mock_get):
+        """
+        GIVEN: a token without remaining GraphQL budget
+        THEN: refuse to send GraphQL queries until the reset
+        AND: keep sending REST requests with their own budget
+        """
+        client = GithubClient(cache=LRUResponseCache(), rate_limiter=RateLimiter())
+        reset = int(time.time()) + 3600
+
+        mock_post.return_value = build_response(200, b'{"data": {}}', {
+            'X-RateLimit-Limit': '5000',
+            'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset': str(reset),
+            'X-RateLimit-Resource': 'graphql',
+        })
+        mock_get.return_value = build_response(200, b'{"data": "fake"}')
+
+        client.graphql('query { viewer }', self.token)
+
+        self.assertEqual(client.rate_limit_budget(self.token, 'graphql')['remaining'], 0)
+        self.assertIsNone(client.rate_limit_budget(self.token)['remaining'])
+
+        with self.assertRaises(RateLimitExceeded):
+            client.graphql('query { viewer }', self.token)
+
+        self.assertEqual(client.get(self.path, self.token), (True, {'data': 'fake'}))
+        mock_post.assert_called_once()
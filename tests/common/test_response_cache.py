@@ -0,0 +1,68 @@
+from django.test import TestCase
+
+from common.response_cache import (DjangoResponseCache, LRUResponseCache,
+                                   make_cache_key)
+
+
+class ResponseCacheTest(TestCase):
+    def test_cache_key(self):
+        """
+        GIVEN: requests to the same url
+        THEN: build the same key for the same params and token
+        AND: different keys otherwise
+        """
+        url = 'https://api.github.com/path/'
+
+        key = make_cache_key(url, {'a': 1, 'b': 2}, 'token')
+
+        self.assertEqual(key, make_cache_key(url, {'b': 2, 'a': 1}, 'token'))
+        self.assertNotEqual(key, make_cache_key(url, {'a': 1}, 'token'))
+        self.assertNotEqual(key, make_cache_key(url, {'a': 1, 'b': 2}, 'other'))
+        self.assertNotIn('token', key)
+
+    def test_lru_eviction(self):
+        """
+        GIVEN: a full LRU cache
+        THEN: evict the least recently used entry
+        """
+        cache = LRUResponseCache(maxsize=2)
+
+        cache.set('first', {'etag': '1'})
+        cache.set('second', {'etag': '2'})
+        cache.get('first')
+        cache.set('third', {'etag': '3'})
+
+        self.assertEqual(cache.get('first'), {'etag': '1'})
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('third'), {'etag': '3'})
+
+    def test_lru_bytes_eviction(self):
+        """
+        GIVEN: cached bodies over the bytes budget
+        THEN: evict the least recently used entries until within budget
+        AND: never keep a body larger than the whole budget
+        """
+        cache = LRUResponseCache(maxsize=10, max_bytes=10)
+
+        cache.set('first', {'content': b'1234'})
+        cache.set('second', {'content': b'1234'})
+        cache.set('third', {'content': b'1234'})
+        cache.set('huge', {'content': b'12345678901'})
+
+        self.assertIsNone(cache.get('first'))
+        self.assertIsNotNone(cache.get('second'))
+        self.assertIsNotNone(cache.get('third'))
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual(cache.size, 8)
+
+    def test_django_cache(self):
+        """
+        GIVEN: the Django cache backend
+        THEN: store and retrieve entries
+        """
+        cache = DjangoResponseCache()
+        self.addCleanup(cache.clear)
+
+        cache.set('key', {'etag': '1', 'content': b'{}'})
+
+        self.assertEqual(cache.get('key'), {'etag': '1', 'content': b'{}'})
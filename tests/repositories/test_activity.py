@@ -0,0 +1,78 @@
+from django.test import TestCase
+from faker import Faker
+
+from repositories.factories import RepositoryFactory
+from repositories.models import CommitActivity
+from repositories.repository_search import FetchRepositoryCommits
+
+fake = Faker()
+
+
+def build_commit(author, date, sha=None):
+    return {
+        'sha': sha or fake.sha1(),
+        'html_url': fake.url(),
+        'commit': {
+            'message': fake.sentence(),
+            'author': {'name': author, 'date': date},
+        },
+        'author': {'avatar_url': fake.url()},
+    }
+
+
+class CommitActivityTest(TestCase):
+    def setUp(self):
+        self.repository = RepositoryFactory()
+        self.fetch_service = FetchRepositoryCommits(
+            access_token='token',
+            repository=self.repository,
+        )
+
+    def get_activity(self):
+        return list(CommitActivity.objects.order_by('day', 'author').values_list(
+            'author', 'day', 'commits'
+        ))
+
+    def test_count_saved_commits(self):
+        """
+        GIVEN: saved commits of many authors and days
+        THEN: count the commits per author and day
+        AND: use the project time zone to tell the days apart
+        """
+
+        self.fetch_service.save_commits([
+            build_commit('author1', '2023-06-01T12:00:00Z'),
+            build_commit('author1', '2023-06-01T18:00:00Z'),
+            build_commit('author2', '2023-06-01T12:00:00Z'),
+            # Still June 1st in America/Recife
+            build_commit('author1', '2023-06-02T01:00:00Z'),
+            build_commit('author1', '2023-06-02T12:00:00Z'),
+        ])
+
+        activity = [
+            (author, day.isoformat(), commits) for author, day, commits in self.get_activity()
+        ]
+        self.assertEqual(activity, [
+            ('author1', '2023-06-01', 3),
+            ('author2', '2023-06-01', 1),
+            ('author1', '2023-06-02', 1),
+        ])
+
+    def test_count_incrementally(self):
+        """
+        GIVEN: commits saved again along with new ones
+        THEN: do not count the same commit twice
+        AND: add the new commits to the existing counts
+        """
+        commits = [
+            build_commit('author', '2023-06-01T12:00:00Z'),
+            build_commit('author', '2023-06-03T12:00:00Z'),
+        ]
+        self.fetch_service.save_commits(commits)
+
+        self.fetch_service.save_commits([*commits, build_commit('author', '2023-06-01T15:00:00Z')])
+
+        self.assertEqual(
+            [(day.isoformat(), commits) for _, day, commits in self.get_activity()],
+            [('2023-06-01', 2), ('2023-06-03', 1)],
+        )
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+
+from common.factories import UserSocialAuthFactory
+from repositories.factories import RepositoryFactory
+from repositories.graphql_history import (GraphQLFetchRepositoryCommits,
+                                          build_history_query)
+from repositories.models import Commit
+from repositories.repository_search import RepositorySearch
+
+GRAPHQL_FETCH_CLASS = 'repositories.graphql_history.GraphQLFetchRepositoryCommits'
+
+
+class FixtureServer:
+    """
+    Local server answering GraphQL queries with recorded responses, in order
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers['Content-Length'])
+                server.requests.append({
+                    'path': self.path,
+                    'authorization': self.headers.get('Authorization'),
+                    'body': json.loads(self.rfile.read(length)),
+                })
+                body = json.dumps(server.responses.pop(0)).encode('utf-8')
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@override_settings(GITHUB_COMMITS_FETCH_CLASS=GRAPHQL_FETCH_CLASS)
+class GraphQLFetchRepositoryCommitsTest(TestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        self.repositories = [
+            RepositoryFactory(owner='octocat', name='Hello-World', full_name='octocat/Hello-World'),
+            RepositoryFactory(owner='octocat', name='Spoon-Knife', full_name='octocat/Spoon-Knife'),
+            RepositoryFactory(owner='octocat', name='empty', full_name='octocat/empty'),
+        ]
+
+        file_path = os.path.abspath("tests/fixtures/graphql_history.json")
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            self.recorded_responses = json.load(file)
+
+    def get_fetch_services(self, repositories):
+        return [
+            RepositorySearch(name=repository.full_name, user=self.user).get_fetch_service(
+                repository
+            )
+            for repository in repositories
+        ]
+
+    def test_build_history_query(self):
+        """
+        GIVEN: many repositories
+        THEN: request each one under its own alias with its own variables
+        """
+        fetch_services = self.get_fetch_services(self.repositories[:2])
+        fetch_services[1].after = 'cursor'
+
+        query, variables = build_history_query(fetch_services)
+
+        self.assertIn('r0: repository(owner: $r0_owner, name: $r0_name)', query)
+        self.assertIn('r1: repository(owner: $r1_owner, name: $r1_name)', query)
+        self.assertIn('history(first: 100, since: $r1_since, after: $r1_after)', query)
+        self.assertNotIn('r2:', query)
+        self.assertEqual(variables['r0_name'], 'Hello-World')
+        self.assertEqual(variables['r1_owner'], 'octocat')
+        self.assertEqual(variables['r1_after'], 'cursor')
+
+    def test_fetch_many(self):
+        """
+        GIVEN: many repositories of the same user
+        THEN: fetch the history of all of them in the same query
+        AND: query again only the repositories with more pages
+        AND: record the cursor of every complete repository
+        """
+        fetch_services = self.get_fetch_services(self.repositories)
+
+        with FixtureServer(self.recorded_responses) as server:
+            with override_settings(GITHUB_API_URL=server.url):
+                GraphQLFetchRepositoryCommits.fetch_many(fetch_services)
+
+        self.assertEqual(len(server.requests), 2)
+        first_request, second_request = server.requests[0], server.requests[1]
+        self.assertEqual(first_request['path'], '/graphql')
+        self.assertEqual(first_request['authorization'], f'Bearer {self.user.access_token}')
+        self.assertEqual(
+            [first_request['body']['variables'][f'r{index}_name'] for index in range(3)],
+            ['Hello-World', 'Spoon-Knife', 'empty'],
+        )
+        self.assertEqual(second_request['body']['variables'], {
+            'r0_owner': 'octocat',
+            'r0_name': 'Hello-World',
+            'r0_since': first_request['body']['variables']['r0_since'],
+            'r0_after': '6dcb09b5b57875f334f61aebed695e2e4193db5e 1',
+        })
+
+        self.assertEqual(
+            [fetch_service.run.commits_stored for fetch_service in fetch_services],
+            [3, 1, 0],
+        )
+        self.assertTrue(all(fetch_service.run.completed for fetch_service in fetch_services))
+        self.assertEqual(Commit.objects.filter(repository=self.repositories[0]).count(), 3)
+
+        sha = '6dcb09b5b57875f334f61aebed695e2e4193db5e'
+        commit = Commit.objects.get(sha=sha)
+        self.assertEqual(commit.message, 'Fix all the bugs')
+        self.assertEqual(commit.author, 'Monalisa Octocat')
+        self.assertEqual(commit.url, f'https://github.com/octocat/Hello-World/commit/{sha}')
+        self.assertEqual(commit.avatar, 'https://avatars.githubusercontent.com/u/583231?v=4')
+        self.assertEqual(Commit.objects.get(repository=self.repositories[1]).avatar, '')
+
+        for repository in self.repositories:
+            repository.refresh_from_db()
+            self.assertIsNotNone(repository.commits_cursor)
+
+    def test_fetch_repository_not_found(self):
+        """
+        GIVEN: a repository missing from the query data
+        THEN: do not record it as complete
+        AND: keep fetching the other repositories
+        """
+        fetch_services = self.get_fetch_services(self.repositories[:2])
+        responses = [
+            {
+                'data': {'r0': None, 'r1': self.recorded_responses[0]['data']['r1']},
+                'errors': [{'type': 'NOT_FOUND', 'path': ['r0']}],
+            },
+        ]
+
+        with FixtureServer(responses) as server:
+            with override_settings(GITHUB_API_URL=server.url):
+                GraphQLFetchRepositoryCommits.fetch_many(fetch_services)
+
+        self.assertFalse(fetch_services[0].run.completed)
+        self.assertTrue(fetch_services[1].run.completed)
+        self.assertEqual(Commit.objects.count(), 1)
+
+    def test_fetch_commits_strategy_from_settings(self):
+        """
+        GIVEN: the GraphQL strategy selected on settings
+        THEN: fetch the commits of a repository through GraphQL
+        """
+        repository = self.repositories[1]
+        responses = [{'data': {'r0': self.recorded_responses[0]['data']['r1']}}]
+
+        with FixtureServer(responses) as server:
+            with override_settings(GITHUB_API_URL=server.url):
+                fetch_service = RepositorySearch(
+                    name=repository.full_name,
+                    user=self.user,
+                ).fetch_commits(repository)
+
+        self.assertIsInstance(fetch_service, GraphQLFetchRepositoryCommits)
+        self.assertTrue(fetch_service.run.completed)
+        self.assertEqual(fetch_service.run.pages_fetched, 1)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(Commit.objects.get().sha, '553c2077f0edc3d5dc5d17262f6aa498e69d6f8e')
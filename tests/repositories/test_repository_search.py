@@ -1,17 +1,29 @@
 import json
 import os
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.timezone import localtime, now
 from faker import Faker
 from rest_framework.exceptions import ValidationError
 
+from common.async_github_client import AsyncGithubClient
 from common.factories import UserProfileFactory
-from repositories.factories import RepositoryFactory
+from common.github_client import PaginationError
+from common.rate_limit import RateLimiter
+from common.response_cache import LRUResponseCache
+from repositories.factories import CommitFactory, RepositoryFactory
 from repositories.models import Commit, Repository
-from repositories.repository_search import (REPO_PATH, FetchRepositoryCommits,
-                                            RepositorySearch)
+from repositories.repository_search import (REPO_PATH, SINCE_DAYS,
+                                            AsyncFetchRepositoryCommits,
+                                            FetchRepositoryCommits, FetchRun,
+                                            RepositorySearch,
+                                            fetch_commits_concurrently)
 
 fake = Faker()
 
@@ -64,6 +76,60 @@ class TestRepositorySearch(TestCase):
 
         self.assertEqual(Repository.objects.count(), 1)
         self.assertEqual(Repository.objects.last(), repository)
+        self.assertEqual(repository.owner, self.user.username)
+        self.assertEqual(repository.full_name, f'{self.user.username}/repo')
+
+    @patch('common.github_client.GithubClient.get', return_value=(True, {'repo': 'data'}))
+    def test_search_repository_of_other_owner(self, mock_get):
+        """
+        GIVEN: a repository name with its owner
+        THEN: search it under that owner
+        AND: create it with the same name of a repository of another owner
+        """
+        RepositoryFactory(
+            owner=self.user.username,
+            name='repo',
+            full_name=f'{self.user.username}/repo',
+        )
+        search_service = RepositorySearch(name='org/repo', user=self.user)
+
+        self.assertTrue(search_service.search())
+        repository = search_service.create_repository()
+
+        mock_get.assert_called_once_with('/'.join((REPO_PATH, 'org/repo')), self.user.access_token)
+        self.assertEqual((repository.owner, repository.name), ('org', 'repo'))
+        self.assertEqual(repository.full_name, 'org/repo')
+
+    @patch('common.github_client.GithubClient.get')
+    def test_search_keeps_github_spelling(self, mock_get):
+        """
+        GIVEN: a repository name typed with another case
+        THEN: create the repository with the name spelled by Github
+        """
+        mock_get.return_value = (True, {
+            'name': 'Repo',
+            'full_name': 'Org/Repo',
+            'owner': {'login': 'Org'},
+        })
+        search_service = RepositorySearch(name='org/repo', user=self.user)
+
+        self.assertTrue(search_service.search())
+        repository = search_service.create_repository()
+
+        self.assertEqual((repository.owner, repository.name), ('Org', 'Repo'))
+        self.assertEqual(repository.full_name, 'Org/Repo')
+
+    def test_create_duplicated_repository_fail(self):
+        """
+        GIVEN: a repository already tracked
+        THEN: do not create it again
+        """
+        self.search_service.create_repository()
+
+        with self.assertRaises(ValidationError):
+            self.search_service.create_repository()
+
+        self.assertEqual(Repository.objects.count(), 1)
 
     def test_create_repository_fail(self):
         """
@@ -83,6 +149,68 @@ class TestRepositorySearch(TestCase):
 
         self.assertEqual(Repository.objects.count(), 0)
 
+    @override_settings(
+        GITHUB_WEBHOOK_URL='https://monitor.example.com/api/webhooks/github/',
+        GITHUB_WEBHOOK_SECRET='secret',
+    )
+    @patch('common.github_client.GithubClient.post', return_value=(True, {'id': 42}))
+    def test_register_webhook(self, mock_post):
+        """
+        GIVEN: a created repository
+        THEN: register a push webhook on Github
+        AND: store the webhook id
+        """
+
+        repository = RepositoryFactory()
+
+        registered = self.search_service.register_webhook(repository)
+
+        self.assertTrue(registered)
+        repository.refresh_from_db()
+        self.assertEqual(repository.webhook_id, 42)
+
+        path = mock_post.call_args.args[0]
+        hook = mock_post.call_args.kwargs['data']
+        self.assertTrue(path.endswith(f'{self.user.username}/{self.repository_name}/hooks'))
+        self.assertEqual(hook['events'], ('push',))
+        self.assertEqual(
+            hook['config']['url'],
+            'https://monitor.example.com/api/webhooks/github/',
+        )
+        self.assertEqual(hook['config']['secret'], 'secret')
+
+    @override_settings(GITHUB_WEBHOOK_URL='')
+    @patch('common.github_client.GithubClient.post')
+    def test_register_webhook_disabled(self, mock_post):
+        """
+        GIVEN: no public webhook url configured
+        THEN: do not register a webhook
+        """
+
+        registered = self.search_service.register_webhook(RepositoryFactory())
+
+        self.assertFalse(registered)
+        mock_post.assert_not_called()
+
+    @override_settings(
+        GITHUB_WEBHOOK_URL='https://monitor.example.com/api/webhooks/github/',
+        GITHUB_WEBHOOK_SECRET='',
+    )
+    @patch('common.github_client.GithubClient.post')
+    def test_register_webhook_without_secret(self, mock_post):
+        """
+        GIVEN: a public webhook url configured without a secret
+        THEN: do not register a webhook
+        AND: log why it was skipped
+        """
+
+        with self.assertLogs('__name__', level='INFO') as logs:
+            registered = self.search_service.register_webhook(RepositoryFactory())
+
+        self.assertFalse(registered)
+        mock_post.assert_not_called()
+        self.assertIn('not registering webhook', logs.output[0])
+
     @patch('repositories.repository_search.FetchRepositoryCommits.get_commits')
     def test_fetch_commits(self, mock_commits):
         """
@@ -100,53 +228,210 @@ class TestRepositorySearch(TestCase):
 class FetchRepositoryCommitsTest(TestCase):
     def setUp(self) -> None:
         self.repository = RepositoryFactory(name='test')
-        self.full_repo_name = f'test/{self.repository.name}'
-        self.repo_path = ('/'.join((REPO_PATH, self.full_repo_name)))
         self.access_token = 'token'
         file_path = os.path.abspath("tests/fixtures/commit.json")
         with open(file_path, mode='r', encoding='utf-8') as file:
             self.valid_data = json.load(file)
 
         self.fetch_service = FetchRepositoryCommits(
-            repo_path=self.repo_path,
             access_token=self.access_token,
             repository=self.repository
         )
 
     @patch('repositories.repository_search.FetchRepositoryCommits.save_commits')
-    @patch('common.github_client.GithubClient.get')
-    def test_get_commits(self, mock_get, mock_save):
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits(self, mock_get_pages, mock_save):
         """
         GIVEN: a created repository
         THEN: fetch it's commits from the Github API
         AND: save those commits
         """
-        fake_data = {'repo': 'data'}
-        mock_get.return_value = (True, fake_data)
+        fake_data = [{'repo': 'data'}]
+        mock_get_pages.return_value = iter([fake_data])
 
         self.fetch_service.get_commits()
 
         mock_save.assert_called_once_with(fake_data)
+        self.assertFalse(mock_get_pages.call_args.kwargs['use_cache'])
 
     @patch('repositories.repository_search.FetchRepositoryCommits.save_commits')
-    @patch('common.github_client.GithubClient.get')
-    def test_get_commits_fail(self, mock_get, mock_save):
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_many_pages(self, mock_get_pages, mock_save):
+        """
+        GIVEN: a created repository with many pages of commits
+        THEN: fetch every page from the Github API
+        AND: save each page as it arrives
+        """
+        pages = [[{'page': 1}], [{'page': 2}], [{'page': 3}]]
+        mock_get_pages.return_value = iter(pages)
+
+        self.fetch_service.get_commits()
+
+        self.assertEqual(mock_save.call_count, len(pages))
+        mock_save.assert_called_with(pages[-1])
+
+    @patch('repositories.repository_search.FetchRepositoryCommits.save_commits')
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_fail(self, mock_get_pages, mock_save):
         """
         GIVEN: a created repository
         THEN: fetch it's commits from the Github API
         AND: do not create commits objects on failure
         """
-        fake_data = {}
-        mock_get.return_value = (False, fake_data)
+        mock_get_pages.return_value = iter([])
 
         self.fetch_service.get_commits()
 
         mock_save.assert_not_called()
 
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_records_cursor(self, mock_get_pages):
+        """
+        GIVEN: a created repository
+        THEN: fetch every page of commits
+        AND: record the sync cursor once all pages were fetched
+        """
+        mock_get_pages.return_value = iter([self.valid_data])
+
+        self.fetch_service.get_commits()
+
+        self.repository.refresh_from_db()
+        self.assertIsNotNone(self.repository.commits_cursor)
+
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_partial_keeps_cursor(self, mock_get_pages):
+        """
+        GIVEN: a sync failing in the middle of the pagination
+        THEN: save the fetched pages
+        AND: do not move the sync cursor
+        """
+
+        def pages(*args, **kwargs):
+            yield self.valid_data
+            raise PaginationError('path')
+
+        mock_get_pages.side_effect = pages
+
+        self.fetch_service.get_commits()
+
+        self.repository.refresh_from_db()
+        self.assertIsNone(self.repository.commits_cursor)
+        self.assertEqual(Commit.objects.count(), len(self.valid_data))
+
+    @patch('common.github_client.GithubClient.get_pages', return_value=iter([]))
+    def test_get_commits_incremental(self, mock_get_pages):
+        """
+        GIVEN: a repository with stored commits
+        THEN: fetch only the commits after the newest stored one, minus the sync overlap
+        AND: prefer the recorded sync cursor when available
+        """
+        overlap = timedelta(seconds=settings.REPOSITORIES_SYNC_OVERLAP_SECONDS)
+        latest_date = now() - timedelta(days=2)
+        CommitFactory(repository=self.repository, date=latest_date - timedelta(days=1))
+        CommitFactory(repository=self.repository, date=latest_date)
+        self.fetch_service.run.incremental = True
+
+        self.fetch_service.get_commits()
+
+        self.assertEqual(
+            mock_get_pages.call_args.kwargs['params'],
+            {'since': (latest_date - overlap).isoformat()},
+        )
+
+        cursor = self.repository.commits_cursor
+        mock_get_pages.return_value = iter([])
+
+        self.fetch_service.get_commits()
+
+        self.assertEqual(
+            mock_get_pages.call_args.kwargs['params'],
+            {'since': (cursor - overlap).isoformat()},
+        )
+
+    @patch('common.github_client.GithubClient.get_pages', return_value=iter([]))
+    def test_get_commits_incremental_window(self, mock_get_pages):
+        """
+        GIVEN: a repository with an old sync cursor
+        THEN: never fetch commits older than the sync window
+        """
+        self.repository.commits_cursor = now() - timedelta(days=SINCE_DAYS * 2)
+        self.fetch_service.run.incremental = True
+
+        with patch('repositories.repository_search.now', return_value=now()) as mock_now:
+            self.fetch_service.get_commits()
+
+        today = localtime(mock_now.return_value).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        since = today - timedelta(days=SINCE_DAYS)
+        self.assertEqual(
+            mock_get_pages.call_args.kwargs['params'],
+            {'since': since.isoformat()},
+        )
+
+    @override_settings(REPOSITORIES_SYNC_OVERLAP_SECONDS=3600)
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_incremental_late_push(self, mock_get_pages):
+        """
+        GIVEN: a commit made before the last sync and pushed after it
+        THEN: fetch it on the next sync
+        """
+        cursor = now() - timedelta(days=1)
+        self.repository.commits_cursor = cursor
+        self.fetch_service.run.incremental = True
+        commit_date = cursor - timedelta(minutes=30)
+        self.valid_data[0]['commit']['author']['date'] = commit_date.isoformat()
+        mock_get_pages.return_value = iter([self.valid_data])
+
+        self.fetch_service.get_commits()
+
+        since = datetime.fromisoformat(mock_get_pages.call_args.kwargs['params']['since'])
+        self.assertEqual(since, cursor - timedelta(hours=1))
+        self.assertLess(since, commit_date)
+        self.assertEqual(Commit.objects.get().date, commit_date)
+
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_incremental_unchanged(self, mock_get_pages):
+        """
+        GIVEN: a sync of a repository without new commits
+        THEN: fetch its commits through the response cache
+        AND: keep the same `since` for the next sync
+        """
+        self.fetch_service.save_commits(self.valid_data)
+        cursor = now() - timedelta(days=1)
+        self.repository.commits_cursor = cursor
+        self.repository.save(update_fields=('commits_cursor',))
+        self.fetch_service.run.incremental = True
+        mock_get_pages.return_value = iter([self.valid_data])
+
+        self.fetch_service.get_commits()
+
+        self.assertTrue(mock_get_pages.call_args.kwargs['use_cache'])
+        self.assertTrue(self.fetch_service.run.completed)
+        self.repository.refresh_from_db()
+        self.assertEqual(self.repository.commits_cursor, cursor)
+
+    @patch('common.github_client.GithubClient.get_pages')
+    def test_get_commits_incremental_new_commits(self, mock_get_pages):
+        """
+        GIVEN: a sync of a repository with new commits
+        THEN: move the cursor to the start of the sync
+        """
+        cursor = now() - timedelta(days=1)
+        self.repository.commits_cursor = cursor
+        self.fetch_service.run.incremental = True
+        mock_get_pages.return_value = iter([self.valid_data])
+
+        self.fetch_service.get_commits()
+
+        self.repository.refresh_from_db()
+        self.assertGreater(self.repository.commits_cursor, cursor)
+
     def test_save_commits(self):
         """
         GIVEN: a commit data from Github API
         THEN: save commit data
+        AND: link the commit page on Github
         """
 
         self.assertEqual(Commit.objects.count(), 0)
@@ -154,6 +439,100 @@ class FetchRepositoryCommitsTest(TestCase):
         self.fetch_service.save_commits(self.valid_data)
 
         self.assertEqual(Commit.objects.count(), len(self.valid_data))
+        self.assertEqual(Commit.objects.get().url, self.valid_data[0]['html_url'])
+
+    @override_settings(COMMITS_BATCH_SIZE=2)
+    def test_save_commits_in_batches(self):
+        """
+        GIVEN: more commits than the batch size
+        THEN: save them in batches
+        AND: return how many commits were saved
+        """
+        commit = self.valid_data[0]
+        commits_data = (
+            {**commit, 'sha': f'{commit["sha"]}-{index}'} for index in range(5)
+        )
+
+        with patch.object(
+            Commit.objects, 'bulk_create', wraps=Commit.objects.bulk_create
+        ) as mock_bulk_create:
+            saved = self.fetch_service.save_commits(commits_data)
+
+        self.assertEqual(saved, 5)
+        self.assertEqual(Commit.objects.count(), 5)
+        self.assertEqual(
+            [len(call.args[0]) for call in mock_bulk_create.call_args_list],
+            [2, 2, 1],
+        )
+
+    def test_save_commits_twice(self):
+        """
+        GIVEN: commit data already saved
+        THEN: save it again without duplicating commits
+        AND: leave the stored commits untouched
+        """
+
+        self.fetch_service.save_commits(self.valid_data)
+
+        self.valid_data[0]['commit']['message'] = 'Amended message'
+        saved = self.fetch_service.save_commits(self.valid_data)
+
+        self.assertEqual(saved, 0)
+        self.assertEqual(Commit.objects.count(), len(self.valid_data))
+        self.assertNotEqual(Commit.objects.get().message, 'Amended message')
+
+    @patch('repositories.repository_search.update_commit_activity')
+    @patch('repositories.repository_search.update_search_vectors')
+    def test_save_only_new_commits(self, mock_search_vectors, mock_activity):
+        """
+        GIVEN: commit data along with already saved commits
+        THEN: save only the new commits
+        AND: return how many new commits were saved
+        AND: index and count only the new commits
+        """
+        self.fetch_service.save_commits(self.valid_data)
+        mock_search_vectors.reset_mock()
+        mock_activity.reset_mock()
+        commit = self.valid_data[0]
+        new_commit = {**commit, 'sha': 'new-sha'}
+
+        saved = self.fetch_service.save_commits([commit, new_commit, new_commit])
+
+        self.assertEqual(saved, 1)
+        self.assertEqual(Commit.objects.count(), 2)
+        [(queryset,), _] = mock_search_vectors.call_args
+        self.assertEqual(list(queryset.values_list('sha', flat=True)), ['new-sha'])
+        [(_, commits), _] = mock_activity.call_args
+        self.assertEqual([commit.sha for commit in commits], ['new-sha'])
+
+    @patch('repositories.repository_search.publish_commits')
+    def test_save_commits_saved_concurrently(self, mock_publish):
+        """
+        GIVEN: a commit saved by another writer after it was looked up
+        THEN: save the other new commits
+        AND: index, count and publish only the commits saved here
+        """
+        commit = self.valid_data[0]
+        new_commit = {**commit, 'sha': 'new-sha'}
+        # pylint: disable-next=protected-access
+        get_new_commits = FetchRepositoryCommits._get_new_commits
+
+        def insert_after_lookup(fetch_service, batch):
+            new_commits = get_new_commits(fetch_service, batch)
+            if not Commit.objects.filter(sha=commit['sha']).exists():
+                CommitFactory(repository=self.repository, sha=commit['sha'])
+            return new_commits
+
+        with patch.object(
+            FetchRepositoryCommits, '_get_new_commits', autospec=True,
+            side_effect=insert_after_lookup,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                saved = self.fetch_service.save_commits([commit, new_commit])
+
+        self.assertEqual(saved, 1)
+        self.assertEqual(Commit.objects.count(), 2)
+        mock_publish.assert_called_once_with(self.repository.full_name, ['new-sha'])
 
     def test_save_commits_fail(self):
         """
@@ -170,3 +549,94 @@ class FetchRepositoryCommitsTest(TestCase):
             self.fetch_service.save_commits(invalid_data)
 
         self.assertEqual(Commit.objects.count(), 0)
+
+
+class AsyncFetchRepositoryCommitsTest(TestCase):
+    def setUp(self) -> None:
+        file_path = os.path.abspath("tests/fixtures/commit.json")
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            self.valid_data = json.load(file)
+
+        self.client = AsyncGithubClient(
+            client=httpx.AsyncClient(
+                transport=httpx.MockTransport(
+                    lambda request: httpx.Response(200, json=self.valid_data)
+                ),
+            ),
+            cache=LRUResponseCache(),
+            rate_limiter=RateLimiter(),
+        )
+
+    async def test_fetch_commits_concurrently(self):
+        """
+        GIVEN: many created repositories
+        THEN: fetch their commits concurrently from the Github API
+        AND: save those commits
+        """
+        repositories = [
+            await sync_to_async(RepositoryFactory)(name=f'test-{index}')
+            for index in range(3)
+        ]
+
+        fetch_services = [
+            AsyncFetchRepositoryCommits(
+                access_token='token',
+                repository=repository,
+            )
+            for repository in repositories
+        ]
+
+        async with self.client:
+            await fetch_commits_concurrently(fetch_services, self.client)
+
+        self.assertEqual(
+            await sync_to_async(Commit.objects.count)(),
+            len(self.valid_data) * len(repositories),
+        )
+        for fetch_service in fetch_services:
+            self.assertEqual(fetch_service.run.pages_fetched, 1)
+
+    def test_fetch_many(self):
+        """
+        GIVEN: many created repositories fetched from synchronous code
+        THEN: fetch their commits concurrently through a new asyncio client
+        AND: record the sync cursor of each one
+        """
+        repositories = RepositoryFactory.create_batch(2)
+        fetch_services = [
+            AsyncFetchRepositoryCommits(
+                access_token='token',
+                repository=repository,
+                run=FetchRun(incremental=True),
+            )
+            for repository in repositories
+        ]
+
+        with patch('repositories.repository_search.AsyncGithubClient', return_value=self.client):
+            AsyncFetchRepositoryCommits.fetch_many(fetch_services)
+
+        self.assertEqual(Commit.objects.count(), len(self.valid_data) * len(repositories))
+        for fetch_service in fetch_services:
+            self.assertTrue(fetch_service.run.completed)
+            self.assertIsNotNone(fetch_service.repository.commits_cursor)
+
+    @override_settings(
+        GITHUB_COMMITS_FETCH_CLASS='repositories.repository_search.AsyncFetchRepositoryCommits',
+    )
+    def test_fetch_commits_strategy_from_settings(self):
+        """
+        GIVEN: the asyncio strategy selected on settings
+        THEN: fetch the commits of a repository through the asyncio client
+        """
+        user = UserProfileFactory()
+        repository = RepositoryFactory(created_by=user)
+
+        with patch('repositories.repository_search.AsyncGithubClient', return_value=self.client):
+            fetch_service = RepositorySearch(
+                name=repository.full_name,
+                user=user,
+            ).fetch_commits(repository)
+
+        self.assertIsInstance(fetch_service, AsyncFetchRepositoryCommits)
+        self.assertTrue(fetch_service.run.completed)
+        self.assertEqual(fetch_service.run.commits_stored, len(self.valid_data))
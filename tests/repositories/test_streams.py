@@ -0,0 +1,208 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import orjson
+import redis
+from django.test import TestCase, override_settings
+
+from repositories.factories import CommitFactory, RepositoryFactory
+from repositories.repository_search import FetchRepositoryCommits
+from repositories.streams import publish_commits, stream_commits
+
+STREAM_URL = 'redis://localhost:6379/0'
+
+
+class FakePubSub:
+    """
+    Async pub/sub replaying the given messages, then staying
+    idle until the timeout of every read
+    """
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+
+    async def get_message(self, timeout=0.0, **_options):
+        if self.messages:
+            return {'type': 'message', 'data': orjson.dumps(self.messages.pop(0))}
+        await asyncio.sleep(timeout)
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncRedis:
+    def __init__(self, messages=()):
+        self.pubsub_instance = FakePubSub(messages)
+
+    def pubsub(self):
+        return self.pubsub_instance
+
+    async def close(self):
+        pass
+
+
+@override_settings(COMMIT_STREAM_URL=STREAM_URL)
+class PublishCommitsTest(TestCase):
+    def setUp(self):
+        self.repository = RepositoryFactory(owner='user', name='repo')
+        self.commit = CommitFactory(repository=self.repository, sha='sha', author='author')
+        self.client_mock = MagicMock()
+        self.client_mock.pubsub_numsub.return_value = [(b'commits:user/repo', 1)]
+
+    def publish(self, shas):
+        with patch('repositories.streams.get_stream_client', return_value=self.client_mock):
+            publish_commits('user/repo', shas)
+
+    def test_publish_commits(self):
+        """
+        GIVEN: a stream listening to the repository
+        THEN: publish the commits to the channel of the repository
+        AND: render them like the commits list does
+        """
+        self.publish(['sha'])
+
+        channel, payload = self.client_mock.publish.call_args.args
+        self.assertEqual(channel, 'commits:user/repo')
+        [commit] = orjson.loads(payload)
+        self.assertEqual(commit['sha'], 'sha')
+        self.assertEqual(commit['author'], 'author')
+        self.assertEqual(commit['repository'], 'user/repo')
+
+    def test_no_listeners(self):
+        """
+        GIVEN: no stream listening to the repository
+        THEN: do not publish the commits
+        """
+        self.client_mock.pubsub_numsub.return_value = [(b'commits:user/repo', 0)]
+
+        self.publish(['sha'])
+
+        self.client_mock.publish.assert_not_called()
+
+    def test_redis_error(self):
+        """
+        GIVEN: Redis failing
+        THEN: log the error instead of raising it
+        """
+        self.client_mock.pubsub_numsub.side_effect = redis.ConnectionError()
+
+        with self.assertLogs('__name__', level='ERROR'):
+            self.publish(['sha'])
+
+    @override_settings(COMMIT_STREAM_URL='')
+    def test_streams_disabled(self):
+        """
+        GIVEN: no stream url on settings
+        THEN: do not reach Redis
+        """
+        self.publish(['sha'])
+
+        self.client_mock.pubsub_numsub.assert_not_called()
+
+    def test_publish_on_save_commits(self):
+        """
+        GIVEN: commits saved to a repository, one of them already stored
+        THEN: publish the new ones once the transaction commits
+        """
+        fetch_service = FetchRepositoryCommits(
+            access_token='token',
+            repository=self.repository,
+        )
+
+        with patch('repositories.repository_search.publish_commits') as publish_mock:
+            with self.captureOnCommitCallbacks() as callbacks:
+                fetch_service.save_commits([
+                    {
+                        'sha': sha,
+                        'html_url': f'https://github.com/user/repo/commit/{sha}',
+                        'commit': {
+                            'message': 'New commit',
+                            'author': {'name': 'author', 'date': '2023-06-20T12:00:00Z'},
+                        },
+                        'author': {'avatar_url': ''},
+                    }
+                    for sha in (self.commit.sha, 'new-sha')
+                ])
+
+            publish_mock.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        publish_mock.assert_called_once_with('user/repo', ['new-sha'])
+
+
+@override_settings(
+    COMMIT_STREAM_URL=STREAM_URL,
+    COMMIT_STREAM_HEARTBEAT_SECONDS=0.01,
+    COMMIT_STREAM_MAX_SECONDS=60,
+)
+class StreamCommitsTest(TestCase):
+    async def read_events(self, fake_redis, count=None, **kwargs):
+        events = []
+        with patch('redis.asyncio.Redis.from_url', return_value=fake_redis):
+            stream = stream_commits(['user/repo', 'user/other'], **kwargs)
+            async for event in stream:
+                events.append(event)
+                if len(events) == count:
+                    break
+            await stream.aclose()
+        return events
+
+    async def test_stream_commits(self):
+        """
+        GIVEN: commits published to the repositories
+        THEN: send each commit as an event
+        AND: send a comment while nothing is published
+        AND: stop listening once the stream is closed
+        """
+        fake_redis = FakeAsyncRedis([[{'sha': 'sha1', 'author': 'author1'}]])
+
+        events = await self.read_events(fake_redis, 3)
+
+        self.assertEqual(events, [
+            'retry: 1000\n: connected\n\n',
+            'event: commit\ndata: {"sha":"sha1","author":"author1"}\n\n',
+            ': keepalive\n\n',
+        ])
+        pubsub = fake_redis.pubsub_instance
+        self.assertEqual(pubsub.channels, ['commits:user/repo', 'commits:user/other'])
+        self.assertTrue(pubsub.closed)
+
+    async def test_stream_commits_of_author(self):
+        """
+        GIVEN: an author filter
+        THEN: send only the commits of the author
+        """
+        fake_redis = FakeAsyncRedis([[
+            {'sha': 'sha1', 'author': 'author1'},
+            {'sha': 'sha2', 'author': 'author2'},
+        ]])
+
+        events = await self.read_events(fake_redis, 3, author='author2')
+
+        self.assertEqual(events[1:], [
+            'event: commit\ndata: {"sha":"sha2","author":"author2"}\n\n',
+            ': keepalive\n\n',
+        ])
+
+    @override_settings(COMMIT_STREAM_MAX_SECONDS=0.05)
+    async def test_stream_commits_ends(self):
+        """
+        GIVEN: a stream open for longer than its lifetime
+        THEN: end the stream
+        AND: tell the browser to reconnect
+        AND: stop listening
+        """
+        fake_redis = FakeAsyncRedis()
+
+        events = await asyncio.wait_for(self.read_events(fake_redis), timeout=5)
+
+        self.assertTrue(events[0].startswith('retry: 1000\n'))
+        self.assertEqual(set(events[1:]), {': keepalive\n\n'})
+        self.assertTrue(fake_redis.pubsub_instance.closed)
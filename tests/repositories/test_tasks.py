@@ -0,0 +1,321 @@
+import json
+import os
+from unittest.mock import patch
+
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+
+from common.factories import UserProfileFactory, UserSocialAuthFactory
+from common.rate_limit import RateLimitExceeded
+from repositories.factories import RepositoryFactory
+from repositories.models import Commit, Repository
+from repositories.tasks import (SYNC_LOCK_KEY, import_repository,
+                                sync_repositories, sync_repository,
+                                sync_repository_batch)
+
+GRAPHQL_FETCH_CLASS = 'repositories.graphql_history.GraphQLFetchRepositoryCommits'
+
+
+class ImportRepositoryTaskTest(TestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        file_path = os.path.abspath("tests/fixtures/commit.json")
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            self.commits_data = json.load(file)
+
+    @patch('repositories.repository_search.RepositorySearch.search', return_value=False)
+    def test_import_not_found(self, mock_search):
+        """
+        GIVEN: an inexistent repository
+        THEN: return a not found result
+        AND: do not create a Repository object
+        """
+
+        result = import_repository.apply(args=('repo', self.user.pk)).get()
+
+        self.assertFalse(result.get('found'))
+        self.assertEqual(result.get('message'), 'The requested repository does not exist')
+        self.assertEqual(Repository.objects.count(), 0)
+
+        mock_search.assert_called_once()
+
+    @patch('common.github_client.GithubClient.get_pages')
+    @patch('repositories.repository_search.RepositorySearch.search', return_value=True)
+    def test_import(self, mock_search, mock_get_pages):
+        """
+        GIVEN: an existent repository
+        THEN: create the repository and fetch its commits
+        AND: report the pages fetched and commits stored
+        """
+        mock_get_pages.return_value = iter([self.commits_data])
+
+        with patch.object(import_repository, 'update_state') as mock_update_state:
+            result = import_repository.apply(args=('repo', self.user.pk)).get()
+
+        self.assertEqual(result, {'found': True, 'pages': 1, 'commits': len(self.commits_data)})
+        self.assertEqual(Repository.objects.get().name, 'repo')
+        self.assertEqual(Commit.objects.count(), len(self.commits_data))
+
+        mock_search.assert_called_once()
+        mock_update_state.assert_called_once_with(
+            state='PROGRESS',
+            meta={'pages': 1, 'commits': len(self.commits_data)},
+        )
+
+    @patch('common.github_client.GithubClient.get_pages')
+    @patch('repositories.repository_search.RepositorySearch.search', return_value=True)
+    def test_import_repository_of_other_owner(self, mock_search, mock_get_pages):
+        """
+        GIVEN: a repository name with its owner
+        THEN: create the repository under that owner
+        """
+        mock_get_pages.return_value = iter([self.commits_data])
+
+        import_repository.apply(args=('org/repo', self.user.pk)).get()
+
+        mock_search.assert_called_once()
+        repository = Repository.objects.get()
+        self.assertEqual((repository.owner, repository.name), ('org', 'repo'))
+        self.assertEqual(repository.full_name, 'org/repo')
+        self.assertEqual(repository.created_by, self.user)
+
+    @patch('common.github_client.GithubClient.get_pages')
+    @patch('repositories.repository_search.RepositorySearch.search', return_value=True)
+    def test_import_repository_tracked_by_other_user(self, mock_search, mock_get_pages):
+        """
+        GIVEN: a repository already fetched for another user
+        THEN: subscribe the user to the same repository
+        AND: do not fetch its commits again
+        """
+        other_user = UserSocialAuthFactory().user
+        repository = RepositoryFactory(
+            owner='org',
+            name='repo',
+            full_name='org/repo',
+            created_by=other_user,
+            commits_cursor=now(),
+            subscribers=[other_user],
+        )
+
+        result = import_repository.apply(args=('org/repo', self.user.pk)).get()
+
+        mock_search.assert_called_once()
+        self.assertEqual(result, {'found': True, 'pages': 0, 'commits': 0})
+        self.assertEqual(Repository.objects.get(), repository)
+        self.assertCountEqual(repository.subscribers.all(), [other_user, self.user])
+        mock_get_pages.assert_not_called()
+
+    @patch('common.github_client.GithubClient.get_pages')
+    @patch('repositories.repository_search.RepositorySearch.search', return_value=True)
+    def test_import_rate_limited(self, mock_search, mock_get_pages):
+        """
+        GIVEN: an exhausted rate limit while fetching commits
+        THEN: requeue the import for after the reset
+        AND: reuse the created repository when retrying
+        """
+        mock_get_pages.side_effect = RateLimitExceeded(120)
+
+        with patch.object(import_repository, 'retry', side_effect=Retry) as mock_retry:
+            with self.assertRaises(Retry):
+                import_repository.apply(args=('repo', self.user.pk), throw=True)
+
+        mock_retry.assert_called_once()
+        self.assertEqual(mock_retry.call_args.kwargs['countdown'], 120)
+        self.assertEqual(Repository.objects.count(), 1)
+
+        mock_get_pages.side_effect = None
+        mock_get_pages.return_value = iter([self.commits_data])
+
+        result = import_repository.apply(args=('repo', self.user.pk)).get()
+
+        self.assertTrue(result.get('found'))
+        self.assertEqual(Repository.objects.count(), 1)
+        mock_search.assert_called()
+
+
+class SyncRepositoryTaskTest(TestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        self.repository = RepositoryFactory(created_by=self.user)
+        self.lock_key = SYNC_LOCK_KEY.format(self.repository.pk)
+        cache.delete(self.lock_key)
+
+    @patch('repositories.repository_search.FetchRepositoryCommits.get_commits', autospec=True)
+    def test_sync(self, mock_get_commits):
+        """
+        GIVEN: a tracked repository
+        THEN: fetch its new commits incrementally
+        AND: record the sync time and duration
+        """
+        mock_get_commits.side_effect = lambda fetch_service: setattr(
+            fetch_service.run, 'completed', True
+        )
+
+        result = sync_repository.apply(args=(self.repository.pk,)).get()
+
+        self.assertTrue(result.get('synced'))
+        fetch_service = mock_get_commits.call_args.args[0]
+        self.assertTrue(fetch_service.run.incremental)
+        self.assertEqual(fetch_service.access_token, self.user.access_token)
+
+        self.repository.refresh_from_db()
+        self.assertIsNotNone(self.repository.last_synced_at)
+        self.assertIsNotNone(self.repository.last_sync_duration)
+        self.assertIsNone(cache.get(self.lock_key))
+
+    @patch('repositories.repository_search.FetchRepositoryCommits.get_commits', autospec=True)
+    def test_sync_with_subscriber_token(self, mock_get_commits):
+        """
+        GIVEN: repositories whose creator is gone or has no Github token
+        THEN: sync them with the token of another subscriber
+        """
+        subscriber = UserSocialAuthFactory(extra_data__access_token='subscriber-token').user
+        repositories = [
+            RepositoryFactory(created_by=None, subscribers=[subscriber]),
+            RepositoryFactory(created_by=UserProfileFactory(), subscribers=[subscriber]),
+        ]
+        repositories[1].created_by.invalidate_access_token()
+
+        for repository in repositories:
+            sync_repository.apply(args=(repository.pk,))
+
+            fetch_service = mock_get_commits.call_args.args[0]
+            self.assertEqual(fetch_service.access_token, 'subscriber-token')
+
+    def test_sync_without_token(self):
+        """
+        GIVEN: a repository without any subscriber with a Github token
+        THEN: skip its sync
+        """
+        user = UserProfileFactory()
+        user.invalidate_access_token()
+        repository = RepositoryFactory(created_by=None, subscribers=[user])
+
+        result = sync_repository.apply(args=(repository.pk,)).get()
+
+        self.assertEqual(result, {'synced': False})
+
+    @patch('repositories.repository_search.FetchRepositoryCommits.get_commits', autospec=True)
+    def test_sync_incomplete(self, mock_get_commits):
+        """
+        GIVEN: a sync that could not fetch every commit
+        THEN: do not record it as the last sync
+        """
+
+        result = sync_repository.apply(args=(self.repository.pk,)).get()
+
+        self.assertFalse(result.get('synced'))
+        self.repository.refresh_from_db()
+        self.assertIsNone(self.repository.last_synced_at)
+        mock_get_commits.assert_called_once()
+
+    @patch('repositories.repository_search.FetchRepositoryCommits.get_commits')
+    def test_sync_already_running(self, mock_get_commits):
+        """
+        GIVEN: a repository already being synced
+        THEN: skip the overlapping sync
+        """
+        cache.add(self.lock_key, True)
+        self.addCleanup(cache.delete, self.lock_key)
+
+        result = sync_repository.apply(args=(self.repository.pk,)).get()
+
+        self.assertFalse(result.get('synced'))
+        mock_get_commits.assert_not_called()
+
+    @patch('repositories.tasks.sync_repository.apply_async')
+    def test_sync_repositories_fan_out(self, mock_apply_async):
+        """
+        GIVEN: many tracked repositories
+        THEN: schedule one sync per repository
+        AND: spread the chunks of repositories over time
+        """
+        repositories = [self.repository, *RepositoryFactory.create_batch(4, created_by=self.user)]
+        RepositoryFactory(created_by=None)
+
+        with self.settings(
+            REPOSITORIES_SYNC_CHUNK_SIZE=2,
+            REPOSITORIES_SYNC_CHUNK_INTERVAL_SECONDS=100,
+            REPOSITORIES_SYNC_JITTER_SECONDS=10,
+        ):
+            scheduled = sync_repositories.apply().get()
+
+        self.assertEqual(scheduled, len(repositories))
+        self.assertEqual(
+            [call.kwargs['args'] for call in mock_apply_async.call_args_list],
+            [(repository.pk,) for repository in repositories],
+        )
+
+        countdowns = [call.kwargs['countdown'] for call in mock_apply_async.call_args_list]
+        for index, countdown in enumerate(countdowns):
+            chunk_start = (index // 2) * 100
+            self.assertGreaterEqual(countdown, chunk_start)
+            self.assertLessEqual(countdown, chunk_start + 10)
+
+    @patch('repositories.tasks.sync_repository_batch.apply_async')
+    @patch('repositories.tasks.sync_repository.apply_async')
+    def test_sync_repositories_batched_by_user(self, mock_sync, mock_sync_batch):
+        """
+        GIVEN: a strategy fetching many repositories together
+        THEN: schedule one sync per batch of repositories of the same user
+        AND: batch the repositories without a creator with their first subscriber
+        """
+        other_user = UserSocialAuthFactory().user
+        repositories = [self.repository, *RepositoryFactory.create_batch(2, created_by=self.user)]
+        other_repository = RepositoryFactory(created_by=other_user)
+        orphan_repository = RepositoryFactory(created_by=None, subscribers=[other_user])
+
+        with self.settings(
+            GITHUB_COMMITS_FETCH_CLASS=GRAPHQL_FETCH_CLASS,
+            GITHUB_GRAPHQL_BATCH_SIZE=2,
+        ):
+            scheduled = sync_repositories.apply().get()
+
+        self.assertEqual(scheduled, 5)
+        mock_sync.assert_not_called()
+        self.assertEqual(
+            [call.kwargs['args'] for call in mock_sync_batch.call_args_list],
+            [
+                ([repositories[0].pk, repositories[1].pk],),
+                ([repositories[2].pk],),
+                ([other_repository.pk, orphan_repository.pk],),
+            ],
+        )
+
+    @patch('repositories.graphql_history.GraphQLFetchRepositoryCommits.fetch_many')
+    def test_sync_batch(self, mock_fetch_many):
+        """
+        GIVEN: a batch of repositories, one of them already being synced
+        THEN: fetch the others together
+        AND: record the sync of the complete ones
+        """
+        repositories = RepositoryFactory.create_batch(2, created_by=self.user)
+        cache.add(self.lock_key, True)
+        self.addCleanup(cache.delete, self.lock_key)
+
+        def complete_first(fetch_services):
+            fetch_services[0].run.completed = True
+
+        mock_fetch_many.side_effect = complete_first
+        repository_ids = [self.repository.pk, *(repository.pk for repository in repositories)]
+
+        with self.settings(GITHUB_COMMITS_FETCH_CLASS=GRAPHQL_FETCH_CLASS):
+            result = sync_repository_batch.apply(args=(repository_ids,)).get()
+
+        fetch_services = mock_fetch_many.call_args.args[0]
+        self.assertEqual(
+            [fetch_service.repository for fetch_service in fetch_services],
+            repositories,
+        )
+        self.assertTrue(all(fetch_service.run.incremental for fetch_service in fetch_services))
+        self.assertEqual(result, {'synced': [repositories[0].pk], 'commits': 0})
+
+        self.assertEqual(
+            list(Repository.objects.filter(
+                last_synced_at__isnull=False
+            ).values_list('pk', flat=True)),
+            [repositories[0].pk],
+        )
+        self.assertIsNone(cache.get(SYNC_LOCK_KEY.format(repositories[0].pk)))
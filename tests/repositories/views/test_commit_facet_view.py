@@ -0,0 +1,161 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from common.factories import UserSocialAuthFactory
+from repositories.cache import get_api_cache
+from repositories.factories import RepositoryFactory
+from repositories.models import CommitActivity
+from repositories.pagination import RankedPagination
+from repositories.repository_search import FetchRepositoryCommits
+
+
+class CommitFacetViewTest(APITestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('repositories:commits-facets')
+
+        self.repository = RepositoryFactory(owner='user', name='repo', subscribers=[self.user])
+        self.other_repository = RepositoryFactory(
+            owner='user',
+            name='other',
+            subscribers=[self.user],
+        )
+        CommitActivity.objects.bulk_create([
+            CommitActivity(repository=self.repository, author='author1',
+                           day=date(2023, 6, 1), commits=2),
+            CommitActivity(repository=self.repository, author='author2',
+                           day=date(2023, 6, 1), commits=1),
+            CommitActivity(repository=self.repository, author='author1',
+                           day=date(2023, 6, 12), commits=4),
+            CommitActivity(repository=self.other_repository, author='author3',
+                           day=date(2023, 6, 12), commits=3),
+            # Activity of a repository the user does not track
+            CommitActivity(repository=RepositoryFactory(), author='author4',
+                           day=date(2023, 6, 1), commits=10),
+        ])
+
+    def test_authors(self):
+        """
+        GIVEN: commit activity of the tracked repositories
+        THEN: return every author with their commits, most active first
+        """
+
+        response = self.client.get(self.url, {'facet': 'author'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'next': None,
+            'previous': None,
+            'results': [
+                {'value': 'author1', 'commits': 6},
+                {'value': 'author3', 'commits': 3},
+                {'value': 'author2', 'commits': 1},
+            ],
+        })
+
+    def test_repositories(self):
+        """
+        GIVEN: commit activity of the tracked repositories
+        THEN: return every repository with its commits
+        """
+
+        response = self.client.get(self.url, {'facet': 'repository'})
+
+        self.assertEqual(response.json().get('results'), [
+            {'value': 'user/repo', 'commits': 7},
+            {'value': 'user/other', 'commits': 3},
+        ])
+
+    def test_filters(self):
+        """
+        GIVEN: the filters of the commits list
+        THEN: count only the activity inside the filters
+        """
+
+        response = self.client.get(self.url, {
+            'facet': 'author',
+            'repository__full_name': 'user/repo',
+            'date_after': '2023-06-10',
+        })
+
+        self.assertEqual(response.json().get('results'), [
+            {'value': 'author1', 'commits': 4},
+        ])
+
+    def test_datetime_filters(self):
+        """
+        GIVEN: datetime filters, like the ones of the commits list
+        THEN: count the activity of the days of those datetimes
+        """
+
+        response = self.client.get(self.url, {
+            'facet': 'author',
+            'repository__full_name': 'user/repo',
+            'date_after': '2023-06-10T00:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json().get('results'), [
+            {'value': 'author1', 'commits': 4},
+        ])
+
+    def test_pagination(self):
+        """
+        GIVEN: more values than the page size
+        THEN: return them across pages
+        """
+
+        with patch.object(RankedPagination, 'page_size', 2):
+            first_page = self.client.get(self.url, {'facet': 'author'}).json()
+            second_page = self.client.get(first_page.get('next')).json()
+
+        self.assertEqual(
+            [facet['value'] for facet in first_page.get('results')],
+            ['author1', 'author3'],
+        )
+        self.assertEqual(second_page.get('results'), [{'value': 'author2', 'commits': 1}])
+        self.assertIsNone(second_page.get('next'))
+
+    def test_invalid_facet(self):
+        """
+        GIVEN: an unknown facet
+        THEN: return bad request status
+        """
+
+        response = self.client.get(self.url, {'facet': 'message'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('facet', response.json())
+
+    def test_cache_invalidated_on_save_commits(self):
+        """
+        GIVEN: cached facets
+        THEN: count the commits saved after the facets were cached
+        """
+        self.client.get(self.url, {'facet': 'author'})
+
+        fetch_service = FetchRepositoryCommits(
+            access_token='token',
+            repository=self.repository,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            fetch_service.save_commits([{
+                'sha': 'sha',
+                'html_url': 'https://github.com/user/repo/commit/sha',
+                'commit': {
+                    'message': 'New commit',
+                    'author': {'name': 'author5', 'date': '2023-06-20T12:00:00Z'},
+                },
+                'author': {'avatar_url': ''},
+            }])
+
+        results = self.client.get(self.url, {'facet': 'author'}).json().get('results')
+
+        self.assertIn({'value': 'author5', 'commits': 1}, results)
@@ -0,0 +1,147 @@
+from datetime import date
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from common.factories import UserSocialAuthFactory
+from repositories.cache import get_api_cache
+from repositories.factories import RepositoryFactory
+from repositories.models import CommitActivity
+from repositories.repository_search import FetchRepositoryCommits
+
+
+class CommitStatsViewTest(APITestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('repositories:commits-stats')
+
+        self.repository = RepositoryFactory(owner='user', name='repo', subscribers=[self.user])
+        self.other_repository = RepositoryFactory(
+            owner='user',
+            name='other',
+            subscribers=[self.user],
+        )
+        CommitActivity.objects.bulk_create([
+            CommitActivity(repository=self.repository, author='author1',
+                           day=date(2023, 6, 1), commits=2),
+            CommitActivity(repository=self.repository, author='author2',
+                           day=date(2023, 6, 1), commits=1),
+            CommitActivity(repository=self.repository, author='author1',
+                           day=date(2023, 6, 12), commits=4),
+            CommitActivity(repository=self.other_repository, author='author1',
+                           day=date(2023, 6, 12), commits=3),
+            # Activity of a repository the user does not track
+            CommitActivity(repository=RepositoryFactory(), author='author1',
+                           day=date(2023, 6, 1), commits=10),
+        ])
+
+    def test_daily_totals(self):
+        """
+        GIVEN: commit activity of the tracked repositories
+        THEN: return the commits per day
+        """
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'bucket': 'day',
+            'results': [
+                {'period': '2023-06-01', 'commits': 3},
+                {'period': '2023-06-12', 'commits': 7},
+            ],
+        })
+
+    def test_grouped_by_repository_and_author(self):
+        """
+        GIVEN: commit activity of the tracked repositories
+        THEN: return the commits per month, repository and author
+        """
+
+        response = self.client.get(self.url, {
+            'bucket': 'month',
+            'group_by': ['author', 'repository'],
+        })
+
+        self.assertEqual(response.json().get('results'), [
+            {'period': '2023-06-01', 'repository': 'user/other', 'author': 'author1', 'commits': 3},
+            {'period': '2023-06-01', 'repository': 'user/repo', 'author': 'author1', 'commits': 6},
+            {'period': '2023-06-01', 'repository': 'user/repo', 'author': 'author2', 'commits': 1},
+        ])
+
+    def test_filters(self):
+        """
+        GIVEN: commit activity of the tracked repositories
+        THEN: count only the activity inside the filters
+        """
+
+        response = self.client.get(self.url, {
+            'group_by': 'author',
+            'repository__full_name': 'user/repo',
+            'date_after': '2023-06-10',
+        })
+
+        self.assertEqual(response.json().get('results'), [
+            {'period': '2023-06-12', 'author': 'author1', 'commits': 4},
+        ])
+
+    def test_datetime_filters(self):
+        """
+        GIVEN: datetime filters, like the ones of the commits list
+        THEN: count the activity of the days of those datetimes in the current time zone
+        AND: return bad request status for invalid dates
+        """
+
+        response = self.client.get(self.url, {
+            'date_after': '2023-06-01T12:00:00Z',
+            'date_before': '2023-06-02T01:00:00Z',
+        })
+
+        self.assertEqual(response.json().get('results'), [
+            {'period': '2023-06-01', 'commits': 3},
+        ])
+
+        response = self.client.get(self.url, {'date_after': 'yesterday'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_bucket(self):
+        """
+        GIVEN: an unknown bucket
+        THEN: return bad request status
+        """
+
+        response = self.client.get(self.url, {'bucket': 'year'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('bucket', response.json())
+
+    def test_cache_invalidated_on_save_commits(self):
+        """
+        GIVEN: cached stats
+        THEN: count the commits saved after the stats were cached
+        """
+        self.client.get(self.url)
+
+        fetch_service = FetchRepositoryCommits(
+            access_token='token',
+            repository=self.repository,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            fetch_service.save_commits([{
+                'sha': 'sha',
+                'html_url': 'https://github.com/user/repo/commit/sha',
+                'commit': {
+                    'message': 'New commit',
+                    'author': {'name': 'author3', 'date': '2023-06-20T12:00:00Z'},
+                },
+                'author': {'avatar_url': ''},
+            }])
+
+        results = self.client.get(self.url).json().get('results')
+
+        self.assertEqual(results[-1], {'period': '2023-06-20', 'commits': 1})
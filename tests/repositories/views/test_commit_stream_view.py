@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from common.factories import UserSocialAuthFactory
+from repositories.factories import RepositoryFactory
+
+
+async def fake_stream(full_names, author=None):
+    yield f'{sorted(full_names)}:{author}'
+
+
+@override_settings(COMMIT_STREAM_URL='redis://localhost:6379/0')
+class CommitStreamViewTest(TestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        self.url = reverse('repositories:commits-stream')
+
+        RepositoryFactory(owner='user', name='repo', subscribers=[self.user])
+        RepositoryFactory(owner='user', name='other', subscribers=[self.user])
+        RepositoryFactory(owner='user', name='untracked')
+
+    async def get(self, data=None):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        with patch('repositories.views.stream_commits', side_effect=fake_stream) as stream_mock:
+            response = await self.async_client.get(self.url, data or {})
+        return response, stream_mock
+
+    async def test_stream(self):
+        """
+        GIVEN: an authenticated user
+        THEN: stream the commits of the subscribed repositories
+        """
+        response, _ = await self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content, b"['user/other', 'user/repo']:None")
+
+    async def test_stream_filters(self):
+        """
+        GIVEN: a repository and an author filter
+        THEN: stream only the commits of the author in the repository
+        """
+        response, stream_mock = await self.get({
+            'repository__full_name': 'user/repo',
+            'author': 'author',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stream_mock.assert_called_once_with(['user/repo'], author='author')
+
+    async def test_untracked_repository(self):
+        """
+        GIVEN: a repository the user does not track
+        THEN: return no content
+        """
+        response, stream_mock = await self.get({'repository__full_name': 'user/untracked'})
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        stream_mock.assert_not_called()
+
+    @override_settings(COMMIT_STREAM_URL='')
+    async def test_streams_disabled(self):
+        """
+        GIVEN: no stream url on settings
+        THEN: return no content
+        """
+        response, _ = await self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    async def test_unauthenticated(self):
+        """
+        GIVEN: an unauthenticated user
+        THEN: return forbidden status
+        """
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
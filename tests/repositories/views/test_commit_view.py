@@ -1,11 +1,21 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+from unittest.mock import patch
+
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from faker import Faker
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from common.factories import UserSocialAuthFactory
+from repositories.cache import get_api_cache
 from repositories.factories import CommitFactory, RepositoryFactory
+from repositories.models import Commit
+from repositories.pagination import KeysetPagination
+from repositories.repository_search import FetchRepositoryCommits
 from repositories.serializers import CommitSerializer
 
 fake = Faker()
@@ -14,6 +24,7 @@ fake = Faker()
 class CommitView(APITestCase):
     def setUp(self):
         self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
 
         self.client.force_authenticate(user=self.user)
         self.url = reverse('repositories:commits-list')
@@ -29,7 +40,7 @@ class CommitView(APITestCase):
 
         self.assertEqual(
             response_data,
-            {'count': 0, 'next': None, 'previous': None, 'results': []}
+            {'next': None, 'previous': None, 'results': []}
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
@@ -38,7 +49,7 @@ class CommitView(APITestCase):
         GIVEN: one commit on the database
         THEN: retrieve that commit
         """
-        commit = CommitFactory()
+        commit = CommitFactory(repository__subscribers=[self.user])
         expected_data = CommitSerializer(commit).data
 
         response = self.client.get(self.url)
@@ -47,7 +58,6 @@ class CommitView(APITestCase):
         self.assertEqual(
             response_data,
             {
-                'count': 1,
                 'next': None,
                 'previous': None,
                 'results': [expected_data],
@@ -61,12 +71,12 @@ class CommitView(APITestCase):
         THEN: retrieve those commits
         """
         batch_size = 5
-        CommitFactory.create_batch(batch_size)
+        CommitFactory.create_batch(batch_size, repository__subscribers=[self.user])
 
         response = self.client.get(self.url)
         response_data = response.json()
 
-        self.assertEqual(response_data.get('count'), batch_size)
+        self.assertEqual(len(response_data.get('results')), batch_size)
         self.assertIsNone(response_data.get('next'))
         self.assertIsNone(response_data.get('previous'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -74,43 +84,263 @@ class CommitView(APITestCase):
     def test_pagination(self):
         """
         GIVEN: many commits on the database
-        THEN: return response with pagination information
+        THEN: return response with cursor pagination information
+        AND: walk every commit exactly once in date order
         """
         pagination_size = settings.REST_FRAMEWORK.get('PAGE_SIZE')
 
         batch_size = (pagination_size * 2) + pagination_size // 2
-        CommitFactory.create_batch(batch_size)
+        CommitFactory.create_batch(batch_size, repository__subscribers=[self.user])
+        expected_shas = list(Commit.objects.order_by('-date', '-id').values_list('sha', flat=True))
 
         response = self.client.get(self.url)
         response_data = response.json()
 
-        self.assertEqual(response_data.get('count'), batch_size)
+        self.assertNotIn('count', response_data)
         self.assertIsNotNone(response_data.get('next'))
         self.assertIsNone(response_data.get('previous'))
         self.assertEqual(len(response_data.get('results')), pagination_size)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page = response_data.get('results')
 
         # Next page
 
         response = self.client.get(response_data.get('next'))
         response_data = response.json()
 
-        self.assertEqual(response_data.get('count'), batch_size)
         self.assertIsNotNone(response_data.get('next'))
         self.assertIsNotNone(response_data.get('previous'))
         self.assertEqual(len(response_data.get('results')), pagination_size)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        second_page = response_data.get('results')
 
         # Last page
 
         response = self.client.get(response_data.get('next'))
         response_data = response.json()
 
-        self.assertEqual(response_data.get('count'), batch_size)
         self.assertIsNone(response_data.get('next'))
         self.assertIsNotNone(response_data.get('previous'))
         self.assertLess(len(response_data.get('results')), pagination_size)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        last_page = response_data.get('results')
+
+        self.assertEqual(
+            [commit['sha'] for commit in first_page + second_page + last_page],
+            expected_shas,
+        )
+
+        # Back to the previous page
+
+        response = self.client.get(response_data.get('previous'))
+        response_data = response.json()
+
+        self.assertEqual(response_data.get('results'), second_page)
+        self.assertIsNotNone(response_data.get('next'))
+        self.assertIsNotNone(response_data.get('previous'))
+
+        # Back to the first page
+
+        response = self.client.get(response_data.get('previous'))
+        response_data = response.json()
+
+        self.assertEqual(response_data.get('results'), first_page)
+        self.assertIsNone(response_data.get('previous'))
+
+    def test_pagination_same_date(self):
+        """
+        GIVEN: many commits with the same date
+        THEN: break ties by id so no commit is skipped or repeated
+        """
+        pagination_size = settings.REST_FRAMEWORK.get('PAGE_SIZE')
+        date = fake.date_time_this_month(tzinfo=timezone.utc)
+        CommitFactory.create_batch(
+            pagination_size + 3,
+            date=date,
+            repository__subscribers=[self.user],
+        )
+
+        response_data = self.client.get(self.url).json()
+        next_response_data = self.client.get(response_data.get('next')).json()
+
+        shas = [
+            commit['sha']
+            for commit in response_data.get('results') + next_response_data.get('results')
+        ]
+        self.assertEqual(len(shas), pagination_size + 3)
+        self.assertEqual(len(set(shas)), pagination_size + 3)
+        self.assertIsNone(next_response_data.get('next'))
+
+    def test_pagination_estimated_count(self):
+        """
+        GIVEN: many commits on the database
+        THEN: include an estimated count when requested
+        """
+        CommitFactory.create_batch(3, repository__subscribers=[self.user])
+
+        response = self.client.get(self.url, {'count': 'estimate'})
+
+        self.assertEqual(response.json().get('count'), 3)
+
+    def test_pagination_invalid_cursor(self):
+        """
+        GIVEN: a malformed cursor
+        THEN: return not found status
+        """
+
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_same_representation_as_serializer(self):
+        """
+        GIVEN: commits with varied data on the database
+        THEN: render them exactly like CommitSerializer
+        """
+        CommitFactory(
+            date=fake.date_time_this_month(tzinfo=timezone.utc),
+            avatar='',
+            repository__subscribers=[self.user],
+        )
+        CommitFactory(
+            message='Unicode açaí ✓',
+            date=fake.date_time_this_month(tzinfo=timezone.utc),
+            repository__subscribers=[self.user],
+        )
+
+        response = self.client.get(self.url)
+
+        expected_data = CommitSerializer(
+            Commit.objects.select_related('repository').order_by('-date', '-id'),
+            many=True,
+        ).data
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json().get('results'), expected_data)
+
+    def test_query_count(self):
+        """
+        GIVEN: a page of commits from many repositories
+        THEN: retrieve the page and its repository names in a single query
+        """
+        pagination_size = settings.REST_FRAMEWORK.get('PAGE_SIZE')
+        CommitFactory.create_batch(pagination_size + 1, repository__subscribers=[self.user])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json().get('results')), pagination_size)
+
+    def test_cached_response(self):
+        """
+        GIVEN: a commits page already requested
+        THEN: serve it again from the cache without querying the database
+        AND: answer not modified when the client has the same ETag
+        """
+        CommitFactory.create_batch(3, repository__subscribers=[self.user])
+
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.url)
+
+        self.assertEqual(cached_response.json(), response.json())
+        self.assertEqual(cached_response['ETag'], etag)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_cache_invalidated_on_save_commits(self):
+        """
+        GIVEN: cached commit pages of a repository
+        THEN: drop them once new commits of the repository are saved
+        AND: keep the pages of other repositories cached
+        """
+        repository = RepositoryFactory(owner='user', name='repo', subscribers=[self.user])
+        other_repository = RepositoryFactory(owner='user', name='other', subscribers=[self.user])
+        CommitFactory(repository=other_repository)
+
+        self.assertEqual(self.client.get(self.url).json().get('results'), [
+            CommitSerializer(Commit.objects.get()).data,
+        ])
+        self.client.get(self.url, {'repository__full_name': 'user/other'})
+
+        fetch_service = FetchRepositoryCommits(
+            access_token='token',
+            repository=repository,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            fetch_service.save_commits([{
+                'sha': fake.sha1(),
+                'html_url': fake.url(),
+                'commit': {
+                    'message': 'New commit',
+                    'author': {'name': 'author', 'date': '2023-06-07T17:46:00Z'},
+                },
+                'author': {'avatar_url': fake.url()},
+            }])
+
+        response_data = self.client.get(self.url).json()
+        self.assertEqual(len(response_data.get('results')), 2)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'repository__full_name': 'user/other'})
+
+        response_data = self.client.get(self.url, {'repository__full_name': 'user/repo'}).json()
+        self.assertEqual(response_data.get('results')[0]['message'], 'New commit')
+
+    def test_cache_invalidated_for_subscribers(self):
+        """
+        GIVEN: cached commit pages of users tracking different repositories
+        THEN: drop the pages of the subscribers once commits of a repository are saved
+        AND: keep the pages of other users cached
+        """
+        other_user = UserSocialAuthFactory().user
+        repository = RepositoryFactory(subscribers=[self.user])
+        CommitFactory(repository__subscribers=[other_user])
+
+        self.client.get(self.url)
+        self.client.force_authenticate(user=other_user)
+        self.client.get(self.url)
+
+        fetch_service = FetchRepositoryCommits(access_token='token', repository=repository)
+        with self.captureOnCommitCallbacks(execute=True):
+            fetch_service.save_commits([FetchRepositoryCommits.to_api_commit(
+                sha=fake.sha1(),
+                url=fake.url(),
+                message='New commit',
+                author='author',
+                date='2023-06-07T17:46:00Z',
+                avatar=fake.url(),
+            )])
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        self.client.force_authenticate(user=self.user)
+        response_data = self.client.get(self.url).json()
+        self.assertEqual(response_data.get('results')[0]['message'], 'New commit')
+
+    def test_only_subscribed_repositories(self):
+        """
+        GIVEN: commits of repositories tracked by other users
+        THEN: retrieve only the commits of the repositories the user tracks
+        AND: do not serve them from the cache of another user
+        """
+        other_user = UserSocialAuthFactory().user
+        shared_repository = RepositoryFactory(subscribers=[self.user, other_user])
+        commit = CommitFactory(repository=shared_repository)
+        CommitFactory(repository__subscribers=[other_user])
+
+        self.client.force_authenticate(user=other_user)
+        self.assertEqual(len(self.client.get(self.url).json().get('results')), 2)
+
+        self.client.force_authenticate(user=self.user)
+        response_data = self.client.get(self.url).json()
+
+        self.assertEqual(response_data.get('results'), [CommitSerializer(commit).data])
 
     def test_commit_filter(self):
         """
@@ -122,11 +352,11 @@ class CommitView(APITestCase):
         commits = [
             CommitFactory(
                 author='author1',
-                repository=RepositoryFactory(name='repo1'),
+                repository=RepositoryFactory(owner='user', name='repo1', subscribers=[self.user]),
             ),
             CommitFactory(
                 author='author2',
-                repository=RepositoryFactory(name='repo2'),
+                repository=RepositoryFactory(owner='user', name='repo2', subscribers=[self.user]),
             )
         ]
 
@@ -142,7 +372,7 @@ class CommitView(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Filter by repository name
-        response = self.client.get(self.url, {'repository__name': commits[1].repository})
+        response = self.client.get(self.url, {'repository__full_name': commits[1].repository})
         response_data = response.json()
 
         self.assertEqual(
@@ -158,3 +388,261 @@ class CommitView(APITestCase):
 
         self.assertEqual(response_data.get('results'), [])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CommitFilterTest(APITestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('repositories:commits-list')
+
+        self.repositories = [
+            RepositoryFactory(owner='user', name=f'repo{index}', subscribers=[self.user])
+            for index in range(3)
+        ]
+        self.commits = [
+            CommitFactory(
+                author=f'author{index}',
+                date=datetime(2023, 6, index + 1, tzinfo=timezone.utc),
+                repository=repository,
+            )
+            for index, repository in enumerate(self.repositories)
+        ]
+
+    def get_shas(self, filters):
+        response = self.client.get(self.url, filters)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(commit['sha'] for commit in response.json().get('results'))
+
+    def test_filter_date_range(self):
+        """
+        GIVEN: commits on different days
+        THEN: retrieve the commits inside the date window, both ends included
+        """
+
+        shas = self.get_shas({
+            'date_after': '2023-06-02T00:00:00Z',
+            'date_before': '2023-06-03T00:00:00Z',
+        })
+        self.assertEqual(shas, sorted(commit.sha for commit in self.commits[1:]))
+
+        shas = self.get_shas({'date_before': '2023-06-01T12:00:00Z'})
+        self.assertEqual(shas, [self.commits[0].sha])
+
+    def test_filter_many_authors(self):
+        """
+        GIVEN: commits of many authors
+        THEN: retrieve the commits of any of the given authors
+        """
+
+        shas = self.get_shas({'author__in': 'author0,author2'})
+
+        self.assertEqual(shas, sorted((self.commits[0].sha, self.commits[2].sha)))
+
+    def test_filter_many_repositories(self):
+        """
+        GIVEN: commits of many repositories
+        THEN: retrieve the commits of any of the given repositories
+        AND: combine it with the other filters
+        """
+
+        shas = self.get_shas({'repository__full_name__in': 'user/repo0,user/repo1'})
+        self.assertEqual(shas, sorted((self.commits[0].sha, self.commits[1].sha)))
+
+        shas = self.get_shas({
+            'repository__full_name__in': 'user/repo0,user/repo1',
+            'date_after': '2023-06-02T00:00:00Z',
+        })
+        self.assertEqual(shas, [self.commits[1].sha])
+
+    def test_filter_invalid_date(self):
+        """
+        GIVEN: a malformed date
+        THEN: return bad request status
+        """
+
+        response = self.client.get(self.url, {'date_after': 'yesterday'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CommitSearchTest(APITestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('repositories:commits-list')
+        self.repository = RepositoryFactory(subscribers=[self.user])
+
+    def save_commits(self, messages):
+        fetch_service = FetchRepositoryCommits(
+            access_token='token',
+            repository=self.repository,
+        )
+        fetch_service.save_commits([
+            {
+                'sha': fake.sha1(),
+                'html_url': fake.url(),
+                'commit': {
+                    'message': message,
+                    'author': {
+                        'name': 'author',
+                        'date': fake.date_time_this_month(tzinfo=timezone.utc).isoformat(),
+                    },
+                },
+                'author': {'avatar_url': fake.url()},
+            }
+            for message in messages
+        ])
+
+    def test_search(self):
+        """
+        GIVEN: commits with different messages
+        THEN: retrieve only the commits matching the search
+        """
+        self.save_commits(['Fix the login redirect', 'Add commit filters', 'Fix typo'])
+
+        response = self.client.get(self.url, {'search': 'login'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [commit['message'] for commit in response.json().get('results')],
+            ['Fix the login redirect'],
+        )
+
+    def test_search_pagination(self):
+        """
+        GIVEN: more matching commits than a page
+        THEN: paginate the results by page
+        AND: walk every matching commit exactly once
+        """
+        pagination_size = settings.REST_FRAMEWORK.get('PAGE_SIZE')
+        self.save_commits([f'Fix bug {index}' for index in range(pagination_size + 2)])
+        self.save_commits(['Add docs'])
+
+        response_data = self.client.get(self.url, {'search': 'fix'}).json()
+
+        self.assertIsNone(response_data.get('previous'))
+        self.assertIn('page=2', response_data.get('next'))
+        first_page = response_data.get('results')
+
+        response_data = self.client.get(response_data.get('next')).json()
+
+        self.assertIsNone(response_data.get('next'))
+        self.assertNotIn('page=', response_data.get('previous'))
+        messages = [commit['message'] for commit in first_page + response_data.get('results')]
+        self.assertEqual(len(set(messages)), pagination_size + 2)
+        self.assertTrue(all(message.startswith('Fix bug') for message in messages))
+
+    def test_search_invalid_page(self):
+        """
+        GIVEN: a malformed page
+        THEN: return not found status
+        """
+
+        response = self.client.get(self.url, {'search': 'fix', 'page': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full text search requires Postgres')
+    def test_search_ranked(self):
+        """
+        GIVEN: commits matching the search with different relevance
+        THEN: retrieve the most relevant commits first
+        AND: store the search vector of the saved commits
+        """
+        self.save_commits(['Update readme', 'Fix crash on fix of the cache fix', 'Fix the cache'])
+
+        response = self.client.get(self.url, {'search': 'fix cache'})
+
+        self.assertEqual(
+            [commit['message'] for commit in response.json().get('results')],
+            ['Fix crash on fix of the cache fix', 'Fix the cache'],
+        )
+        self.assertFalse(Commit.objects.filter(search_vector__isnull=True).exists())
+
+
+class CommitViewQueryPlanTest(APITestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('repositories:commits-list')
+
+        repository = RepositoryFactory(owner='user', name='repo', subscribers=[self.user])
+        CommitFactory.create_batch(5, repository=repository, author='author')
+
+    def explain_list_query(self, filters):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, filters)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "repositories_commit"' in query['sql']
+        )
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tiny test tables would otherwise always be scanned sequentially
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(str(row) for row in cursor.fetchall())
+
+    def test_filter_by_author_uses_index(self):
+        """
+        GIVEN: commits filtered by author
+        THEN: the list query uses the author index
+        """
+
+        plan = self.explain_list_query({'author': 'author'})
+
+        self.assertIn('commit_author_date_idx', plan)
+
+    def test_filter_by_repository_uses_index(self):
+        """
+        GIVEN: commits filtered by repository name
+        THEN: the list query uses the repository index
+        """
+
+        plan = self.explain_list_query({'repository__full_name': 'user/repo'})
+
+        self.assertIn('commit_repository_date_idx', plan)
+
+    def test_filter_many_authors_in_date_range_uses_index(self):
+        """
+        GIVEN: commits filtered by many authors in a date window
+        THEN: the list query uses the author index
+        """
+
+        plan = self.explain_list_query({
+            'author__in': 'author,other',
+            'date_after': '2023-06-01T00:00:00Z',
+            'date_before': '2023-06-30T00:00:00Z',
+        })
+
+        self.assertIn('commit_author_date_idx', plan)
+
+    @patch.object(KeysetPagination, 'page_size', 2)
+    def test_next_page_bounds_date_range(self):
+        """
+        GIVEN: the next page of the commits list
+        THEN: the list query bounds the date range of the keyset
+        """
+        next_url = self.client.get(self.url).json()['next']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "repositories_commit"' in query['sql']
+        )
+        self.assertIn('"repositories_commit"."date" <=', sql)
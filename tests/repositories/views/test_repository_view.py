@@ -2,16 +2,20 @@ import json
 import os
 from unittest.mock import Mock, patch
 
+from django.core.cache import cache
 from django.urls import reverse
 from faker import Faker
 from requests.exceptions import HTTPError
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
 
 from common.factories import UserSocialAuthFactory
+from repositories.cache import get_api_cache
 from repositories.factories import RepositoryFactory
 from repositories.models import Commit, Repository
+from repositories.repository_search import RepositorySearch
+from repositories.tasks import import_repository
+from repositories.views import IMPORT_JOB_OWNER_KEY
 
 fake = Faker()
 
@@ -19,54 +23,19 @@ fake = Faker()
 class RepositoryViewTest(APITestCase):
     def setUp(self):
         self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
 
         self.client.force_authenticate(user=self.user)
         self.url = reverse('repositories:repositories-list-create')
 
-    @patch('repositories.repository_search.RepositorySearch.search', return_value=False)
-    def test_create_repository_fail(self, mock_search):
-        """
-        GIVEN: an invalid repository name
-        THEN: return not found status with an error message
-        AND: do not create a Repository object
-        """
-
-        data = {
-            'values': f'{self.user.username}/invalid-repository-name',
-            'name': 'invalid-repository-name',
-        }
-
-        response = self.client.post(self.url, data, format='json')
-        response_data = response.json()
-
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
-        self.assertEqual(
-            response_data,
-            {
-                'message': 'The requested repository does not exist',
-            }
-        )
-        self.assertEqual(Repository.objects.count(), 0)
-
-        mock_search.assert_called_once()
-
-    @patch('repositories.repository_search.RepositorySearch.fetch_commits')
-    @patch('repositories.repository_search.RepositorySearch.create_repository')
-    @patch('repositories.repository_search.RepositorySearch.search', return_value=True)
-    def test_create_repository_with_error_on_serializer(
-        self,
-        mock_search,
-        mock_create_repository,
-        mock_fetch_commits,
-    ):
+    @patch('repositories.views.import_repository.delay')
+    def test_create_repository_with_error_on_serializer(self, mock_delay):
         """
         GIVEN: a invalid repository name
         THEN: return bad request status
-        AND: do not create a Repository object
+        AND: do not schedule the import
         """
 
-        mock_create_repository.side_effect = ValidationError('Invalid name')
-
         invalid_str_size = Repository._meta.get_field('name').max_length + 1
         longe_name = fake.pystr(
             min_chars=invalid_str_size,
@@ -80,46 +49,99 @@ class RepositoryViewTest(APITestCase):
 
         response = self.client.post(self.url, data, format='json')
 
-        response_data = response.json()
-
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(
-            response_data,
-            ['Invalid name']
-        )
         self.assertEqual(Repository.objects.count(), 0)
 
-        mock_search.assert_called_once()
-        mock_fetch_commits.assert_not_called()
+        mock_delay.assert_not_called()
 
-    @patch('repositories.repository_search.RepositorySearch.fetch_commits')
-    @patch('repositories.repository_search.RepositorySearch.create_repository')
-    @patch('repositories.repository_search.RepositorySearch.search', return_value=True)
-    def test_create_repository(
-        self,
-        mock_search,
-        mock_create_repository,
-        mock_fetch_commits,
-    ):
+    @patch('repositories.views.import_repository.delay')
+    def test_create_repository(self, mock_delay):
         """
         GIVEN: a valid repository name
-        THEN: return created status
-        AND: create a Repository object
+        THEN: return accepted status with the job id
+        AND: schedule the import of the repository
         """
 
         data = {
             'values': f'{self.user.username}/valid-repository-name',
             'name': 'valid-repository-name',
         }
-        repository = RepositoryFactory(name=data.get('name'))
-        mock_create_repository.return_value = repository
+        mock_delay.return_value = Mock(id='job-id')
 
         response = self.client.post(self.url, data, format='json')
 
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json(), {'job_id': 'job-id'})
 
-        mock_search.assert_called_once()
-        mock_fetch_commits.assert_called_once_with(repository)
+        mock_delay.assert_called_once_with(data.get('name'), self.user.pk)
+        self.assertEqual(cache.get(IMPORT_JOB_OWNER_KEY.format('job-id')), self.user.pk)
+
+    @patch('repositories.views.import_repository.delay')
+    def test_create_repository_with_owner(self, mock_delay):
+        """
+        GIVEN: a repository name with another owner
+        THEN: return accepted status
+        AND: schedule the import of the owner repository
+        """
+        RepositoryFactory(
+            owner=self.user.username,
+            name='repo',
+            full_name=f'{self.user.username}/repo',
+        )
+        mock_delay.return_value = Mock(id='job-id')
+
+        response = self.client.post(self.url, {'name': 'org/repo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock_delay.assert_called_once_with('org/repo', self.user.pk)
+
+    @patch('repositories.views.import_repository.delay')
+    def test_create_repository_tracked_by_other_user(self, mock_delay):
+        """
+        GIVEN: a repository tracked by another user
+        THEN: return accepted status
+        AND: schedule the import to subscribe the user to it
+        """
+        RepositoryFactory(
+            owner='org',
+            name='repo',
+            full_name='org/repo',
+            subscribers=[UserSocialAuthFactory().user],
+        )
+        mock_delay.return_value = Mock(id='job-id')
+
+        response = self.client.post(self.url, {'name': 'org/repo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock_delay.assert_called_once_with('org/repo', self.user.pk)
+
+    @patch('repositories.views.import_repository.delay')
+    def test_create_repository_already_tracked(self, mock_delay):
+        """
+        GIVEN: a repository the user already tracks
+        THEN: return bad request status
+        AND: do not schedule the import
+        """
+        RepositoryFactory(owner='org', name='repo', full_name='org/repo', subscribers=[self.user])
+
+        response = self.client.post(self.url, {'name': 'org/repo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'name': ['You already track this repository']})
+        mock_delay.assert_not_called()
+
+    @patch('repositories.views.import_repository.delay')
+    def test_create_repository_already_tracked_other_case(self, mock_delay):
+        """
+        GIVEN: a repository the user already tracks, typed with another case
+        THEN: return bad request status
+        """
+        RepositoryFactory(owner='Org', name='Repo', full_name='Org/Repo', subscribers=[self.user])
+
+        response = self.client.post(self.url, {'name': 'org/repo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_delay.assert_not_called()
 
     def test_list_all_repositories_empty(self):
         """
@@ -135,18 +157,44 @@ class RepositoryViewTest(APITestCase):
     def test_list_all_repositories(self):
         """
         GIVEN: repositories on the db
-        THEN: return repositories names
+        THEN: return the names of the repositories the user tracks
         """
-        RepositoryFactory.create_batch(5)
-        expected_response = Repository.objects.only(
-            'name'
-        ).all().values_list('name', flat=True)
+        RepositoryFactory.create_batch(5, subscribers=[self.user])
+        RepositoryFactory(subscribers=[UserSocialAuthFactory().user])
+        expected_response = self.user.subscribed_repositories.values_list('full_name', flat=True)
 
         response = self.client.get(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json().get('result'), list(expected_response))
 
+    def test_list_cache_invalidated_on_create(self):
+        """
+        GIVEN: a cached list of repositories
+        THEN: serve it from the cache
+        AND: drop it once a repository is created
+        """
+        RepositoryFactory(
+            owner='org',
+            name='first',
+            full_name='org/first',
+            subscribers=[self.user],
+        )
+
+        self.assertEqual(self.client.get(self.url).json().get('result'), ['org/first'])
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        search_service = RepositorySearch(name='second', user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            search_service.create_repository()
+
+        self.assertCountEqual(
+            self.client.get(self.url).json().get('result'),
+            ['org/first', f'{self.user.username}/second'],
+        )
+
 
 class RepositoryViewIntegrationTest(APITestCase):
     def setUp(self):
@@ -157,11 +205,19 @@ class RepositoryViewIntegrationTest(APITestCase):
         self.client.force_authenticate(user=self.user)
         self.url = reverse('repositories:repositories-list-create')
 
-    @patch('requests.get')
+        # Run the import inside the request so its effects can be asserted
+        delay_patcher = patch(
+            'repositories.views.import_repository.delay',
+            side_effect=lambda *args: import_repository.apply(args=args),
+        )
+        delay_patcher.start()
+        self.addCleanup(delay_patcher.stop)
+
+    @patch('requests.Session.get')
     def test_create_repository_fail(self, mock_get):
         """
         GIVEN: an invalid repository name
-        THEN: return not found status with an error message
+        THEN: return accepted status
         AND: do not create a Repository object
         """
         mock_get.return_value = Mock(
@@ -175,18 +231,12 @@ class RepositoryViewIntegrationTest(APITestCase):
         }
 
         response = self.client.post(self.url, data, format='json')
-        response_data = response.json()
 
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
-        self.assertEqual(
-            response_data,
-            {
-                'message': 'The requested repository does not exist',
-            }
-        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn('job_id', response.json())
         self.assertEqual(Repository.objects.count(), 0)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_create_repository_with_error_on_serializer(self, mock_get):
         """
         GIVEN: a invalid repository name
@@ -195,12 +245,6 @@ class RepositoryViewIntegrationTest(APITestCase):
         AND: do not create a Repository object
         """
 
-        mock_get.return_value = Mock(
-            ok=True,
-            url='http://test.com',
-            json=Mock(return_value=self.fake_data),
-        )
-
         invalid_str_size = Repository._meta.get_field('name').max_length + 1
         longe_name = fake.pystr(
             min_chars=invalid_str_size,
@@ -227,11 +271,13 @@ class RepositoryViewIntegrationTest(APITestCase):
         )
         self.assertEqual(Repository.objects.count(), 0)
 
-    @patch('requests.get')
+        mock_get.assert_not_called()
+
+    @patch('requests.Session.get')
     def test_create_repository(self, mock_get):
         """
         GIVEN: a valid repository name
-        THEN: return created status
+        THEN: return accepted status
         AND: create a Repository object
         """
         file_path = os.path.abspath("tests/fixtures/commit.json")
@@ -248,6 +294,7 @@ class RepositoryViewIntegrationTest(APITestCase):
                 ok=True,
                 url='https://test.com',
                 json=Mock(return_value=commits_data),
+                links={},
             ),
         ]
 
@@ -260,8 +307,109 @@ class RepositoryViewIntegrationTest(APITestCase):
 
         created_repository = Repository.objects.last()
 
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertEqual(created_repository.name, data.get('name'))
         self.assertEqual(Repository.objects.count(), 1)
         self.assertEqual(Commit.objects.count(), 1)
         self.assertEqual(Commit.objects.last().repository, created_repository)
+
+
+class RepositoryImportViewTest(APITestCase):
+    def setUp(self):
+        self.user = UserSocialAuthFactory().user
+        get_api_cache().clear()
+
+        self.client.force_authenticate(user=self.user)
+        self.job_id = fake.uuid4()
+        self.url = reverse(
+            'repositories:repositories-import-detail',
+            kwargs={'job_id': self.job_id},
+        )
+        cache.set(IMPORT_JOB_OWNER_KEY.format(self.job_id), self.user.pk)
+        self.addCleanup(cache.delete, IMPORT_JOB_OWNER_KEY.format(self.job_id))
+
+    @patch('repositories.views.import_repository.AsyncResult')
+    def test_import_in_progress(self, mock_result):
+        """
+        GIVEN: a running import job
+        THEN: return the pages fetched and commits stored so far
+        """
+        mock_result.return_value = Mock(
+            state='PROGRESS',
+            info={'pages': 2, 'commits': 200},
+            failed=Mock(return_value=False),
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {'job_id': self.job_id, 'status': 'PROGRESS', 'pages': 2, 'commits': 200},
+        )
+        mock_result.assert_called_once_with(self.job_id)
+
+    @patch('repositories.views.import_repository.AsyncResult')
+    def test_import_not_found(self, mock_result):
+        """
+        GIVEN: a finished import job for an inexistent repository
+        THEN: return the error message
+        """
+        mock_result.return_value = Mock(
+            state='SUCCESS',
+            info={
+                'found': False,
+                'pages': 0,
+                'commits': 0,
+                'message': 'The requested repository does not exist',
+            },
+            failed=Mock(return_value=False),
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json().get('message'),
+            'The requested repository does not exist',
+        )
+
+    @patch('repositories.views.import_repository.AsyncResult')
+    def test_import_failed(self, mock_result):
+        """
+        GIVEN: a failed import job
+        THEN: return the failure status and a generic error
+        """
+        mock_result.return_value = Mock(
+            state='FAILURE',
+            info=ValueError('boom'),
+            failed=Mock(return_value=True),
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                'job_id': self.job_id,
+                'status': 'FAILURE',
+                'pages': 0,
+                'commits': 0,
+                'message': 'The repository could not be imported',
+            },
+        )
+
+    @patch('repositories.views.import_repository.AsyncResult')
+    def test_import_of_other_user(self, mock_result):
+        """
+        GIVEN: an import job requested by another user
+        THEN: return not found status
+        AND: do not read the job state
+        """
+        cache.set(IMPORT_JOB_OWNER_KEY.format(self.job_id), UserSocialAuthFactory().user.pk)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        mock_result.assert_not_called()
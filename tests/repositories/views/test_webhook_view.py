@@ -0,0 +1,175 @@
+import hashlib
+import hmac
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from repositories.factories import RepositoryFactory
+from repositories.models import Commit
+
+SIGNING_KEY = 'test-signing-key'
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET=SIGNING_KEY)
+class GithubWebhookViewTest(APITestCase):
+    def setUp(self):
+        self.repository = RepositoryFactory(owner='user', name='repo')
+        self.url = reverse('repositories:webhooks-github')
+        self.payload = {
+            'ref': 'refs/heads/main',
+            'repository': {
+                'name': 'repo',
+                'full_name': 'user/repo',
+                'default_branch': 'main',
+            },
+            'sender': {'login': 'user', 'avatar_url': 'https://avatars.example.com/user'},
+            'commits': [
+                {
+                    'id': '6dcb09b5b57875f334f61aebed695e2e4193db5e',
+                    'message': 'Fix all the bugs',
+                    'timestamp': '2023-06-07T17:46:00-03:00',
+                    'url': 'https://github.com/user/repo/commit/6dcb09b',
+                    'author': {'name': 'User', 'username': 'user'},
+                },
+                {
+                    'id': '7638417db6d59f3c431d3e1f261cc637155684cd',
+                    'message': 'Add tests',
+                    'timestamp': '2023-06-07T18:46:00-03:00',
+                    'url': 'https://github.com/user/repo/commit/7638417',
+                    'author': {'name': 'Other', 'username': 'other'},
+                },
+            ],
+        }
+
+    def deliver(self, payload, event='push', secret=SIGNING_KEY):
+        body = json.dumps(payload).encode('utf-8')
+        signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            self.url,
+            body,
+            content_type='application/json',
+            HTTP_X_GITHUB_EVENT=event,
+            HTTP_X_HUB_SIGNATURE_256=f'sha256={signature}',
+        )
+
+    def test_push(self):
+        """
+        GIVEN: a signed push to the default branch
+        THEN: save the pushed commits
+        """
+
+        response = self.deliver(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'saved': 2})
+        self.assertEqual(Commit.objects.filter(repository=self.repository).count(), 2)
+
+        commit = Commit.objects.get(sha=self.payload['commits'][0]['id'])
+        self.assertEqual(commit.message, 'Fix all the bugs')
+        self.assertEqual(commit.author, 'User')
+        self.assertEqual(commit.avatar, 'https://avatars.example.com/user')
+        self.assertEqual(commit.url, 'https://github.com/user/repo/commit/6dcb09b')
+
+    def test_push_redelivered(self):
+        """
+        GIVEN: the same push delivered twice
+        THEN: do not duplicate commits
+        """
+
+        self.deliver(self.payload)
+        self.deliver(self.payload)
+
+        self.assertEqual(Commit.objects.count(), 2)
+
+    def test_push_other_case(self):
+        """
+        GIVEN: a push naming the repository with another case
+        THEN: save the pushed commits
+        """
+
+        self.payload['repository']['full_name'] = 'User/Repo'
+
+        response = self.deliver(self.payload)
+
+        self.assertEqual(response.json(), {'saved': 2})
+
+    def test_push_other_branch(self):
+        """
+        GIVEN: a push to another branch
+        THEN: ignore its commits
+        """
+
+        self.payload['ref'] = 'refs/heads/feature'
+
+        response = self.deliver(self.payload)
+
+        self.assertEqual(response.json(), {'saved': 0})
+        self.assertEqual(Commit.objects.count(), 0)
+
+    def test_push_untracked_repository(self):
+        """
+        GIVEN: a push to an untracked repository
+        THEN: ignore its commits
+        """
+
+        self.payload['repository']['name'] = 'untracked'
+        self.payload['repository']['full_name'] = 'user/untracked'
+
+        response = self.deliver(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Commit.objects.count(), 0)
+
+    def test_push_repository_of_other_owner(self):
+        """
+        GIVEN: a push to a repository with a tracked name of another owner
+        THEN: ignore its commits
+        """
+
+        self.payload['repository']['full_name'] = 'other/repo'
+
+        response = self.deliver(self.payload)
+
+        self.assertEqual(response.json(), {'saved': 0})
+        self.assertEqual(Commit.objects.count(), 0)
+
+    def test_ping(self):
+        """
+        GIVEN: a signed ping event
+        THEN: acknowledge it
+        """
+
+        response = self.deliver({'zen': 'Keep it logically awesome.'}, event='ping')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_signature(self):
+        """
+        GIVEN: a push signed with another secret
+        THEN: return forbidden status
+        AND: do not save its commits
+        """
+
+        response = self.deliver(self.payload, secret='wrong')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Commit.objects.count(), 0)
+
+    def test_missing_signature(self):
+        """
+        GIVEN: an unsigned push
+        THEN: return forbidden status
+        """
+
+        response = self.client.post(
+            self.url,
+            self.payload,
+            format='json',
+            HTTP_X_GITHUB_EVENT='push',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Commit.objects.count(), 0)